@@ -1,39 +1,91 @@
-from flask import Flask
-from flask_cors import CORS
+import time
 
-from . import errors
-from . import models
-from . import routes
+# Taken before the imports below so the startup report includes them
+_IMPORTS_STARTED = time.perf_counter()
+
+from flask import Flask  # noqa: E402
+
+from . import commands  # noqa: E402
+from . import errors  # noqa: E402
+from . import models  # noqa: E402
+from . import routes  # noqa: E402
+from .extensions import api_v1  # noqa: E402
+from .extensions import cache  # noqa: E402
+from .extensions import compression  # noqa: E402
+from .extensions import cors  # noqa: E402
+from .extensions import json_encoder  # noqa: E402
+from .extensions import metrics  # noqa: E402
+from .extensions import request_timing  # noqa: E402
+from .extensions import token_verifier  # noqa: E402
+from .utils.startup import StartupReport  # noqa: E402
+
+CORS_ORIGINS = [
+    'https://fgi.local',
+    r'^https:\/\/([A-Za-z0-9\-\.]+)\.fgi\.local$',
+    'https://localhost',
+    'http://localhost',
+    r'^https://localhost:(\d){1,5}$',
+    r'^http://localhost:(\d){1,5}$',
+    'https://webservice-files.s3.amazonaws.com/',
+    r'^https:\/\/([A-Za-z0-9\-\.]+)\.app\.focusglobalinc\.com$',
+    r'^https:\/\/([A-Za-z0-9\-\.]+)\.cloudfront\.net$',
+]
 
 
 def create_app() -> Flask:
+    global _IMPORTS_STARTED
+    # Only the first app of a process pays for the imports
+    startup = StartupReport(imports_started=_IMPORTS_STARTED)
+    _IMPORTS_STARTED = None
+
     app = Flask(__name__)
+    app.extensions['startup'] = startup
     logger = app.logger
-    CORS(
-        app,
-        supports_credentials=True,
-        origins=[
-            'https://fgi.local',
-            r'^https:\/\/([A-Za-z0-9\-\.]+)\.fgi\.local$',
-            'https://localhost',
-            'http://localhost',
-            r'^https://localhost:(\d){1,5}$',
-            r'^http://localhost:(\d){1,5}$',
-            'https://webservice-files.s3.amazonaws.com/',
-            r'^https:\/\/([A-Za-z0-9\-\.]+)\.app\.focusglobalinc\.com$',
-            r'^https:\/\/([A-Za-z0-9\-\.]+)\.ap-southeast-1\
-                .awsapprunner\.com$',
-            r'^https:\/\/([A-Za-z0-9\-\.]+)\.cloudfront\.net$',
-        ],
-    )
 
     # SQLAlchemy
     logger.info('Initializing SQLAlchemy...')
-    models.init_db(app)
+    with startup.phase('sqlalchemy'):
+        models.init_db(app)
     # Flask-Marshmallow
     # Important: initialize this **after** SQLAlchemy init
     logger.info('Initializing Flask-Marshmallow...')
-    models.init_marshmallow(app)
+    with startup.phase('marshmallow'):
+        models.init_marshmallow(app)
+
+    # Read-through cache for single-record lookups
+    logger.info('Initializing cache...')
+    with startup.phase('cache'):
+        cache.init_app(app)
+
+    # Server-Timing headers and per-request query counts
+    logger.info('Initializing request timing...')
+    with startup.phase('request_timing'):
+        request_timing.init_app(app)
+
+    # Prometheus metrics, served on /metrics
+    logger.info('Initializing metrics...')
+    with startup.phase('metrics'):
+        metrics.init_app(app)
+
+    # After the metrics and timing hooks, which preflights skip otherwise
+    logger.info('Initializing CORS...')
+    with startup.phase('cors'):
+        cors.init_app(app, origins=CORS_ORIGINS)
+
+    # gzip/zstd response compression
+    logger.info('Initializing compression...')
+    with startup.phase('compression'):
+        compression.init_app(app)
+
+    # orjson encoding of API responses and error bodies
+    logger.info('Initializing JSON encoder...')
+    with startup.phase('json_encoder'):
+        json_encoder.init_app(app, api_v1)
+
+    # Session token verification for `use_user_token`
+    logger.info('Initializing token verifier...')
+    with startup.phase('token_verifier'):
+        token_verifier.init_app(app)
 
     # # Flask-JWT-Extended
     # logger.info('Initializing Flask-JWT-Extended...')
@@ -43,18 +95,28 @@ def create_app() -> Flask:
     # Important: Add resources before passing the app object to the api object
     # Reason: Doing it the other way around causes the urls to not be found
     logger.info('Registering routes...')
-    routes.register_routes(app)
+    with startup.phase('routes'):
+        routes.register_routes(app)
 
     # Flask-RESTful
     logger.info('Initializing Flask-RESTful...')
-    routes.init_api(app)
+    with startup.phase('restful'):
+        routes.init_api(app)
 
-    # Flask-APISpec
+    # Flask-APISpec; the spec itself is built on the first /swagger/ hit
     logger.info('Initializing Flask-APISpec...')
-    routes.init_docs(app)
+    with startup.phase('apispec'):
+        routes.init_docs(app)
+
+    # CLI commands, next to the Flask-Migrate `db` group
+    with startup.phase('commands'):
+        commands.register_commands(app)
 
     # Map errors to responses
     logger.info('Registering error handlers...')
-    errors.register_error_handlers(app)
+    with startup.phase('error_handlers'):
+        errors.register_error_handlers(app)
 
+    logger.info(str(startup))
     return app
+
@@ -0,0 +1,368 @@
+"""ASGI entry point serving the `/v1/brand` routes on asyncio, next to
+the WSGI app built by `create_app`. ::
+
+    uvicorn asgi:app --workers 3
+
+The list, single-record and change feed routes are served natively:
+requests are validated and responses serialized with the same loaders and
+dumpers as `request_model`/`response_model`, errors have the same bodies
+as the Flask error handlers, and responses go through the same CORS,
+compression, metrics and `Server-Timing` settings as the Flask ones. Every
+other request (batch, export, import, preflights, `/metrics`, the docs,
+other methods) is handed to the Flask app, which runs on a thread pool.
+"""
+import json
+import logging
+import re
+import time
+from dataclasses import dataclass
+from http import HTTPStatus
+from typing import Any
+from typing import Awaitable
+from typing import Callable
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Pattern
+from typing import Tuple
+from urllib.parse import parse_qsl
+
+import desert
+from a2wsgi import WSGIMiddleware  # type: ignore
+from flask import Flask
+from marshmallow import ValidationError
+from werkzeug.datastructures import ETags
+from werkzeug.datastructures import Headers
+from werkzeug.datastructures import ImmutableMultiDict
+from werkzeug.http import parse_accept_header
+from werkzeug.http import parse_etags
+from werkzeug.http import quote_etag
+
+from app.core.brand import brand_etag
+from app.core.brand import brand_list_etag
+from app.core.brand_async import AsyncBrandCore
+from app.core.brand_async import create_engine_from_env
+from app.errors import BadRequestError
+from app.errors import generic_error_response
+from app.errors import http_error_response
+from app.errors import HTTPError
+from app.errors import is_jwt_error
+from app.errors import jwt_error_response
+from app.errors import validation_error_response
+from app.extensions import compression
+from app.extensions import cors
+from app.extensions import json_encoder
+from app.extensions import metrics
+from app.extensions import request_timing
+from app.schemas.resources.brand import BrandSchemas
+from app.utils.compression import encoded_etag
+from app.utils.conditional import matching_etag
+from app.utils.decorators import build_dumper
+from app.utils.decorators import build_loader
+from app.utils.decorators import build_sparse_dumper
+from app.utils.timing import phase
+
+logger = logging.getLogger(__name__)
+
+# (body, status code, extra headers); a `None` body sends no content
+_Response = Tuple[Any, int, List[Tuple[str, str]]]
+_Handler = Callable[..., Awaitable[_Response]]
+
+
+@dataclass
+class _Request:
+    method: str
+    path: str
+    args: ImmutableMultiDict
+    headers: Dict[str, str]
+    body: bytes
+
+    @property
+    def if_match(self) -> Optional[ETags]:
+        etags = parse_etags(self.headers.get('if-match'))
+        return etags or None
+
+    @property
+    def if_none_match(self) -> ETags:
+        return parse_etags(self.headers.get('if-none-match'))
+
+    def get_json(self) -> Any:
+        try:
+            return json.loads(self.body or b'null')
+        except ValueError:
+            raise BadRequestError(
+                description='The request body is not valid JSON',
+            )
+
+
+def _loader(model) -> Callable:
+    return build_loader(desert.schema_class(model), model)
+
+
+def _dumper(model) -> Callable:
+    return build_dumper(desert.schema_class(model))
+
+
+def _sparse_dumper(model) -> Callable:
+    return build_sparse_dumper(desert.schema_class(model), 'data')
+
+
+def _etag_header(etag: str) -> List[Tuple[str, str]]:
+    return [('ETag', quote_etag(etag))]
+
+
+class BrandAsgiApp:
+    """`flask_app` serves the routes not handled here; built with
+    `create_app` on startup when not given."""
+
+    def __init__(self, flask_app: Optional[Flask] = None):
+        self.brand_core: Optional[AsyncBrandCore] = None
+        self.fallback = None
+        if flask_app is not None:
+            self.fallback = WSGIMiddleware(flask_app)
+        self._load_list_query = _loader(BrandSchemas.GetListQuery)
+        self._load_get_query = _loader(BrandSchemas.GetQuery)
+        self._load_post = _loader(BrandSchemas.PostRequest)
+        self._load_patch = _loader(BrandSchemas.PatchRequest)
+        self._load_changes_query = _loader(BrandSchemas.ChangesQuery)
+        self._dump_list = _sparse_dumper(BrandSchemas.GetListResponse)
+        self._dump_get = _sparse_dumper(BrandSchemas.GetResponse)
+        self._dump_post = _dumper(BrandSchemas.PostResponse)
+        self._dump_patch = _dumper(BrandSchemas.PatchResponse)
+        self._dump_delete = _dumper(BrandSchemas.DeleteResponse)
+        self._dump_changes = _dumper(BrandSchemas.ChangesResponse)
+
+        # Named as Flask-RESTful names the endpoints, for the metrics
+        self._routes: List[Tuple[Pattern, str, Dict[str, _Handler]]] = [
+            (re.compile(r'/v1/brand'), 'brandlistsresource', {
+                'GET': self.get_brands,
+                'POST': self.post_brand,
+            }),
+            (re.compile(r'/v1/brand/changes'), 'brandchangesresource', {
+                'GET': self.get_changes,
+            }),
+            (re.compile(r'/v1/brand/(?P<brand_id>[0-9]+)'), 'brandresource', {
+                'GET': self.get_brand,
+                'PATCH': self.patch_brand,
+                'DELETE': self.delete_brand,
+            }),
+        ]
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+            return
+
+        route = self._match(scope) if scope['type'] == 'http' else None
+        if route is None:
+            await self.fallback(scope, receive, send)
+            return
+        started = time.perf_counter()
+        request_timing.begin()
+        handler, endpoint, kwargs = route
+        request = await self._read_request(scope, receive)
+        body, status, headers = await self._dispatch(request, handler, kwargs)
+        content, headers = self._finish(
+            request, endpoint, started, body, status, headers,
+        )
+        await self._send(send, status, headers, content)
+
+    def _match(self, scope) -> Optional[Tuple[_Handler, str, Dict]]:
+        for pattern, endpoint, handlers in self._routes:
+            match = pattern.fullmatch(scope['path'])
+            if match is not None:
+                handler = handlers.get(scope['method'])
+                if handler is None:
+                    return None
+                return handler, endpoint, match.groupdict()
+        return None
+
+    async def _lifespan(self, receive, send) -> None:
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                try:
+                    self._startup()
+                except Exception as e:
+                    await send({
+                        'type': 'lifespan.startup.failed',
+                        'message': str(e),
+                    })
+                    raise
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                if self.brand_core is not None:
+                    await self.brand_core.engine.dispose()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    def _startup(self) -> None:
+        if self.fallback is None:
+            # Imported here: the Flask app is only built by the server
+            from app import create_app
+
+            self.fallback = WSGIMiddleware(create_app())
+        # The extensions were configured by the Flask app
+        engine = create_engine_from_env()
+        if metrics.enabled:
+            metrics.instrument(engine.sync_engine)
+        if request_timing.enabled:
+            request_timing.instrument(engine.sync_engine)
+        self.brand_core = AsyncBrandCore(engine)
+
+    async def _read_request(self, scope, receive) -> _Request:
+        chunks = []
+        more_body = True
+        while more_body:
+            message = await receive()
+            chunks.append(message.get('body', b''))
+            more_body = message.get('more_body', False)
+
+        query_string = scope['query_string'].decode('latin-1')
+        return _Request(
+            method=scope['method'],
+            path=scope['path'],
+            args=ImmutableMultiDict(
+                parse_qsl(query_string, keep_blank_values=True),
+            ),
+            headers={
+                name.decode('latin-1'): value.decode('latin-1')
+                for name, value in scope['headers']
+            },
+            body=b''.join(chunks),
+        )
+
+    async def _dispatch(
+            self,
+            request: _Request,
+            handler: _Handler,
+            kwargs: Dict[str, str],
+    ) -> _Response:
+        try:
+            with phase('core'):
+                return await handler(request, **kwargs)
+        except HTTPError as e:
+            body, status = http_error_response(e)
+        except ValidationError as e:
+            body, status = validation_error_response(e)
+        except Exception as e:
+            if is_jwt_error(e):
+                body, status = jwt_error_response(e)  # type: ignore
+            else:
+                logger.exception('Unhandled error on %s', request.path)
+                body, status = generic_error_response(e)
+        return body, status, []
+
+    def _finish(
+            self,
+            request: _Request,
+            endpoint: str,
+            started: float,
+            body: Any,
+            status: int,
+            extra_headers: List[Tuple[str, str]],
+    ) -> Tuple[bytes, Headers]:
+        """Encode the response the way the Flask app's `after_request`
+        hooks do: compression, CORS, `Server-Timing` and metrics."""
+        headers = Headers(extra_headers)
+        content = b''
+        if body is not None:
+            # Same output as the WSGI app's JSON representation
+            content = json_encoder.dumps(body) + b'\n'
+            headers['Content-Type'] = 'application/json'
+
+        vary = []
+        if compression.enabled:
+            vary.append('Accept-Encoding')
+            encoding = compression.negotiate(
+                parse_accept_header(request.headers.get('accept-encoding')),
+                status,
+                'application/json' if body is not None else None,
+                len(content),
+            )
+            if encoding is not None:
+                content = compression.compress(content, encoding)
+                headers['Content-Encoding'] = encoding
+                etag = headers.get('ETag')
+                if etag is not None:
+                    headers['ETag'] = quote_etag(
+                        encoded_etag(etag.strip('"'), encoding),
+                    )
+        vary.append('Origin')
+        headers['Vary'] = ', '.join(vary)
+        headers.update(cors.allow_headers(request.headers.get('origin')))
+
+        server_timing = request_timing.end(request.method, request.path, status)
+        if server_timing is not None:
+            headers['Server-Timing'] = server_timing
+        if metrics.enabled:
+            metrics.observe(
+                endpoint, request.method, status,
+                time.perf_counter() - started,
+            )
+        if status != HTTPStatus.NOT_MODIFIED:
+            headers['Content-Length'] = str(len(content))
+        return content, headers
+
+    async def _send(self, send, status, headers: Headers, content) -> None:
+        await send({
+            'type': 'http.response.start',
+            'status': int(status),
+            'headers': [
+                (name.lower().encode('latin-1'), value.encode('latin-1'))
+                for name, value in headers.items()
+            ],
+        })
+        await send({'type': 'http.response.body', 'body': content})
+
+    async def get_brands(self, request: _Request) -> _Response:
+        query_args = self._load_list_query(request.args)
+        result = await self.brand_core.get_all(query_args)
+        etag = brand_list_etag(query_args, result)
+        matched = matching_etag(request.if_none_match, etag)
+        if matched is not None:
+            return None, HTTPStatus.NOT_MODIFIED, _etag_header(matched)
+        dump = self._dump_list(query_args.fields)
+        return dump(result), HTTPStatus.OK, _etag_header(etag)
+
+    async def get_changes(self, request: _Request) -> _Response:
+        query_args = self._load_changes_query(request.args)
+        result = await self.brand_core.changes(query_args)
+        return self._dump_changes(result), HTTPStatus.OK, []
+
+    async def post_brand(self, request: _Request) -> _Response:
+        payload = self._load_post(request.get_json())
+        result = await self.brand_core.create_brand(payload, 'test')
+        return self._dump_post(result), HTTPStatus.OK, []
+
+    async def get_brand(self, request: _Request, brand_id: str) -> _Response:
+        query_args = self._load_get_query(request.args)
+        result = await self.brand_core.get(int(brand_id))
+        etag = brand_etag(result['data'], query_args)
+        matched = matching_etag(request.if_none_match, etag)
+        if matched is not None:
+            return None, HTTPStatus.NOT_MODIFIED, _etag_header(matched)
+        dump = self._dump_get(query_args.fields)
+        return dump(result), HTTPStatus.OK, _etag_header(etag)
+
+    async def patch_brand(self, request: _Request, brand_id: str) -> _Response:
+        payload = self._load_patch(request.get_json())
+        result = await self.brand_core.update_brand(
+            int(brand_id), payload, 'test', if_match=request.if_match,
+        )
+        etag = _etag_header(brand_etag(result['data']))
+        return self._dump_patch(result), HTTPStatus.OK, etag
+
+    async def delete_brand(
+            self,
+            request: _Request,
+            brand_id: str,
+    ) -> _Response:
+        result = await self.brand_core.delete_brand(
+            int(brand_id), if_match=request.if_match,
+        )
+        return self._dump_delete(result), HTTPStatus.OK, []
+
+
+def create_asgi_app(flask_app: Optional[Flask] = None) -> BrandAsgiApp:
+    return BrandAsgiApp(flask_app)
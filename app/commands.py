@@ -0,0 +1,50 @@
+import json
+import os
+
+import click
+from flask import Flask
+from flask.cli import AppGroup
+
+from app.core.brand import BrandCore
+from app.extensions import docs
+
+brand_cli = AppGroup('brand', help='Brand catalog maintenance.')
+docs_cli = AppGroup('docs', help='API documentation.')
+
+
+@brand_cli.command('import')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option(
+    '--format', 'fmt',
+    type=click.Choice(['ndjson', 'csv']),
+    help='Defaults to the file extension.',
+)
+def import_brands(path: str, fmt: str) -> None:
+    """Upsert the brands in a CSV or NDJSON file, keyed on code."""
+    if fmt is None:
+        fmt = 'csv' if os.path.splitext(path)[1].lower() == '.csv' else 'ndjson'
+
+    with open(path, encoding='utf-8', newline='') as stream:
+        result = BrandCore().import_brands(stream, fmt)
+
+    click.echo(
+        f"Read {result['rows_read']} rows, merged {result['rows_merged']}, "
+        f"rejected {result['rows_rejected']} in {result['seconds']:.2f}s "
+        f"({result['rows_per_second']:.0f} rows/s)",
+    )
+    for error in result['errors']:
+        click.echo(f"  line {error['line']}: {error['messages']}", err=True)
+
+
+@docs_cli.command('export')
+@click.argument('path', type=click.Path(dir_okay=False, writable=True))
+def export_docs(path: str) -> None:
+    """Write the OpenAPI spec to PATH, to be served from APISPEC_SPEC_FILE."""
+    with open(path, 'w', encoding='utf-8') as stream:
+        json.dump(docs.build().to_dict(), stream)
+    click.echo(f'Wrote {path}')
+
+
+def register_commands(app: Flask) -> None:
+    app.cli.add_command(brand_cli)
+    app.cli.add_command(docs_cli)
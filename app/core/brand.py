@@ -1,43 +1,805 @@
+import json
+import os
+import time
+from collections import namedtuple
 from dataclasses import asdict
-from http import HTTPStatus
-from fgi.sqlalchemy import patch_model
+from dataclasses import fields
+from functools import lru_cache
+from math import ceil
+from typing import Container
+from typing import Dict
+from typing import Iterable
+from typing import Iterator
+from typing import List
+from typing import Optional
+from typing import TextIO
+from typing import Tuple
 
-from flask import Response
+import desert
+from marshmallow import EXCLUDE
+from marshmallow import ValidationError
+from sqlalchemy import BigInteger
+from sqlalchemy import bindparam
+from sqlalchemy import Boolean
+from sqlalchemy import cast
+from sqlalchemy import Column
+from sqlalchemy import delete
+from sqlalchemy import func
+from sqlalchemy import Integer
+from sqlalchemy import literal
+from sqlalchemy import MetaData
+from sqlalchemy import null
+from sqlalchemy import or_
+from sqlalchemy import Row
+from sqlalchemy import select
+from sqlalchemy import String
+from sqlalchemy import Table
+from sqlalchemy import text
+from sqlalchemy import Text
+from sqlalchemy import tuple_
+from sqlalchemy import union_all
+from sqlalchemy import update
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.dialects import sqlite
+from sqlalchemy.exc import IntegrityError
 
+from app.errors.brand import BrandAlreadyExistsError
+from app.errors.brand import BrandInvalidCursorError
 from app.errors.brand import BrandNotFoundError
+from app.errors.brand import BrandPreconditionFailedError
+from app.extensions import cache
 from app.extensions import db
 from app.models.brand import Brand
+from app.models.brand import BrandChangeCounter
+from app.models.brand import BrandTombstone
 from app.schemas.resources.brand import BrandSchemas
-# from app.errors.brand import BrandAlreadyExistsError
+from app.utils.cache import CacheBackend
+from app.utils.cache import LRUBackend
+from app.utils.cache import NullBackend
+from app.utils.conditional import hash_etag
+from app.utils.cursor import decode_cursor
+from app.utils.cursor import encode_cursor
+from app.utils.cursor import InvalidCursorError
+from app.utils.imports import batched
+from app.utils.imports import copy_rows
+from app.utils.imports import iter_records
+from app.utils.search import MatchMode
+from app.utils.search import NgramIndex
+from app.utils.search import text_filter
+from app.utils.singleflight import SingleFlight
+from app.utils.sparse import parse_fields
+
+# Rows per multi-row INSERT; keeps the bind parameter count well under
+# SQLite's limit
+_INSERT_CHUNK_SIZE = 500
+_WRITABLE_COLUMNS = ('code', 'name', 'is_active')
+IMPORT_BATCH_SIZE = 5000
+IMPORT_MAX_REPORTED_ERRORS = 100
+EXPORT_COLUMNS = tuple(
+    field.name for field in fields(BrandSchemas.Brand)
+)
+COUNT_STRATEGY = os.getenv('BRAND_COUNT_STRATEGY', 'exact')
+# Counts of the `cached` strategy, by filter set, when `cache` has no
+# backend (see `counts_backend`); only writes in this worker clear them,
+# the other workers see them after the TTL
+brand_counts = LRUBackend(
+    max_size=int(os.getenv('BRAND_COUNT_CACHE_SIZE', '1024')),
+    ttl=float(os.getenv('BRAND_COUNT_CACHE_TTL', '60')),
+)
+# Deleted on every brand write; its generation is part of the count keys
+BRAND_COUNTS_KEY = 'brand:counts'
+
+
+def brand_cache_key(brand_id: int) -> str:
+    return f'brand:{brand_id}'
+
+
+# Cached values must stay JSON serializable for the shared cache backends
+_CACHED_COLUMNS = ('id', 'code', 'name', 'is_active', 'version')
+
+
+def brand_to_dict(brand: Brand):
+    return {key: getattr(brand, key) for key in _CACHED_COLUMNS}
+
+
+def _batch_result(index: int, status: str, brand_id=None, error=None):
+    return {'index': index, 'status': status, 'id': brand_id, 'error': error}
+
+
+def _dialect(dialect_name: Optional[str] = None):
+    """Dialect module providing `insert().on_conflict_*`; defaults to the
+    dialect of the Flask-SQLAlchemy engine"""
+    if (dialect_name or db.engine.dialect.name) == 'postgresql':
+        return postgresql
+    return sqlite
+
+
+def _upsert_dialect(dialect_name: Optional[str] = None):
+    """`_dialect` and the arguments targeting `_brand_unique_constraint`
+    on it"""
+    dialect = _dialect(dialect_name)
+    if dialect is postgresql:
+        return dialect, {'constraint': '_brand_unique_constraint'}
+    return dialect, {'index_elements': ['code']}
+
+
+def _insert_skipping_conflicts(
+        rows: List[Dict],
+        dialect_name: Optional[str] = None,
+):
+    """Multi-row INSERT ... ON CONFLICT DO NOTHING on the brand code"""
+    dialect, conflict_target = _upsert_dialect(dialect_name)
+    return dialect.insert(Brand).values(rows).on_conflict_do_nothing(
+        **conflict_target,
+    )
+
+
+# Columns read back by the single-statement reads and writes below,
+# enough for the responses and ETags
+_RETURNED_COLUMNS = (
+    Brand.id, Brand.code, Brand.name, Brand.is_active, Brand.version,
+)
+
+
+def insert_brand(values: Dict, dialect_name: Optional[str] = None):
+    """INSERT ... ON CONFLICT DO NOTHING RETURNING the new brand. Returns
+    no row when the code is taken, including by a concurrent request, so
+    there is no need to look the code up first."""
+    return _insert_skipping_conflicts(
+        [values], dialect_name,
+    ).returning(*_RETURNED_COLUMNS)
+
+
+def if_match_versions(
+        brand_id: int,
+        if_match: Optional[Container[str]],
+) -> Optional[List[int]]:
+    """Brand versions whose ETag is listed in `if_match`, or `None` when
+    any version is accepted (no `If-Match`, or `*`). The ETag of any
+    representation of a version matches it: sparse fieldsets and
+    compressed bodies only add suffixes."""
+    if if_match is None or getattr(if_match, 'star_tag', False):
+        return None
+    prefix = f'brand-{brand_id}-'
+    versions = (
+        etag[len(prefix):].split('-', 1)[0] for etag in if_match
+        if etag.startswith(prefix)
+    )
+    return [int(version) for version in versions if version.isdigit()]
+
+
+def _where_brand(statement, brand_id: int, if_match):
+    statement = statement.where(Brand.id == brand_id)
+    versions = if_match_versions(brand_id, if_match)
+    if versions is not None:
+        statement = statement.where(Brand.version.in_(versions))
+    return statement.execution_options(synchronize_session=False)
+
+
+def load_brand_statement(brand_id: int):
+    """SELECT of the brand as a plain row, e.g. to fill the brand cache
+    without going through the session's identity map"""
+    return select(*_RETURNED_COLUMNS).where(Brand.id == brand_id)
+
+
+def update_brand_statement(
+        brand_id: int,
+        values: Dict,
+        if_match: Optional[Container[str]] = None,
+):
+    """UPDATE ... RETURNING writing the non-`None` `values` (as
+    `patch_model` does) and bumping the version. Returns no row when the
+    brand is missing or does not match `if_match`."""
+    values = {key: value for key, value in values.items() if value is not None}
+    statement = update(Brand).values(**values, version=Brand.version + 1)
+    return _where_brand(statement, brand_id, if_match).returning(
+        *_RETURNED_COLUMNS,
+    )
+
+
+def delete_brand_statement(
+        brand_id: int,
+        if_match: Optional[Container[str]] = None,
+):
+    """DELETE ... RETURNING the id; no row when the brand is missing or
+    does not match `if_match`."""
+    return _where_brand(delete(Brand), brand_id, if_match).returning(
+        Brand.id,
+    )
+
+
+def change_seq_statement(dialect_name: Optional[str] = None):
+    """Bump `BrandChangeCounter` and return the change sequence of the
+    current transaction, creating the counter row if needed (e.g. in
+    databases built by `create_all`). Run it in the transaction doing
+    the write, it holds the counter's row lock until the commit, so
+    writers commit in sequence order, one at a time; only used where
+    `change_seq_expression` is not available."""
+    insert = _dialect(dialect_name).insert(BrandChangeCounter).values(
+        id=1, value=1,
+    )
+    return insert.on_conflict_do_update(
+        index_elements=['id'],
+        set_={'value': BrandChangeCounter.value + 1},
+    ).returning(BrandChangeCounter.value)
+
+
+def _xid8_bigint(xid8):
+    return cast(cast(xid8, Text), BigInteger)
+
+
+def change_seq_expression(dialect_name: Optional[str] = None):
+    """Change sequence of the current transaction as an SQL expression,
+    on PostgreSQL (13+): its transaction id, which writers get without
+    waiting on each other. Ids are handed out when transactions start
+    writing, not when they commit, see `change_watermark`. `None` on
+    other databases."""
+    if (dialect_name or db.engine.dialect.name) != 'postgresql':
+        return None
+    return _xid8_bigint(func.pg_current_xact_id())
+
+
+def change_watermark(dialect_name: Optional[str] = None):
+    """Change sequence the feed stops at where `change_seq_expression`
+    is used: the oldest transaction still running, so a change only
+    gets in the feed once every change below it is committed (or rolled
+    back). A long running write transaction holds the feed back until
+    it ends. `None` on other databases, where sequences are committed
+    in order."""
+    if (dialect_name or db.engine.dialect.name) != 'postgresql':
+        return None
+    return _xid8_bigint(func.pg_snapshot_xmin(func.pg_current_snapshot()))
+
+
+def next_change_seq(connection):
+    """Change sequence for the writes of `connection`'s transaction:
+    `change_seq_expression`, or the bumped counter"""
+    dialect_name = connection.dialect.name
+    expression = change_seq_expression(dialect_name)
+    if expression is not None:
+        return expression
+    return connection.execute(
+        change_seq_statement(dialect_name),
+    ).scalar_one()
+
+
+def tombstone_statement(
+        brand_ids: Iterable[int],
+        change_seq,
+        dialect_name: Optional[str] = None,
+):
+    """Record the deletion of `brand_ids` for the change feed"""
+    insert = _dialect(dialect_name).insert(BrandTombstone).values([
+        {'brand_id': brand_id, 'change_seq': change_seq}
+        for brand_id in brand_ids
+    ])
+    return insert.on_conflict_do_update(
+        index_elements=['brand_id'],
+        set_={
+            'change_seq': insert.excluded.change_seq,
+            'deleted_at': func.now(),
+        },
+    )
+
+
+# Errors raised by `decode_cursor` and `cursor_int` on a malformed cursor;
+# e.g. `{"id": 1e999}` overflows
+_CURSOR_ERRORS = (
+    InvalidCursorError, KeyError, OverflowError, TypeError, ValueError,
+)
+
+
+def cursor_int(value) -> int:
+    """Integer of a cursor position, e.g. an id. Cursors come from
+    clients, so values that don't fit a BIGINT are rejected here instead
+    of failing in the database."""
+    number = int(value)
+    if not -2 ** 63 <= number < 2 ** 63:
+        raise ValueError(f'{number} is out of range')
+    return number
+
+
+def change_position(since: Optional[str]) -> Tuple[int, int]:
+    """Change sequence and brand id a `since` token points past; the
+    start of the feed when it is empty"""
+    if not since:
+        return 0, 0
+    try:
+        position = decode_cursor(since)
+        return cursor_int(position['seq']), cursor_int(position['id'])
+    except _CURSOR_ERRORS:
+        raise BrandInvalidCursorError(f'Token {since} is not valid')
+
+
+def changes_statement(
+        change_seq: int,
+        brand_id: int,
+        limit: int,
+        dialect_name: Optional[str] = None,
+):
+    """Brands written and deleted after `(change_seq, brand_id)`, in
+    feed order, up to the `change_watermark`. A single statement, so
+    both come from one snapshot, and both sides seek on their
+    `change_seq` index."""
+    watermark = change_watermark(dialect_name)
+    written = select(
+        Brand.id,
+        Brand.change_seq,
+        literal(False).label('deleted'),
+        Brand.code,
+        Brand.name,
+        Brand.is_active,
+        Brand.updated_at,
+    ).where(tuple_(Brand.change_seq, Brand.id) > (change_seq, brand_id))
+    if watermark is not None:
+        written = written.where(Brand.change_seq < watermark)
+    deleted = select(
+        BrandTombstone.brand_id,
+        BrandTombstone.change_seq,
+        literal(True),
+        null(),
+        null(),
+        null(),
+        BrandTombstone.deleted_at,
+    ).where(
+        tuple_(BrandTombstone.change_seq, BrandTombstone.brand_id)
+        > (change_seq, brand_id),
+    )
+    if watermark is not None:
+        deleted = deleted.where(BrandTombstone.change_seq < watermark)
+    feed = union_all(written, deleted).subquery()
+    return select(feed).order_by(feed.c.change_seq, feed.c.id).limit(limit)
+
+
+def change_page(rows, limit: int, change_seq: int, brand_id: int):
+    """Build the change feed response from up to `limit + 1` rows of
+    `changes_statement`; the extra row only tells whether there is
+    more."""
+    changes = rows[:limit]
+    if changes:
+        change_seq, brand_id = changes[-1].change_seq, changes[-1].id
+    return {
+        'data': changes,
+        'next_token': encode_cursor({'seq': change_seq, 'id': brand_id}),
+        'has_more': len(rows) > limit,
+    }
+
+
+def write_failed_error(brand_id: int, exists: bool):
+    """Error for a conditional write that matched no row, depending on
+    whether the brand `exists`"""
+    if exists:
+        return BrandPreconditionFailedError(
+            f'Brand with id {brand_id} does not match If-Match',
+        )
+    return BrandNotFoundError(f'Brand with id {brand_id} not found')
+
+
+def _import_staging_table() -> Table:
+    return Table(
+        'brand_import_staging',
+        MetaData(),
+        Column('line', Integer, nullable=False),
+        Column('code', String, nullable=False),
+        Column('name', String, nullable=False),
+        Column('is_active', Boolean, nullable=False),
+        prefixes=['TEMPORARY'],
+    )
+
+
+def brand_filters(query_args) -> List:
+    """WHERE clauses for the `is_active`/`code`/`name` filters shared by
+    the list and export endpoints (sync and async)."""
+    clauses = []
+    if query_args.is_active is not None:
+        clauses.append(Brand.is_active == query_args.is_active)
+    for field in ('code', 'name'):
+        predicate = text_filter(
+            getattr(Brand, field),
+            getattr(query_args, field),
+            MatchMode(query_args.match),
+        )
+        if predicate is not None:
+            clauses.append(predicate)
+    return clauses
+
+
+def selected_columns(query_args) -> Tuple[str, ...]:
+    """`Brand` fields asked for in the sparse fieldset (`fields`) of
+    `query_args`, in `EXPORT_COLUMNS` order; all of them when it is
+    empty."""
+    names = set(parse_fields(query_args.fields))
+    if not names:
+        return EXPORT_COLUMNS
+    return tuple(name for name in EXPORT_COLUMNS if name in names)
+
+
+def search_version_statement():
+    """SELECT of a value changing on every brand insert, update and
+    delete, for the in-process search indexes: the highest id, change
+    sequence and tombstone. Each is an index seek. Writes made behind
+    `BrandCore`'s back have to bump `change_seq`, as the change feed
+    needs them to anyway."""
+    return select(
+        select(func.max(Brand.id)).scalar_subquery(),
+        select(func.max(Brand.change_seq)).scalar_subquery(),
+        select(func.max(BrandTombstone.change_seq)).scalar_subquery(),
+    )
+
+
+def brand_columns(query_args) -> List:
+    """Columns selected by the read path: the `selected_columns`, plus
+    the id and version the cursors and ETags are built from."""
+    names = ('id', *selected_columns(query_args), 'version')
+    return [getattr(Brand, name) for name in dict.fromkeys(names)]
+
+
+def brand_etag(brand, query_args=None) -> str:
+    """ETag of a single brand, either an ORM instance or a cached dict.
+    A sparse fieldset (`fields` of `query_args`) is a different
+    representation, so its hash is appended."""
+    if isinstance(brand, dict):
+        etag = f"brand-{brand['id']}-{brand.get('version')}"
+    else:
+        etag = f'brand-{brand.id}-{brand.version}'
+    columns = EXPORT_COLUMNS if query_args is None else selected_columns(
+        query_args,
+    )
+    if columns != EXPORT_COLUMNS:
+        etag += '-' + hash_etag(columns)
+    return etag
+
+
+def brand_list_etag(query_args: BrandSchemas.GetListQuery, result) -> str:
+    """ETag of a `get_all` result; changes whenever a brand on the page is
+    written or the page boundaries move."""
+    return hash_etag(
+        asdict(query_args),
+        result['page_size'],
+        result['total_pages'],
+        result.get('next_cursor'),
+        [(brand.id, brand.version) for brand in result['data']],
+    )
+
+
+def count_strategy(query_args: BrandSchemas.GetListQuery) -> str:
+    return query_args.count or COUNT_STRATEGY
+
+
+def counts_backend() -> CacheBackend:
+    """Where the `cached` counts are kept: the `cache` backend, so with
+    `CACHE_BACKEND=redis` a write in any worker invalidates them in all
+    of them (entries last `CACHE_TTL`), or `brand_counts` when caching is
+    off."""
+    if isinstance(cache.backend, NullBackend):
+        return brand_counts
+    return cache.backend
+
+
+def count_cache_key(
+        query_args: BrandSchemas.GetListQuery,
+        backend: CacheBackend,
+) -> str:
+    """`backend` key of the filters in `query_args`, under the current
+    generation of `BRAND_COUNTS_KEY`, so counts read before a write are
+    never found after it; search terms match case-insensitively, so
+    their case is ignored."""
+    return 'count:' + hash_etag(
+        backend.generation(BRAND_COUNTS_KEY),
+        query_args.is_active,
+        query_args.code.lower(),
+        query_args.name.lower(),
+        query_args.match,
+    )
+
+
+def estimate_count(session, statement, filtered: bool) -> Optional[int]:
+    """Planner estimate of the rows `statement` returns: the table's
+    `reltuples` when it has no filters, the EXPLAIN row estimate
+    otherwise. `None` on databases other than PostgreSQL, or when the
+    table was never analyzed. ::
+
+    :param session: Sync session, e.g. from `AsyncSession.run_sync`
+    :param statement: Brand SELECT without ORDER BY, LIMIT or OFFSET
+    :param filtered: Whether `statement` has WHERE clauses
+    """
+    connection = session.connection()
+    if connection.dialect.name != 'postgresql':
+        return None
+
+    if not filtered:
+        estimate = connection.execute(
+            text('SELECT reltuples FROM pg_class '
+                 'WHERE oid = CAST(:table AS regclass)'),
+            {'table': Brand.__tablename__},
+        ).scalar()
+    else:
+        compiled = statement.compile(dialect=connection.dialect)
+        params = compiled.params
+        if compiled.positional:
+            params = tuple(params[name] for name in compiled.positiontup)
+        plan = connection.exec_driver_sql(
+            f'EXPLAIN (FORMAT JSON) {compiled}', params,
+        ).scalar()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        estimate = plan[0]['Plan']['Plan Rows']
+
+    # reltuples is -1 (PostgreSQL 14+) or 0 before the first ANALYZE
+    if estimate is None or estimate <= 0:
+        return None
+    return int(estimate)
+
+
+def page_bounds(query_args: BrandSchemas.GetListQuery) -> Tuple[int, int]:
+    """Page number and size actually used for `query_args`, with the
+    same bounds as Flask-SQLAlchemy's `paginate(error_out=False)`"""
+    page = query_args.page if query_args.page >= 1 else 1
+    per_page = query_args.per_page if query_args.per_page >= 1 else 20
+    return page, per_page
+
+
+def count_statement(statement):
+    """SELECT count(*) of the rows `statement` returns"""
+    return select(func.count()).select_from(
+        statement.order_by(None).subquery(),
+    )
+
+
+def total_pages(total: Optional[int], per_page: int) -> Optional[int]:
+    if total is None:
+        return None
+    return ceil(total / per_page) if total else 0
+
+
+def keyset_start(query_args: BrandSchemas.GetListQuery) -> int:
+    """Id to seek past for keyset pagination (`after` cursor)"""
+    if not query_args.after:
+        return 0
+    try:
+        return cursor_int(decode_cursor(query_args.after)['id'])
+    except _CURSOR_ERRORS:
+        raise BrandInvalidCursorError(
+            f'Cursor {query_args.after} is not valid',
+        )
+
+
+def keyset_page(query_args: BrandSchemas.GetListQuery, rows, per_page: int):
+    """Build the list response from up to `per_page + 1` rows ordered by
+    id; the extra row only tells whether there is a next page."""
+    brands = rows[:per_page]
+    next_cursor = None
+    if len(rows) > per_page:
+        next_cursor = encode_cursor({'id': brands[-1].id})
+
+    return {
+        'data': brands,
+        'page_num': query_args.page,
+        'page_size': per_page,
+        'total_pages': None,
+        'next_cursor': next_cursor,
+    }
+
+
+def list_flight_key(query_args: BrandSchemas.GetListQuery) -> str:
+    """`brand_list_flights` key of `query_args`, the same for every
+    request getting the same `get_all` result"""
+    _, per_page = page_bounds(query_args)
+    return 'list:' + hash_etag(
+        query_args.page,
+        per_page,
+        query_args.is_active,
+        query_args.code.lower(),
+        query_args.name.lower(),
+        query_args.match,
+        query_args.after,
+        count_strategy(query_args),
+        selected_columns(query_args),
+    )
+
+
+@lru_cache(maxsize=None)
+def _row_type(names: Tuple[str, ...]):
+    return namedtuple('BrandRow', names)
+
+
+def encode_page(result) -> Dict:
+    """`get_all` result as a JSON serializable dict"""
+    return {**result, 'data': [row._asdict() for row in result['data']]}
+
+
+def decode_page(value: Dict):
+    """`get_all` result from `encode_page`, with named tuple rows"""
+    rows = value['data']
+    Row = _row_type(tuple(rows[0]) if rows else ())
+    return {**value, 'data': [Row(**row) for row in rows]}
+
+
+def _coalesce_client():
+    url = os.getenv('BRAND_LIST_COALESCE_URL')
+    if not url:
+        return None
+    # Only needed when coalescing across workers
+    import redis  # type: ignore
+
+    return redis.Redis.from_url(url)
+
+
+# With `BRAND_LIST_COALESCE=true`, identical concurrent `get_all` calls in
+# this worker (or in every worker sharing `BRAND_LIST_COALESCE_URL`) run
+# once; `BRAND_LIST_COALESCE_WINDOW` seconds also reuses finished results.
+# Off by default: `sync` workers never have concurrent calls, so it only
+# helps gthread, gevent and ASGI workers, or with a window.
+brand_list_flights = SingleFlight(
+    window=float(os.getenv('BRAND_LIST_COALESCE_WINDOW', '0')),
+    enabled=os.getenv('BRAND_LIST_COALESCE', 'false').lower() == 'true',
+    shared=_coalesce_client(),
+    encode=encode_page,
+    decode=decode_page,
+    prefix='sample-gab-be:brand-list:',
+)
+
+
+def clear_list_caches() -> None:
+    """Drop the cached counts and coalesced list results, after any
+    brand write"""
+    brand_counts.clear()
+    cache.invalidate(BRAND_COUNTS_KEY)
+    brand_list_flights.clear()
 
 
 class BrandCore:
-    def get_all(self, query_args: BrandSchemas.GetListQuery):
-        brand_query = Brand.query
-        if query_args.is_active is not None:
-            brand_query = brand_query.filter(
-                Brand.is_active == query_args.is_active,
-            )
+    def __init__(self):
+        # Only used on databases without pg_trgm, see `_narrow_search`
+        self._search_indexes = {
+            'code': NgramIndex(),
+            'name': NgramIndex(),
+        }
 
-        brand_query = brand_query.filter(
-            Brand.code.ilike(f'%{query_args.code}%'),
-        ).filter(Brand.name.ilike(f'%{query_args.name}%'))
+    def _narrow_search(self, brand_query, query_args, field: str):
+        column = getattr(Brand, field)
+        term = getattr(query_args, field)
+        if not term or db.engine.dialect.name != 'sqlite':
+            return brand_query
 
-        paginated_brand = brand_query.paginate(
-            page=query_args.page, per_page=query_args.per_page,
-            error_out=False,
+        brand_ids = self._search_indexes[field].search(
+            term,
+            MatchMode(query_args.match),
+            lambda: db.session.query(Brand.id, column),
+            # Other processes (workers, `flask brand import`) write too
+            version=db.session.execute(search_version_statement()).one(),
         )
-        brands = paginated_brand.items
+        if brand_ids is not None:
+            brand_query = brand_query.filter(Brand.id.in_(brand_ids))
+        return brand_query
+
+    def _invalidate_search(self):
+        for index in self._search_indexes.values():
+            index.invalidate()
+
+    def _filter_query(self, brand_query, query_args):
+        """Apply the `is_active`/`code`/`name` filters shared by the list
+        and export endpoints to `brand_query`, either a `Brand` query or
+        a Core `select()`."""
+        brand_query = brand_query.filter(*brand_filters(query_args))
+        brand_query = self._narrow_search(brand_query, query_args, 'code')
+        brand_query = self._narrow_search(brand_query, query_args, 'name')
+        return brand_query
+
+    def get_all(self, query_args: BrandSchemas.GetListQuery):
+        return brand_list_flights.do(
+            list_flight_key(query_args),
+            lambda: self._get_all(query_args),
+        )
+
+    def _get_all(self, query_args: BrandSchemas.GetListQuery):
+        # Read-only, so brands are selected with Core as plain rows: no
+        # ORM instances, identity map entries or change tracking
+        statement = self._filter_query(
+            select(*brand_columns(query_args)), query_args,
+        )
+
+        if query_args.after is not None:
+            return self._get_page_after(statement, query_args)
+
+        page, per_page = page_bounds(query_args)
+        brands = db.session.execute(
+            statement.limit(per_page).offset((page - 1) * per_page),
+        ).all()
+        total, strategy = self._count(statement, query_args)
 
         return {
             'data': brands,
             'page_num': query_args.page,
-            'page_size': paginated_brand.per_page,
-            'total_pages': paginated_brand.pages,
+            'page_size': per_page,
+            'total_pages': total_pages(total, per_page),
+            'count_strategy': strategy,
         }
 
+    def _count(self, statement, query_args):
+        """Row count of `statement` for the strategy `query_args` asks
+        for, and the strategy that produced it."""
+        strategy = count_strategy(query_args)
+        if strategy == 'none':
+            return None, strategy
+        if strategy == 'estimated':
+            estimate = estimate_count(
+                db.session,
+                statement,
+                filtered=bool(brand_filters(query_args)),
+            )
+            if estimate is not None:
+                return estimate, strategy
+            strategy = 'exact'
+
+        if strategy == 'cached':
+            backend = counts_backend()
+            key = count_cache_key(query_args, backend)
+            total = backend.get(key)
+            if total is not None:
+                return total, strategy
+
+        total = db.session.scalar(count_statement(statement))
+        if strategy == 'cached':
+            backend.set(key, total)
+        return total, strategy
+
+    def _get_page_after(self, statement, query_args):
+        # Keyset pagination: seek past the last seen id instead of using
+        # OFFSET, and skip the COUNT(*) entirely
+        per_page = max(query_args.per_page, 1)
+        rows = db.session.execute(
+            statement.where(
+                Brand.id > keyset_start(query_args),
+            ).order_by(Brand.id).limit(per_page + 1),
+        ).all()
+        return keyset_page(query_args, rows, per_page)
+
+    def _load_brand(self, brand_id: int):
+        brand = db.session.execute(load_brand_statement(brand_id)).first()
+        if brand is None:
+            return None
+        return brand_to_dict(brand)
+
+    def changes(self, query_args: BrandSchemas.ChangesQuery):
+        """Brands written or deleted after the `since` token, oldest
+        first; the cost depends on the number of changes, not on the size
+        of the table."""
+        change_seq, brand_id = change_position(query_args.since)
+        rows = db.session.execute(
+            changes_statement(change_seq, brand_id, query_args.limit + 1),
+        ).all()
+        return change_page(rows, query_args.limit, change_seq, brand_id)
+
+    def export(
+            self,
+            query_args: BrandSchemas.ExportQuery,
+            batch_size: int = 1000,
+    ) -> Iterator[List[Row]]:
+        """Yield every brand matching the filters in batches of plain rows
+        holding the `selected_columns`. Rows are read through a server-side
+        cursor (`yield_per`) and never become ORM instances, so memory use
+        doesn't grow with the table."""
+        columns = [getattr(Brand, key) for key in selected_columns(query_args)]
+        brand_query = self._filter_query(
+            Brand.query, query_args,
+        ).with_entities(*columns).order_by(Brand.id).yield_per(batch_size)
+
+        batch: List[Row] = []
+        for row in brand_query:
+            batch.append(row)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
     def get(self, brand_id: int):
-        brand = Brand.query.get(brand_id)
+        # Read-through cache; entries are dropped by every write below
+        brand = cache.get_or_load(
+            brand_cache_key(brand_id),
+            lambda: self._load_brand(brand_id),
+        )
         if brand is None:
             raise BrandNotFoundError(f'Brand with id {brand_id} not found')
 
@@ -46,47 +808,371 @@ class BrandCore:
         }
 
     def create_brand(self, payload: BrandSchemas.PostRequest, user_name: str):
-        brand = Brand.query.filter_by(code=payload.code).first()
-        if brand is not None:
-            return Response(
-                {
-                    'error': 'test',
-                    'description': 'test description',
-                }, HTTPStatus.CONFLICT,
+        change_seq = next_change_seq(db.session.connection())
+        brand = db.session.execute(insert_brand(
+            {**asdict(payload), 'change_seq': change_seq},
+        )).first()
+        if brand is None:
+            db.session.rollback()
+            raise BrandAlreadyExistsError(
+                f'Brand with code {payload.code} already exists',
             )
-
-        brand = Brand(**asdict(payload))
-        brand.created_by = user_name
-        db.session.add(brand)
         db.session.commit()
+        self._invalidate_search()
+        clear_list_caches()
+        cache.invalidate(brand_cache_key(brand.id))
 
         return {
             'data': brand,
         }
 
+    def _write_failed(self, brand_id: int, if_match):
+        db.session.rollback()
+        exists = if_match is not None and db.session.execute(
+            select(Brand.id).where(Brand.id == brand_id),
+        ).first() is not None
+        return write_failed_error(brand_id, exists)
+
     def update_brand(
             self,
             brand_id: int,
             payload: BrandSchemas.PatchRequest,
             user_name: str,
+            if_match: Optional[Container[str]] = None,
     ):
-        brand = Brand.query.get(brand_id)
+        change_seq = next_change_seq(db.session.connection())
+        values = {**asdict(payload), 'change_seq': change_seq}
+        try:
+            brand = db.session.execute(
+                update_brand_statement(brand_id, values, if_match),
+            ).first()
+        except IntegrityError:
+            db.session.rollback()
+            raise BrandAlreadyExistsError(
+                f'Brand with code {payload.code} already exists',
+            )
         if brand is None:
-            raise BrandNotFoundError(f'Brand with id {brand_id} not found')
-
-        brand.modified_by = user_name
-        patch_model(brand, asdict(payload))
+            raise self._write_failed(brand_id, if_match)
 
         db.session.commit()
+        self._invalidate_search()
+        clear_list_caches()
+        cache.invalidate(brand_cache_key(brand_id))
         return {
             'data': brand,
         }
 
-    def delete_brand(self, brand_id: int):
-        brand = Brand.query.get(brand_id)
-        if brand is None:
-            raise BrandNotFoundError(f'Brand with id {brand_id} not found')
+    def delete_brand(
+            self,
+            brand_id: int,
+            if_match: Optional[Container[str]] = None,
+    ):
+        change_seq = next_change_seq(db.session.connection())
+        deleted = db.session.execute(
+            delete_brand_statement(brand_id, if_match),
+        ).first()
+        if deleted is None:
+            raise self._write_failed(brand_id, if_match)
 
-        db.session.delete(brand)
+        db.session.execute(tombstone_statement([brand_id], change_seq))
         db.session.commit()
+        self._invalidate_search()
+        clear_list_caches()
+        cache.invalidate(brand_cache_key(brand_id))
         return {'data': 'Successfully deleted the brand record'}
+
+    def bulk_write(self, items: List[BrandSchemas.BatchItem]):
+        """Apply a batch of creates, updates and deletes in a single
+        transaction. Deletes run first, then updates, then creates, so a
+        batch can free a code and reuse it. Returns one result per item,
+        in the order the items were given."""
+        results: Dict[int, Dict] = {}
+        creates: Dict[int, BrandSchemas.BatchItem] = {}
+        updates: Dict[int, BrandSchemas.BatchItem] = {}
+        deletes: Dict[int, BrandSchemas.BatchItem] = {}
+        for index, item in enumerate(items):
+            if item.op == 'create':
+                if item.code is None:
+                    results[index] = _batch_result(
+                        index, 'invalid', error='code is required',
+                    )
+                else:
+                    creates[index] = item
+            elif item.id is None:
+                results[index] = _batch_result(
+                    index, 'invalid', error='id is required',
+                )
+            elif item.op == 'update':
+                updates[index] = item
+            else:
+                deletes[index] = item
+
+        connection = db.session.connection()
+        touched_ids = set()
+        try:
+            # The whole batch is one change
+            change_seq = next_change_seq(connection)
+            if deletes:
+                touched_ids |= self._bulk_delete(
+                    connection, deletes, results, change_seq,
+                )
+            if updates:
+                touched_ids |= self._bulk_update(
+                    connection, updates, results, change_seq,
+                )
+            if creates:
+                touched_ids |= self._bulk_create(
+                    connection, creates, results, change_seq,
+                )
+            db.session.commit()
+        except IntegrityError as e:
+            # Lost a race with a concurrent write on the same code
+            db.session.rollback()
+            raise BrandAlreadyExistsError(str(e.orig))
+
+        self._invalidate_search()
+        clear_list_caches()
+        for brand_id in touched_ids:
+            cache.invalidate(brand_cache_key(brand_id))
+
+        return {
+            'data': [results[index] for index in range(len(items))],
+        }
+
+    def _bulk_delete(self, connection, deletes, results, change_seq):
+        brand_ids = {item.id for item in deletes.values()}
+        deleted_ids = set(connection.execute(
+            delete(Brand).where(Brand.id.in_(brand_ids)).returning(Brand.id),
+        ).scalars())
+        if deleted_ids:
+            connection.execute(tombstone_statement(deleted_ids, change_seq))
+
+        reported = set()
+        for index, item in deletes.items():
+            if item.id in deleted_ids and item.id not in reported:
+                reported.add(item.id)
+                results[index] = _batch_result(index, 'deleted', item.id)
+            else:
+                results[index] = _batch_result(index, 'not_found', item.id)
+        return deleted_ids
+
+    def _bulk_update(self, connection, updates, results, change_seq):
+        brand_ids = {item.id for item in updates.values()}
+        existing_ids = set(connection.execute(
+            select(Brand.id).where(Brand.id.in_(brand_ids)),
+        ).scalars())
+        codes = {
+            item.code for item in updates.values() if item.code is not None
+        }
+        code_owners = dict(connection.execute(
+            select(Brand.code, Brand.id).where(Brand.code.in_(codes)),
+        ).all()) if codes else {}
+
+        # One executemany per distinct set of updated columns
+        groups: Dict[Tuple[str, ...], List[Dict]] = {}
+        for index, item in updates.items():
+            if item.id not in existing_ids:
+                results[index] = _batch_result(index, 'not_found', item.id)
+                continue
+
+            values = {
+                key: getattr(item, key)
+                for key in _WRITABLE_COLUMNS
+                if getattr(item, key) is not None
+            }
+            if 'code' in values:
+                owner = code_owners.get(values['code'], item.id)
+                if owner != item.id:
+                    results[index] = _batch_result(
+                        index, 'conflict', item.id,
+                        error=f"Brand code {values['code']} already exists",
+                    )
+                    continue
+                code_owners[values['code']] = item.id
+
+            groups.setdefault(tuple(sorted(values)), []).append({
+                'b_id': item.id,
+                **{f'b_{key}': value for key, value in values.items()},
+            })
+            results[index] = _batch_result(index, 'updated', item.id)
+
+        for keys, rows in groups.items():
+            connection.execute(
+                update(Brand).where(Brand.id == bindparam('b_id')).values(
+                    version=Brand.version + 1,
+                    change_seq=change_seq,
+                    **{key: bindparam(f'b_{key}') for key in keys},
+                ),
+                rows,
+            )
+        return {row['b_id'] for rows in groups.values() for row in rows}
+
+    def _bulk_create(self, connection, creates, results, change_seq):
+        rows = []
+        indexes_by_code: Dict[str, int] = {}
+        for index, item in creates.items():
+            if item.code in indexes_by_code:
+                results[index] = _batch_result(
+                    index, 'conflict',
+                    error=f'Brand code {item.code} is repeated in the batch',
+                )
+                continue
+            indexes_by_code[item.code] = index
+            rows.append({
+                'code': item.code,
+                'name': item.name if item.name is not None else '',
+                'is_active': (
+                    item.is_active if item.is_active is not None else True
+                ),
+                'change_seq': change_seq,
+            })
+
+        created_ids: Dict[str, int] = {}
+        for start in range(0, len(rows), _INSERT_CHUNK_SIZE):
+            chunk = rows[start:start + _INSERT_CHUNK_SIZE]
+            statement = _insert_skipping_conflicts(chunk).returning(
+                Brand.id, Brand.code,
+            )
+            created_ids.update(
+                (code, brand_id)
+                for brand_id, code in connection.execute(statement)
+            )
+
+        for code, index in indexes_by_code.items():
+            if code in created_ids:
+                results[index] = _batch_result(
+                    index, 'created', created_ids[code],
+                )
+            else:
+                results[index] = _batch_result(
+                    index, 'conflict',
+                    error=f'Brand code {code} already exists',
+                )
+        return set(created_ids.values())
+
+    def import_brands(self, stream: TextIO, fmt: str):
+        """Upsert every brand in a CSV/NDJSON stream, keyed on `code`.
+        Records are validated against `ImportRecord` a batch at a time,
+        loaded into a temporary staging table (with `COPY` on Postgres)
+        and merged into `brand` with a single INSERT ... ON CONFLICT DO
+        UPDATE. When a code appears more than once, the last row wins."""
+        started = time.perf_counter()
+        schema = desert.schema(
+            BrandSchemas.ImportRecord, many=True, meta={'unknown': EXCLUDE},
+        )
+        staging = _import_staging_table()
+        connection = db.session.connection()
+        rows_read = 0
+        rows_rejected = 0
+        # Only the first ones are kept, a bad upload can reject every row
+        errors: List[Dict] = []
+        try:
+            staging.drop(connection, checkfirst=True)
+            staging.create(connection)
+            for batch in batched(iter_records(stream, fmt), IMPORT_BATCH_SIZE):
+                rows_read += len(batch)
+                lines, payloads, rejected = self._validate_import_batch(
+                    schema, batch, errors,
+                )
+                rows_rejected += rejected
+                copy_rows(connection, staging, [
+                    (line, payload.code, payload.name, payload.is_active)
+                    for line, payload in zip(lines, payloads)
+                ])
+
+            # Taken last: the counter's lock is held until the commit
+            change_seq = next_change_seq(connection)
+            merged_ids = self._merge_import_staging(
+                connection, staging, change_seq,
+            )
+            staging.drop(connection)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+        self._invalidate_search()
+        clear_list_caches()
+        cache.invalidate_many(
+            brand_cache_key(brand_id) for brand_id in merged_ids
+        )
+
+        seconds = time.perf_counter() - started
+        return {
+            'rows_read': rows_read,
+            'rows_rejected': rows_rejected,
+            'rows_merged': len(merged_ids),
+            'seconds': seconds,
+            'rows_per_second': rows_read / seconds if seconds else 0.0,
+            'errors': errors,
+        }
+
+    def _validate_import_batch(self, schema, batch, errors):
+        """Valid records of `batch`, with their line numbers, and the
+        number of rejected ones; adds their errors to `errors` up to
+        `IMPORT_MAX_REPORTED_ERRORS`."""
+        lines: List[int] = []
+        records: List[Dict] = []
+        rejected: List[Dict] = []
+        for line, record in batch:
+            if record is None:
+                rejected.append({
+                    'line': line,
+                    'messages': {'_schema': ['Malformed record.']},
+                })
+            else:
+                lines.append(line)
+                records.append(record)
+
+        try:
+            payloads = schema.load(records)
+        except ValidationError as e:
+            invalid = e.messages
+            rejected.extend(
+                {'line': lines[index], 'messages': invalid[index]}
+                for index in sorted(invalid)
+            )
+            valid = [i for i in range(len(records)) if i not in invalid]
+            lines = [lines[i] for i in valid]
+            payloads = schema.load([records[i] for i in valid])
+
+        room = IMPORT_MAX_REPORTED_ERRORS - len(errors)
+        errors.extend(sorted(rejected, key=lambda error: error['line'])[:room])
+        return lines, payloads, len(rejected)
+
+    def _merge_import_staging(
+            self,
+            connection,
+            staging: Table,
+            change_seq,
+    ) -> List[int]:
+        dialect, conflict_target = _upsert_dialect()
+        # Last row wins when a code is repeated in the upload
+        latest_lines = select(func.max(staging.c.line)).group_by(
+            staging.c.code,
+        )
+        source = select(
+            staging.c.code, staging.c.name, staging.c.is_active,
+            cast(change_seq, BigInteger),
+        ).where(staging.c.line.in_(latest_lines))
+
+        insert = dialect.insert(Brand).from_select(
+            ['code', 'name', 'is_active', 'change_seq'], source,
+        )
+        excluded = insert.excluded
+        statement = insert.on_conflict_do_update(
+            **conflict_target,
+            set_={
+                'name': excluded.name,
+                'is_active': excluded.is_active,
+                'version': Brand.version + 1,
+                'updated_at': func.now(),
+                'change_seq': excluded.change_seq,
+            },
+            # Leave unchanged brands (and their ETags) alone
+            where=or_(
+                Brand.name != excluded.name,
+                Brand.is_active != excluded.is_active,
+            ),
+        ).returning(Brand.id)
+        return list(connection.execute(statement).scalars())
@@ -0,0 +1,297 @@
+import asyncio
+import os
+from dataclasses import asdict
+from typing import Container
+from typing import Optional
+
+from sqlalchemy import select
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.core.brand import brand_cache_key
+from app.core.brand import brand_columns
+from app.core.brand import brand_filters
+from app.core.brand import brand_list_flights
+from app.core.brand import brand_to_dict
+from app.core.brand import change_page
+from app.core.brand import change_position
+from app.core.brand import change_seq_expression
+from app.core.brand import change_seq_statement
+from app.core.brand import changes_statement
+from app.core.brand import clear_list_caches
+from app.core.brand import count_cache_key
+from app.core.brand import count_statement
+from app.core.brand import count_strategy
+from app.core.brand import counts_backend
+from app.core.brand import delete_brand_statement
+from app.core.brand import estimate_count
+from app.core.brand import insert_brand
+from app.core.brand import keyset_page
+from app.core.brand import keyset_start
+from app.core.brand import list_flight_key
+from app.core.brand import load_brand_statement
+from app.core.brand import page_bounds
+from app.core.brand import tombstone_statement
+from app.core.brand import total_pages
+from app.core.brand import update_brand_statement
+from app.core.brand import write_failed_error
+from app.errors.brand import BrandAlreadyExistsError
+from app.errors.brand import BrandNotFoundError
+from app.extensions import cache
+from app.extensions import pool_stats
+from app.models.brand import Brand
+from app.schemas.resources.brand import BrandSchemas
+from app.utils.pool import engine_options
+from app.utils.pool import pgbouncer_mode
+
+# Async drivers replacing the sync ones used by `DB_URL`
+_ASYNC_DRIVERS = {
+    'postgresql': 'postgresql+asyncpg',
+    'sqlite': 'sqlite+aiosqlite',
+}
+
+
+def async_db_url() -> str:
+    """`ASYNC_DB_URL` if set, otherwise `DB_URL` with its driver swapped
+    for asyncpg (Postgres) or aiosqlite (SQLite)."""
+    url = os.getenv('ASYNC_DB_URL')
+    if url:
+        return url
+
+    url = make_url(os.getenv('DB_URL'))
+    return url.set(
+        drivername=_ASYNC_DRIVERS.get(url.get_backend_name(), url.drivername),
+    ).render_as_string(hide_password=False)
+
+
+def create_engine_from_env() -> AsyncEngine:
+    """Async engine with the same pool settings as the sync one (see
+    `app.utils.pool.engine_options`), reporting to `pool_stats`."""
+    url = async_db_url()
+    pool_class = pool_stats.pool_class(AsyncAdaptedQueuePool)
+    if make_url(url).get_backend_name() == 'sqlite':
+        # aiosqlite defaults to opening a connection (and its thread) per
+        # session; reuse them instead
+        engine = create_async_engine(url, poolclass=pool_class)
+    else:
+        options = engine_options(url, pool_class=pool_class)
+        connect_args = options.pop('connect_args', {})
+        if make_url(url).get_driver_name() == 'asyncpg':
+            # asyncpg takes server settings instead of startup options
+            # and caches prepared statements, which PgBouncer can't route
+            connect_args = {}
+            statement_timeout = os.getenv('DB_STATEMENT_TIMEOUT_MS')
+            if statement_timeout:
+                connect_args['server_settings'] = {
+                    'statement_timeout': str(int(statement_timeout)),
+                }
+            if pgbouncer_mode():
+                connect_args['statement_cache_size'] = 0
+                url = make_url(url).update_query_dict({
+                    'prepared_statement_cache_size': '0',
+                }).render_as_string(hide_password=False)
+        engine = create_async_engine(url, connect_args=connect_args, **options)
+
+    pool_stats.attach(engine.sync_engine)
+    return engine
+
+
+class AsyncBrandCore:
+    """`BrandCore` for the ASGI entry point (`app.asgi`). Same results,
+    errors and cache invalidation, but every query is awaited on an async
+    engine so a slow query only holds its own request. The in-process
+    n-gram search narrowing used on SQLite is not applied here."""
+
+    def __init__(self, engine: AsyncEngine):
+        self.engine = engine
+        self.session = async_sessionmaker(engine, expire_on_commit=False)
+
+    async def get_all(self, query_args: BrandSchemas.GetListQuery):
+        return await brand_list_flights.do_async(
+            list_flight_key(query_args),
+            lambda: self._get_all(query_args),
+        )
+
+    async def _get_all(self, query_args: BrandSchemas.GetListQuery):
+        brand_query = select(*brand_columns(query_args)).where(
+            *brand_filters(query_args),
+        )
+
+        async with self.session() as session:
+            if query_args.after is not None:
+                per_page = max(query_args.per_page, 1)
+                rows = (await session.execute(
+                    brand_query.where(
+                        Brand.id > keyset_start(query_args),
+                    ).order_by(Brand.id).limit(per_page + 1),
+                )).all()
+                return keyset_page(query_args, rows, per_page)
+
+            page, per_page = page_bounds(query_args)
+            total, strategy = await self._count(
+                session, brand_query, query_args,
+            )
+            brands = (await session.execute(
+                brand_query.limit(per_page).offset((page - 1) * per_page),
+            )).all()
+
+        return {
+            'data': brands,
+            'page_num': query_args.page,
+            'page_size': per_page,
+            'total_pages': total_pages(total, per_page),
+            'count_strategy': strategy,
+        }
+
+    async def _count(self, session, brand_query, query_args):
+        """Async `BrandCore._count`"""
+        strategy = count_strategy(query_args)
+        if strategy == 'none':
+            return None, strategy
+        if strategy == 'estimated':
+            estimate = await session.run_sync(
+                estimate_count,
+                brand_query,
+                bool(brand_filters(query_args)),
+            )
+            if estimate is not None:
+                return estimate, strategy
+            strategy = 'exact'
+
+        if strategy == 'cached':
+            # The backend may block (e.g. redis)
+            backend = counts_backend()
+            key = await asyncio.to_thread(
+                count_cache_key, query_args, backend,
+            )
+            total = await asyncio.to_thread(backend.get, key)
+            if total is not None:
+                return total, strategy
+
+        total = await session.scalar(count_statement(brand_query))
+        if strategy == 'cached':
+            await asyncio.to_thread(backend.set, key, total)
+        return total, strategy
+
+    async def _load_brand(self, brand_id: int):
+        async with self.session() as session:
+            brand = (
+                await session.execute(load_brand_statement(brand_id))
+            ).first()
+        if brand is None:
+            return None
+        return brand_to_dict(brand)
+
+    async def get(self, brand_id: int):
+        brand = await cache.get_or_load_async(
+            brand_cache_key(brand_id),
+            lambda: self._load_brand(brand_id),
+        )
+        if brand is None:
+            raise BrandNotFoundError(f'Brand with id {brand_id} not found')
+
+        return {
+            'data': brand,
+        }
+
+    async def changes(self, query_args: BrandSchemas.ChangesQuery):
+        change_seq, brand_id = change_position(query_args.since)
+        async with self.session() as session:
+            rows = (await session.execute(changes_statement(
+                change_seq, brand_id, query_args.limit + 1,
+                self.engine.dialect.name,
+            ))).all()
+        return change_page(rows, query_args.limit, change_seq, brand_id)
+
+    async def _change_seq(self, session):
+        """`next_change_seq` for `session`'s transaction"""
+        dialect_name = self.engine.dialect.name
+        expression = change_seq_expression(dialect_name)
+        if expression is not None:
+            return expression
+        return (await session.execute(
+            change_seq_statement(dialect_name),
+        )).scalar_one()
+
+    async def create_brand(
+            self,
+            payload: BrandSchemas.PostRequest,
+            user_name: str,
+    ):
+        dialect_name = self.engine.dialect.name
+        async with self.session() as session:
+            change_seq = await self._change_seq(session)
+            brand = (await session.execute(insert_brand(
+                {**asdict(payload), 'change_seq': change_seq}, dialect_name,
+            ))).first()
+            if brand is None:
+                raise BrandAlreadyExistsError(
+                    f'Brand with code {payload.code} already exists',
+                )
+            await session.commit()
+        clear_list_caches()
+        await asyncio.to_thread(cache.invalidate, brand_cache_key(brand.id))
+
+        return {
+            'data': brand,
+        }
+
+    async def _write_failed(self, session, brand_id: int, if_match):
+        await session.rollback()
+        exists = if_match is not None and (await session.execute(
+            select(Brand.id).where(Brand.id == brand_id),
+        )).first() is not None
+        return write_failed_error(brand_id, exists)
+
+    async def update_brand(
+            self,
+            brand_id: int,
+            payload: BrandSchemas.PatchRequest,
+            user_name: str,
+            if_match: Optional[Container[str]] = None,
+    ):
+        async with self.session() as session:
+            change_seq = await self._change_seq(session)
+            values = {**asdict(payload), 'change_seq': change_seq}
+            try:
+                brand = (await session.execute(update_brand_statement(
+                    brand_id, values, if_match,
+                ))).first()
+            except IntegrityError:
+                raise BrandAlreadyExistsError(
+                    f'Brand with code {payload.code} already exists',
+                )
+            if brand is None:
+                raise await self._write_failed(session, brand_id, if_match)
+            await session.commit()
+        clear_list_caches()
+        await asyncio.to_thread(cache.invalidate, brand_cache_key(brand_id))
+
+        return {
+            'data': brand,
+        }
+
+    async def delete_brand(
+            self,
+            brand_id: int,
+            if_match: Optional[Container[str]] = None,
+    ):
+        dialect_name = self.engine.dialect.name
+        async with self.session() as session:
+            change_seq = await self._change_seq(session)
+            deleted = (await session.execute(
+                delete_brand_statement(brand_id, if_match),
+            )).first()
+            if deleted is None:
+                raise await self._write_failed(session, brand_id, if_match)
+            await session.execute(
+                tombstone_statement([brand_id], change_seq, dialect_name),
+            )
+            await session.commit()
+        clear_list_caches()
+        await asyncio.to_thread(cache.invalidate, brand_cache_key(brand_id))
+        return {'data': 'Successfully deleted the brand record'}
@@ -1,12 +1,16 @@
+import sys
 from http import HTTPStatus
+from typing import TYPE_CHECKING
 
 from flask import Flask
-from jwt import DecodeError
-from jwt import InvalidSignatureError
+from flask_restful import Api as RestfulApi
 from marshmallow import ValidationError
 
 from app.types.flask import ResourceResponseType
 
+if TYPE_CHECKING:
+    from jwt import DecodeError
+
 
 # Make relevant generic HTTP error classes
 class HTTPError(Exception):
@@ -24,6 +28,15 @@ class HTTPError(Exception):
         return super().__init__(description or name, *args, **kwargs)
 
 
+class BadRequestError(HTTPError):
+    def __init__(self, name='BAD REQUEST', description: str = ''):
+        return super().__init__(
+            code=HTTPStatus.BAD_REQUEST,
+            name=name,
+            description=description,
+        )
+
+
 class ResourceNotFoundError(HTTPError):
     def __init__(self, name='NOT FOUND', description: str = ''):
         return super().__init__(
@@ -42,48 +55,107 @@ class ResourceConflictError(HTTPError):
         )
 
 
-def register_error_handlers(app: Flask) -> None:
-    @app.errorhandler(DecodeError)
-    def jwt_decode_error(exception: DecodeError):
-        (message,) = exception.args
-        unhandled_code = 'Unhandled JWT Error'
-        error_code = unhandled_code
-
-        if isinstance(exception, InvalidSignatureError):
-            error_code = 'Signature Verification Failed'
-        else:
-            # TODO(ghelo) this is being covered, unsure why its not reported
-            if message == 'Not enough segments':  # pragma: no cover
-                error_code = 'Not Enough JWT Segments'
-
-        status_code = (
-            HTTPStatus.INTERNAL_SERVER_ERROR
-            if error_code == unhandled_code else
-            HTTPStatus.BAD_REQUEST
+class MethodNotAllowedError(HTTPError):
+    def __init__(self, name='METHOD NOT ALLOWED', description: str = ''):
+        return super().__init__(
+            code=HTTPStatus.METHOD_NOT_ALLOWED,
+            name=name,
+            description=description,
+        )
+
+
+class PreconditionFailedError(HTTPError):
+    def __init__(self, name='PRECONDITION FAILED', description: str = ''):
+        return super().__init__(
+            code=HTTPStatus.PRECONDITION_FAILED,
+            name=name,
+            description=description,
         )
-        return {
-            'error': error_code,
-            'description': message,
-        }, status_code
-
-    @app.errorhandler(HTTPError)
-    def not_found_error(e: HTTPError) -> ResourceResponseType:
-        return {
-            'error': e.name,
-            'description': e.description,
-        }, e.code
-
-    @app.errorhandler(ValidationError)
-    def invalid_payload(e: ValidationError):
-        return {
-            'error': 'BAD REQUEST',
-            'messages': e.messages,
-        }, HTTPStatus.BAD_REQUEST
-
-    # Always put this handler last; this is the most generic error handler
-    @app.errorhandler(Exception)
-    def generic_error(e: Exception) -> ResourceResponseType:
-        return {
-            'error': 'Generic Error',
-            'description': str(e),
-        }, HTTPStatus.INTERNAL_SERVER_ERROR
+
+
+def is_jwt_error(e: Exception) -> bool:
+    """Whether `e` is a `jwt.DecodeError`. `jwt` is only imported when
+    the first token is verified, and none can be raised before that, so
+    it isn't imported here."""
+    jwt = sys.modules.get('jwt')
+    return jwt is not None and isinstance(e, jwt.DecodeError)
+
+
+# Response bodies shared by the Flask error handlers and the ASGI app
+def jwt_error_response(exception: 'DecodeError') -> ResourceResponseType:
+    from jwt import InvalidSignatureError
+
+    (message,) = exception.args
+    unhandled_code = 'Unhandled JWT Error'
+    error_code = unhandled_code
+
+    if isinstance(exception, InvalidSignatureError):
+        error_code = 'Signature Verification Failed'
+    else:
+        # TODO(ghelo) this is being covered, unsure why its not reported
+        if message == 'Not enough segments':  # pragma: no cover
+            error_code = 'Not Enough JWT Segments'
+
+    status_code = (
+        HTTPStatus.INTERNAL_SERVER_ERROR
+        if error_code == unhandled_code else
+        HTTPStatus.BAD_REQUEST
+    )
+    return {
+        'error': error_code,
+        'description': message,
+    }, status_code
+
+
+def http_error_response(e: HTTPError) -> ResourceResponseType:
+    return {
+        'error': e.name,
+        'description': e.description,
+    }, e.code
+
+
+def validation_error_response(e: ValidationError) -> ResourceResponseType:
+    return {
+        'error': 'BAD REQUEST',
+        'messages': e.messages,
+    }, HTTPStatus.BAD_REQUEST
+
+
+def generic_error_response(e: Exception) -> ResourceResponseType:
+    return {
+        'error': 'Generic Error',
+        'description': str(e),
+    }, HTTPStatus.INTERNAL_SERVER_ERROR
+
+
+def exception_response(e: Exception) -> ResourceResponseType:
+    if is_jwt_error(e):
+        return jwt_error_response(e)  # type: ignore
+    return generic_error_response(e)
+
+
+# Errors with their own handler below, along with the `jwt` errors;
+# everything else is a 500
+HANDLED_ERRORS = (HTTPError, ValidationError)
+
+
+class Api(RestfulApi):
+    """Flask-RESTful `Api` leaving `HANDLED_ERRORS` to the app's error
+    handlers. Flask-RESTful's own `handle_error` turns every exception
+    that isn't a werkzeug `HTTPException` into a bare 500, so the
+    handlers registered below would never see errors raised by
+    resources."""
+
+    def handle_error(self, e):
+        if isinstance(e, HANDLED_ERRORS) or is_jwt_error(e):
+            # `error_router` falls back to Flask's handlers on a raise
+            raise e
+        return super().handle_error(e)
+
+
+def register_error_handlers(app: Flask) -> None:
+    app.register_error_handler(HTTPError, http_error_response)
+    app.register_error_handler(ValidationError, validation_error_response)
+    # Always put this handler last; this is the most generic error handler.
+    # It also answers the `jwt` errors, see `is_jwt_error`
+    app.register_error_handler(Exception, exception_response)
@@ -1,4 +1,6 @@
+from app.errors import BadRequestError
 from app.errors import ResourceConflictError
+from app.errors import PreconditionFailedError
 from app.errors import ResourceNotFoundError
 
 
@@ -13,3 +15,16 @@ class BrandAlreadyExistsError(ResourceConflictError):
             name='Brand code already exists',
             description=description,
         )
+
+
+class BrandInvalidCursorError(BadRequestError):
+    def __init__(self, description=''):
+        super().__init__(name='Invalid brand cursor', description=description)
+
+
+class BrandPreconditionFailedError(PreconditionFailedError):
+    def __init__(self, description=''):
+        super().__init__(
+            name='Brand was modified',
+            description=description,
+        )
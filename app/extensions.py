@@ -1,12 +1,27 @@
 # Ignore packages that don't have type stubs for now
-from flask_apispec import FlaskApiSpec  # type: ignore
 from flask_marshmallow import Marshmallow  # type: ignore
-from flask_migrate import Migrate
-from flask_restful import Api
 from flask_sqlalchemy import SQLAlchemy
 
+from app.errors import Api
+from app.utils.cache import Cache
+from app.utils.compression import Compression
+from app.utils.cors import Cors
+from app.utils.docs import LazyApiSpec
+from app.utils.json_encoder import JsonEncoder
+from app.utils.metrics import Metrics
+from app.utils.pool import PoolStats
+from app.utils.timing import RequestTiming
+from app.utils.tokens import TokenVerifier
+
 db = SQLAlchemy()
 api_v1 = Api(prefix='/v1')
 ma = Marshmallow()
-docs = FlaskApiSpec()
-migrate = Migrate(compare_type=True)
+docs = LazyApiSpec()
+cache = Cache()
+compression = Compression()
+cors = Cors()
+json_encoder = JsonEncoder()
+pool_stats = PoolStats()
+request_timing = RequestTiming()
+metrics = Metrics()
+token_verifier = TokenVerifier()
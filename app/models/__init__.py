@@ -1,10 +1,12 @@
 import os
 
+import click
 from flask import Flask
 
 from app.extensions import db
 from app.extensions import ma
-from app.extensions import migrate
+from app.extensions import pool_stats
+from app.utils.pool import engine_options
 
 
 def init_db(app: Flask) -> None:
@@ -12,12 +14,46 @@ def init_db(app: Flask) -> None:
     app.config['SQLALCHEMY_DATABASE_URI'] = (
         env_conn_string
     )
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(
+        env_conn_string,
+        pool_class=pool_stats.pool_class(),
+    )
 
     db.init_app(app)
-    migrate.init_app(app, db)
+    init_migrate(app)
+    with app.app_context():
+        pool_stats.attach(db.engine)
 
     from app.models.brand import Brand  # noqa: F401
 
 
+def init_migrate(app: Flask) -> None:
+    # Flask-Migrate imports Alembic, which takes a noticeable part of the
+    # cold start and is only used by the `flask db` commands. Apps loaded
+    # by the Flask CLI are created inside a click context.
+    if click.get_current_context(silent=True) is None:
+        return
+
+    from flask_migrate import Migrate
+
+    Migrate(app, db, compare_type=True, include_object=include_object)
+
+
+def include_object(object, name, type_, reflected, compare_to) -> bool:
+    """Alembic autogenerate filter leaving out the indexes created on
+    another dialect only (`Index.ddl_if`), e.g. the Postgres trigram
+    indexes when migrating SQLite"""
+    ddl_if = getattr(object, '_ddl_if', None)
+    if type_ != 'index' or reflected or ddl_if is None or not ddl_if.dialect:
+        return True
+
+    from alembic import context
+
+    dialects = ddl_if.dialect
+    if isinstance(dialects, str):
+        dialects = (dialects,)
+    return context.get_bind().dialect.name in dialects
+
+
 def init_marshmallow(app: Flask) -> None:
     ma.init_app(app)
@@ -1,5 +1,9 @@
+from sqlalchemy import BigInteger
 from sqlalchemy import Boolean
 from sqlalchemy import Column
+from sqlalchemy import DateTime
+from sqlalchemy import func
+from sqlalchemy import Index
 from sqlalchemy import Integer
 from sqlalchemy import String
 from sqlalchemy import UniqueConstraint
@@ -15,9 +19,63 @@ class Brand(db.Model):  # type: ignore
             'code',
             name='_brand_unique_constraint',
         ),
+        # Trigram indexes for substring search, Postgres only like the
+        # `add brand trigram indexes` migration
+        Index(
+            'ix_brand_code_trgm', 'code',
+            postgresql_using='gin',
+            postgresql_ops={'code': 'gin_trgm_ops'},
+        ).ddl_if(dialect='postgresql'),
+        Index(
+            'ix_brand_name_trgm', 'name',
+            postgresql_using='gin',
+            postgresql_ops={'name': 'gin_trgm_ops'},
+        ).ddl_if(dialect='postgresql'),
+        # Keyset order of the change feed, see `BrandCore.changes`
+        Index('ix_brand_change_seq', 'change_seq', 'id'),
     )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     code = Column(String, nullable=False)
     name = Column(String, nullable=False)
     is_active = Column(Boolean, nullable=False)
+    # Bumped on every write; used to build ETags
+    version = Column(Integer, nullable=False, default=1, server_default='1')
+    updated_at = Column(
+        DateTime,
+        nullable=False,
+        server_default=func.now(),
+        onupdate=func.now(),
+    )
+    # `BrandChangeCounter` value of the transaction that last wrote it
+    change_seq = Column(
+        BigInteger,
+        nullable=False,
+        default=0,
+        server_default='0',
+    )
+
+
+class BrandTombstone(db.Model):  # type: ignore
+    """Deleted brand, kept so change feed clients can drop it"""
+    __tablename__ = 'brand_tombstone'
+    __table_args__ = (
+        Index('ix_brand_tombstone_change_seq', 'change_seq', 'brand_id'),
+    )
+
+    brand_id = Column(Integer, primary_key=True, autoincrement=False)
+    change_seq = Column(BigInteger, nullable=False)
+    deleted_at = Column(DateTime, nullable=False, server_default=func.now())
+
+
+class BrandChangeCounter(db.Model):  # type: ignore
+    """Single row handing out the change sequence on databases other
+    than PostgreSQL. Writers bump it in their transaction and hold its
+    row lock until they commit, so the sequence is in commit order and
+    feed clients never skip a change committed late. PostgreSQL uses
+    transaction ids instead (see `change_seq_expression`); every bump of
+    the counter took one, so they are above any sequence it gave out."""
+    __tablename__ = 'brand_change_counter'
+
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    value = Column(BigInteger, nullable=False)
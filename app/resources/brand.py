@@ -1,20 +1,36 @@
+import io
+
+import desert
+from app.core.brand import brand_etag
+from app.core.brand import brand_list_etag
 from app.core.brand import BrandCore
+from app.core.brand import selected_columns
 from app.schemas.resources.brand import BrandSchemas
-from fgi.flask import request_model
-from fgi.flask import response_model
-from flask_apispec import doc  # type: ignore
-from flask_apispec import MethodResource
+from app.utils.conditional import conditional_get
+from app.utils.conditional import set_etag
+from app.utils.decorators import request_model
+from app.utils.decorators import response_model
+from app.utils.docs import doc
+from app.utils.docs import MethodResource
+from app.utils.export import csv_chunks
+from app.utils.export import ndjson_chunks
+from flask import request
+from flask import Response
+from flask import stream_with_context
 from flask_restful import Resource
 
 brand_core = BrandCore()
+import_query_schema = desert.schema(BrandSchemas.ImportQuery)
 
 
 @doc(tags=['Brand'])
 class BrandListsResource(Resource, MethodResource):
     @request_model(query_model=BrandSchemas.GetListQuery)
-    @response_model(BrandSchemas.GetListResponse)
+    @response_model(BrandSchemas.GetListResponse, sparse='data')
     def get(self, query_args: BrandSchemas.GetListQuery):
-        return brand_core.get_all(query_args)
+        result = brand_core.get_all(query_args)
+        conditional_get(brand_list_etag(query_args, result))
+        return result
 
     @request_model(body_model=BrandSchemas.PostRequest)
     @response_model(BrandSchemas.PostResponse)
@@ -25,9 +41,13 @@ class BrandListsResource(Resource, MethodResource):
 
 @doc(tags=['Brand'])
 class BrandResource(Resource, MethodResource):
-    @response_model(BrandSchemas.GetResponse)
-    def get(self, brand_id):
-        return brand_core.get(brand_id)
+    @request_model(query_model=BrandSchemas.GetQuery)
+    @response_model(BrandSchemas.GetResponse, sparse='data')
+    def get(self, brand_id, query_args: BrandSchemas.GetQuery):
+        # The whole brand is cached, `fields` only trims the response
+        result = brand_core.get(brand_id)
+        conditional_get(brand_etag(result['data'], query_args))
+        return result
 
     @request_model(body_model=BrandSchemas.PatchRequest)
     @response_model(BrandSchemas.PatchResponse)
@@ -37,8 +57,73 @@ class BrandResource(Resource, MethodResource):
         payload: BrandSchemas.PatchRequest,
     ):
         user_name = "test"
-        return brand_core.update_brand(brand_id, payload, user_name)
+        result = brand_core.update_brand(
+            brand_id, payload, user_name, if_match=request.if_match or None,
+        )
+        set_etag(brand_etag(result['data']))
+        return result
 
     @response_model(BrandSchemas.DeleteResponse)
     def delete(self, brand_id):
-        return brand_core.delete_brand(brand_id)
+        return brand_core.delete_brand(
+            brand_id, if_match=request.if_match or None,
+        )
+
+
+@doc(tags=['Brand'])
+class BrandChangesResource(Resource, MethodResource):
+    @request_model(query_model=BrandSchemas.ChangesQuery)
+    @response_model(BrandSchemas.ChangesResponse)
+    def get(self, query_args: BrandSchemas.ChangesQuery):
+        return brand_core.changes(query_args)
+
+
+@doc(tags=['Brand'])
+class BrandBatchResource(Resource, MethodResource):
+    @request_model(body_model=BrandSchemas.BatchRequest)
+    @response_model(BrandSchemas.BatchResponse)
+    def post(self, payload: BrandSchemas.BatchRequest):
+        return brand_core.bulk_write(payload.items)
+
+
+@doc(tags=['Brand'])
+class BrandExportResource(Resource, MethodResource):
+    @request_model(query_model=BrandSchemas.ExportQuery)
+    def get(self, query_args: BrandSchemas.ExportQuery):
+        batches = brand_core.export(query_args)
+        columns = selected_columns(query_args)
+        if query_args.format == 'csv':
+            chunks = csv_chunks(batches, columns)
+            mimetype = 'text/csv'
+        else:
+            chunks = ndjson_chunks(batches, columns)
+            mimetype = 'application/x-ndjson'
+
+        # Keep the app context (and its DB session) alive while streaming
+        return Response(
+            stream_with_context(chunks),
+            mimetype=mimetype,
+            headers={
+                'Content-Disposition': (
+                    f'attachment; filename=brands.{query_args.format}'
+                ),
+            },
+        )
+
+
+@doc(tags=['Brand'])
+class BrandImportResource(Resource, MethodResource):
+    # Not using `request_model` here: it reads the whole body to check for
+    # one, and the upload has to be streamed
+    @response_model(BrandSchemas.ImportResponse)
+    def post(self):
+        query_args = import_query_schema.load(request.args)
+        # Either a multipart upload or the raw request body
+        upload = next(iter(request.files.values()), None)
+        stream = upload.stream if upload is not None else request.stream
+        # Only `\r` and `\n` end lines; `codecs` readers also split on
+        # U+2028, form feeds etc., which are valid inside values
+        return brand_core.import_brands(
+            io.TextIOWrapper(stream, encoding='utf-8', newline=''),
+            query_args.format,
+        )
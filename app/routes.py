@@ -1,16 +1,29 @@
 import os
-from apispec import APISpec
-from apispec.ext.marshmallow import MarshmallowPlugin
+from app.core.brand import brand_list_flights
+from app.resources.brand import BrandBatchResource
+from app.resources.brand import BrandChangesResource
+from app.resources.brand import BrandExportResource
+from app.resources.brand import BrandImportResource
 from app.resources.brand import BrandListsResource, BrandResource
 from app.extensions import api_v1
 from flask import Flask
+from flask import Response
 from app.types.flask import ResourceResponseType
 from http import HTTPStatus
 from typing import Any
 from marshmallow import Schema
-from apispec.ext.marshmallow.common import resolve_schema_cls
+from app.extensions import cache
+from app.extensions import compression
 from app.extensions import docs
+from app.extensions import metrics
+from app.extensions import pool_stats
+from app.extensions import token_verifier
+from app.utils.decorators import internal_only
 from typing import Dict
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from apispec import APISpec
 
 
 def register_routes(app: Flask) -> None:
@@ -22,14 +35,38 @@ def register_routes(app: Flask) -> None:
     def check_error_handler() -> Any:
         raise Exception('Error handler works fine!')
 
+    @app.route('/internal/stats')
+    @internal_only()
+    def stats() -> ResourceResponseType:
+        return {
+            'brand_list_flights': brand_list_flights.stats(),
+            'cache': cache.stats(),
+            'compression': compression.stats(),
+            'db_pool': pool_stats.stats(),
+            'token_verifier': token_verifier.stats(),
+            'startup': app.extensions['startup'].as_dict(),
+        }, HTTPStatus.OK
+
+    @app.route('/metrics')
+    @internal_only()
+    def prometheus_metrics() -> Response:
+        body, content_type = metrics.export()
+        return Response(body, content_type=content_type)
+
     api_v1.add_resource(BrandListsResource, '/brand')
     api_v1.add_resource(BrandResource, '/brand/<int:brand_id>')
+    api_v1.add_resource(BrandBatchResource, '/brand/batch')
+    api_v1.add_resource(BrandChangesResource, '/brand/changes')
+    api_v1.add_resource(BrandExportResource, '/brand/export')
+    api_v1.add_resource(BrandImportResource, '/brand/import')
 
 
 _schemas: Dict[str, bool] = {}
 
 
 def resolve_schema_name(schema: Schema):
+    from apispec.ext.marshmallow.common import resolve_schema_cls
+
     global _schemas
 
     schema_cls = resolve_schema_cls(schema)
@@ -42,30 +79,45 @@ def resolve_schema_name(schema: Schema):
     return name
 
 
+def make_apispec() -> 'APISpec':
+    # Imported here, so apispec is only loaded when the docs are built
+    from apispec import APISpec
+    from apispec.ext.marshmallow import MarshmallowPlugin
+
+    ma_plugin = MarshmallowPlugin(
+        schema_name_resolver=resolve_schema_name,  # type: ignore
+    )
+    return APISpec(
+        title='WebService Backend',
+        version='v1',
+        plugins=[ma_plugin],
+        openapi_version='2.0.0',
+    )
+
+
 def init_docs(app: Flask) -> None:
     if (
         os.getenv('WEBSERVICE_ENV') != 'localhost'
         or os.getenv('ENABLE_APISPEC', 'false').lower() == 'true'
     ):
-        ma_plugin = MarshmallowPlugin(
-            schema_name_resolver=resolve_schema_name,  # type: ignore
-        )
         app.config.update(
             {
-                'APISPEC_SPEC': APISpec(
-                    title='WebService Backend',
-                    version='v1',
-                    plugins=[ma_plugin],
-                    openapi_version='2.0.0',
-                ),
+                # Called on the first /swagger/ request, see `LazyApiSpec`
+                'APISPEC_SPEC': make_apispec,
                 'APISPEC_SWAGGER_URL': '/swagger/',
                 'APISPEC_SWAGGER_UI_URL': '/swagger-ui/',
             },
         )
+    # Spec written by `flask docs export`, e.g. at image build time
+    app.config['APISPEC_SPEC_FILE'] = os.getenv('APISPEC_SPEC_FILE')
 
     docs.init_app(app)
     docs.register(BrandListsResource)
     docs.register(BrandResource)
+    docs.register(BrandBatchResource)
+    docs.register(BrandChangesResource)
+    docs.register(BrandExportResource)
+    docs.register(BrandImportResource)
 
 
 def init_api(app: Flask) -> None:
@@ -1,12 +1,47 @@
+import os
 from dataclasses import dataclass
+from datetime import datetime
+from dataclasses import fields as dataclass_fields
+from typing import Dict
 from typing import List
 from typing import Optional
 
 import desert
 from marshmallow import validate
+from marshmallow import ValidationError
 from marshmallow.fields import Int
+from marshmallow.fields import List as ListField
+from marshmallow.fields import Nested
 from marshmallow.fields import Str
 
+from app.utils.search import MatchMode
+from app.utils.sparse import parse_fields
+
+# Most items a `BatchRequest` can have
+BATCH_MAX_ITEMS = int(os.getenv('BRAND_BATCH_MAX_ITEMS', '1000'))
+
+
+def _validate_brand_fields(value: str) -> None:
+    known = {field.name for field in dataclass_fields(BrandSchemas.Brand)}
+    unknown = [name for name in parse_fields(value) if name not in known]
+    if unknown:
+        raise ValidationError(f'Unknown fields: {", ".join(unknown)}.')
+
+
+def _brand_fields():
+    # Sparse fieldset: comma-separated `Brand` fields to return, e.g.
+    # `id,code`; every field when empty
+    return desert.field(Str(validate=_validate_brand_fields), default='')
+
+
+def _match_mode():
+    # How the `code` and `name` terms match: `contains` (substring),
+    # `prefix` or `exact`, all case-insensitive
+    return desert.field(
+        Str(validate=validate.OneOf([mode.value for mode in MatchMode])),
+        default=MatchMode.CONTAINS.value,
+    )
+
 
 class BrandSchemas:
     @dataclass
@@ -26,14 +61,39 @@ class BrandSchemas:
             Str(validate=validate.Length(max=250)), default='',
         )
         name: str = ''
+        match: str = _match_mode()
         is_active: Optional[bool] = None
+        # Keyset pagination: pass an empty `after` to start from the first
+        # page, then the `next_cursor` of the previous response
+        after: Optional[str] = None
+        # How `total_pages` is computed: exact, cached, estimated or none;
+        # defaults to `BRAND_COUNT_STRATEGY`
+        count: Optional[str] = desert.field(
+            Str(
+                validate=validate.OneOf(
+                    ['exact', 'cached', 'estimated', 'none'],
+                ),
+                allow_none=True,
+            ),
+            default=None,
+        )
+        fields: str = _brand_fields()
 
     @dataclass
     class GetListResponse:
         data: List['BrandSchemas.Brand']
         page_num: int
         page_size: int
-        total_pages: int
+        # Not computed in keyset (`after`) mode or with `count=none`
+        total_pages: Optional[int]
+        next_cursor: Optional[str] = None
+        # Strategy `total_pages` actually came from, e.g. `exact` when an
+        # estimate was asked for but is not available
+        count_strategy: Optional[str] = None
+
+    @dataclass
+    class GetQuery:
+        fields: str = _brand_fields()
 
     @dataclass
     class GetResponse:
@@ -51,9 +111,10 @@ class BrandSchemas:
 
     @dataclass
     class PatchRequest:
-        code: str = ''
-        name: str = ''
-        is_active: bool = True
+        # Only the fields that are set are written
+        code: Optional[str] = None
+        name: Optional[str] = None
+        is_active: Optional[bool] = None
 
     @dataclass
     class PatchResponse:
@@ -62,3 +123,104 @@ class BrandSchemas:
     @dataclass
     class DeleteResponse:
         data: 'BrandSchemas.Brand'
+
+    @dataclass
+    class ExportQuery:
+        code: str = desert.field(
+            Str(validate=validate.Length(max=250)), default='',
+        )
+        name: str = ''
+        match: str = _match_mode()
+        is_active: Optional[bool] = None
+        format: str = desert.field(
+            Str(validate=validate.OneOf(['ndjson', 'csv'])), default='ndjson',
+        )
+        fields: str = _brand_fields()
+
+    @dataclass
+    class ChangesQuery:
+        # `next_token` of the previous response; empty to start from the
+        # beginning, i.e. every brand
+        since: Optional[str] = None
+        limit: int = desert.field(
+            Int(validate=validate.Range(min=1, max=1000)), default=100,
+        )
+
+    @dataclass
+    class Change:
+        id: int
+        # Deleted brands only have an id and `updated_at`
+        deleted: bool
+        code: Optional[str] = None
+        name: Optional[str] = None
+        is_active: Optional[bool] = None
+        updated_at: Optional[datetime] = None
+
+    @dataclass
+    class ChangesResponse:
+        data: List['BrandSchemas.Change']
+        # Pass as `since` on the next poll, even when `data` is empty
+        next_token: str
+        # More changes are ready; poll again right away
+        has_more: bool
+
+    @dataclass
+    class BatchItem:
+        op: str = desert.field(
+            Str(validate=validate.OneOf(['create', 'update', 'delete'])),
+        )
+        # Required for `update` and `delete`
+        id: Optional[int] = None
+        # Only the fields that are set are written on `update`
+        code: Optional[str] = None
+        name: Optional[str] = None
+        is_active: Optional[bool] = None
+
+    @dataclass
+    class BatchRequest:
+        items: List['BrandSchemas.BatchItem'] = desert.field(ListField(
+            Nested(lambda: desert.schema(BrandSchemas.BatchItem)),
+            required=True,
+            validate=validate.Length(max=BATCH_MAX_ITEMS),
+        ))
+
+    @dataclass
+    class BatchResult:
+        index: int
+        # created, updated, deleted, conflict, not_found or invalid
+        status: str
+        id: Optional[int] = None
+        error: Optional[str] = None
+
+    @dataclass
+    class BatchResponse:
+        data: List['BrandSchemas.BatchResult']
+
+    @dataclass
+    class ImportQuery:
+        format: str = desert.field(
+            Str(validate=validate.OneOf(['ndjson', 'csv'])), default='ndjson',
+        )
+
+    @dataclass
+    class ImportRecord:
+        # Records are upserted on `code`, so it can't be left out
+        code: str
+        name: str = ''
+        is_active: bool = True
+
+    @dataclass
+    class ImportRowError:
+        line: int
+        messages: Dict[str, List[str]]
+
+    @dataclass
+    class ImportResponse:
+        rows_read: int
+        rows_rejected: int
+        # Inserted or changed; rows identical to the stored brand are skipped
+        rows_merged: int
+        seconds: float
+        rows_per_second: float
+        # Only the first `IMPORT_MAX_REPORTED_ERRORS` rejected rows
+        errors: List['BrandSchemas.ImportRowError']
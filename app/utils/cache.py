@@ -0,0 +1,353 @@
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any
+from typing import Awaitable
+from typing import Callable
+from typing import Dict
+from typing import Iterable
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+from flask import Flask
+
+try:
+    # Optional; only needed by `RedisBackend` with a redis-py client
+    from redis.exceptions import RedisError  # type: ignore
+    from redis.exceptions import WatchError  # type: ignore
+except ImportError:  # pragma: no cover
+    RedisError = WatchError = None
+
+logger = logging.getLogger(__name__)
+
+
+class CacheBackend:
+    """Storage used by `Cache`. Values handed to backends are JSON
+    serializable so they can be shared between processes."""
+
+    evictions = 0
+    failures = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        raise NotImplementedError
+
+    def set(self, key: str, value: Any) -> None:
+        raise NotImplementedError
+
+    def delete(self, key: str) -> None:
+        raise NotImplementedError
+
+    def delete_many(self, keys: Iterable[str]) -> None:
+        for key in keys:
+            self.delete(key)
+
+    def generation(self, key: str) -> Any:
+        """Token that changes whenever `key` is deleted; read it before
+        loading a value and pass it to `set_if_generation`."""
+        raise NotImplementedError
+
+    def set_if_generation(self, key: str, value: Any, generation: Any):
+        """`set`, unless `key` was deleted since `generation` was read,
+        i.e. the value may have been loaded before the write that deleted
+        it."""
+        raise NotImplementedError
+
+
+class NullBackend(CacheBackend):
+    def get(self, key: str) -> Optional[Any]:
+        return None
+
+    def set(self, key: str, value: Any) -> None:
+        pass
+
+    def delete(self, key: str) -> None:
+        pass
+
+    def generation(self, key: str) -> Any:
+        return None
+
+    def set_if_generation(self, key: str, value: Any, generation: Any):
+        pass
+
+
+class LRUBackend(CacheBackend):
+    """In-process LRU with a per-entry TTL. Entries only live in the
+    current worker, so invalidations are not seen by other gunicorn
+    workers; keep the TTL short or use `RedisBackend` when running more
+    than one worker.
+    """
+
+    def __init__(self, max_size: int = 1024, ttl: float = 30):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._entries: 'OrderedDict[str, Tuple[float, Any]]' = OrderedDict()
+        # Bumped by every delete; one counter for all keys keeps it
+        # bounded, at the cost of skipping some fills that were fine
+        self._generation = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                self.evictions += 1
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._set(key, value)
+
+    def _set(self, key: str, value: Any) -> None:
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+            self._generation += 1
+
+    def generation(self, key: str) -> Any:
+        return self._generation
+
+    def set_if_generation(self, key: str, value: Any, generation: Any):
+        with self._lock:
+            if generation == self._generation:
+                self._set(key, value)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._generation += 1
+
+
+class RedisBackend(CacheBackend):
+    """Backend for any client speaking the redis-py API (`get`, `set`
+    with `ex`, `delete`, `pipeline`), e.g. `redis.Redis` or
+    `fakeredis.FakeRedis` in tests. Entries are shared by every worker and
+    container, so an invalidation is seen everywhere as soon as it is
+    issued.
+
+    Deletes also bump a per-key generation counter, kept for
+    `generation_ttl` seconds, which `set_if_generation` checks in a
+    WATCH/MULTI transaction. The cache is optional: `errors` raised by
+    the client (redis-py's `RedisError` by default) are logged and
+    counted in `failures`, and the call acts as a miss or a no-op, so
+    reads fall through to the database while Redis is down.
+    """
+
+    def __init__(
+            self,
+            client: Any,
+            ttl: float = 300,
+            prefix: str = '',
+            generation_ttl: float = 3600,
+            errors: Tuple[type, ...] = (),
+    ):
+        self.client = client
+        self.ttl = ttl
+        self.prefix = prefix
+        self.generation_ttl = generation_ttl
+        self.errors = errors or ((RedisError,) if RedisError else ())
+        self.failures = 0
+
+    def _failed(self, operation: str, error: Exception) -> None:
+        self.failures += 1
+        logger.warning('Cache %s failed: %s', operation, error)
+
+    def _generation_key(self, key: str) -> str:
+        return f'{self.prefix}{key}:generation'
+
+    def get(self, key: str) -> Optional[Any]:
+        try:
+            raw = self.client.get(self.prefix + key)
+        except self.errors as e:
+            self._failed('get', e)
+            return None
+        if raw is None:
+            return None
+        return json.loads(raw)
+
+    def set(self, key: str, value: Any) -> None:
+        try:
+            self.client.set(
+                self.prefix + key, self._dumps(value), ex=self._ex(),
+            )
+        except self.errors as e:
+            self._failed('set', e)
+
+    def _dumps(self, value: Any) -> str:
+        return json.dumps(value, separators=(',', ':'))
+
+    def _ex(self) -> int:
+        return max(int(self.ttl), 1)
+
+    def delete(self, key: str) -> None:
+        self.delete_many([key])
+
+    def delete_many(self, keys: Iterable[str], chunk_size: int = 1000):
+        chunk = []
+        for key in keys:
+            chunk.append(key)
+            if len(chunk) >= chunk_size:
+                self._delete_chunk(chunk)
+                chunk = []
+        if chunk:
+            self._delete_chunk(chunk)
+
+    def _delete_chunk(self, keys: List[str]) -> None:
+        try:
+            with self.client.pipeline(transaction=False) as pipe:
+                pipe.delete(*(self.prefix + key for key in keys))
+                for key in keys:
+                    generation_key = self._generation_key(key)
+                    pipe.incr(generation_key)
+                    pipe.expire(
+                        generation_key, max(int(self.generation_ttl), 1),
+                    )
+                pipe.execute()
+        except self.errors as e:
+            self._failed('delete', e)
+
+    def generation(self, key: str) -> Any:
+        try:
+            return self.client.get(self._generation_key(key))
+        except self.errors as e:
+            self._failed('generation', e)
+            # Never equal to a stored generation, so nothing gets set
+            return object()
+
+    def set_if_generation(self, key: str, value: Any, generation: Any):
+        generation_key = self._generation_key(key)
+        try:
+            with self.client.pipeline() as pipe:
+                pipe.watch(generation_key)
+                if pipe.get(generation_key) != generation:
+                    return
+                pipe.multi()
+                pipe.set(self.prefix + key, self._dumps(value), ex=self._ex())
+                pipe.execute()
+        except WatchError:
+            # Deleted while we were checking
+            pass
+        except self.errors as e:
+            self._failed('set', e)
+
+
+def create_backend() -> CacheBackend:
+    """Build the backend configured through the environment:
+
+    - `CACHE_BACKEND`: `none` (default), `memory` or `redis`
+    - `CACHE_TTL`: entry lifetime in seconds
+    - `CACHE_MAX_SIZE`: max entries per worker for `memory`
+    - `CACHE_URL`: connection URL for `redis`
+    """
+    backend = os.getenv('CACHE_BACKEND', 'none').lower()
+    ttl = float(os.getenv('CACHE_TTL', '30'))
+    if backend == 'memory':
+        return LRUBackend(
+            max_size=int(os.getenv('CACHE_MAX_SIZE', '1024')),
+            ttl=ttl,
+        )
+    if backend == 'redis':
+        # Only needed when the redis backend is enabled
+        import redis  # type: ignore
+
+        return RedisBackend(
+            redis.Redis.from_url(os.getenv('CACHE_URL')),
+            ttl=ttl,
+            prefix='sample-gab-be:',
+        )
+    return NullBackend()
+
+
+class Cache:
+    def __init__(self, backend: Optional[CacheBackend] = None):
+        self.backend = backend or NullBackend()
+        self.hits = 0
+        self.misses = 0
+        # `+=` is not atomic; gthread and gevent workers share the counters
+        self._lock = threading.Lock()
+
+    def init_app(self, app: Flask) -> None:
+        self.configure()
+        app.extensions['cache'] = self
+
+    def configure(self) -> None:
+        """Switch to the backend configured through the environment."""
+        self.backend = create_backend()
+
+    def get_or_load(self, key: str, load: Callable[[], Optional[Any]]):
+        """Return the cached value for `key`, calling `load` on a miss.
+        `None` results are not cached."""
+        value = self.backend.get(key)
+        if value is not None:
+            self._count_hit()
+            return value
+
+        self._count_miss()
+        # Read before loading: if a write invalidates `key` meanwhile, the
+        # value may predate it and is not cached
+        generation = self.backend.generation(key)
+        value = load()
+        if value is not None:
+            self.backend.set_if_generation(key, value, generation)
+        return value
+
+    async def get_or_load_async(
+        self,
+        key: str,
+        load: Callable[[], Awaitable[Optional[Any]]],
+    ):
+        """`get_or_load` for coroutines; backend calls may block (e.g.
+        redis), so they run in a worker thread."""
+        value = await asyncio.to_thread(self.backend.get, key)
+        if value is not None:
+            self._count_hit()
+            return value
+
+        self._count_miss()
+        generation = await asyncio.to_thread(self.backend.generation, key)
+        value = await load()
+        if value is not None:
+            await asyncio.to_thread(
+                self.backend.set_if_generation, key, value, generation,
+            )
+        return value
+
+    def _count_hit(self) -> None:
+        with self._lock:
+            self.hits += 1
+
+    def _count_miss(self) -> None:
+        with self._lock:
+            self.misses += 1
+
+    def invalidate(self, key: str) -> None:
+        self.backend.delete(key)
+
+    def invalidate_many(self, keys: Iterable[str]) -> None:
+        self.backend.delete_many(keys)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'backend': type(self.backend).__name__,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.backend.evictions,
+            'failures': self.backend.failures,
+        }
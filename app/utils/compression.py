@@ -0,0 +1,227 @@
+import os
+import time
+import zlib
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import Iterable
+from typing import Iterator
+from typing import Optional
+
+from flask import Flask
+from flask import request
+from flask import Response
+from werkzeug.datastructures import Accept
+
+try:
+    # Optional; zstd is only offered when it is installed
+    import zstandard  # type: ignore
+except ImportError:  # pragma: no cover
+    zstandard = None
+
+_DEFAULT_MIMETYPES = (
+    'application/json,application/x-ndjson,text/csv,text/plain,text/html'
+)
+ENCODINGS = ('zstd', 'gzip')
+
+
+def encoded_etag(etag: str, encoding: str) -> str:
+    """ETag of the `encoding` compressed body of a response with ETag
+    `etag`"""
+    return f'{etag}-{encoding}'
+
+
+class _GzipEncoder:
+    def __init__(self, level: int):
+        # wbits=31 writes the gzip header and trailer
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def chunk(self, data: bytes) -> bytes:
+        """Compress `data` and flush it so it can be sent right away."""
+        return (
+            self._compressor.compress(data)
+            + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+        )
+
+    def finish(self, data: bytes = b'') -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush()
+
+
+class _ZstdEncoder:
+    def __init__(self, level: int):
+        self._compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def chunk(self, data: bytes) -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush(
+            zstandard.COMPRESSOBJ_FLUSH_BLOCK,
+        )
+
+    def finish(self, data: bytes = b'') -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush()
+
+
+class Compression:
+    """Compresses responses with zstd (when `zstandard` is installed) or
+    gzip, whichever the client prefers in `Accept-Encoding`. Configured
+    through the environment:
+
+    - `ENABLE_COMPRESSION`: `true` (default) or `false`
+    - `COMPRESSION_MIN_SIZE`: bodies smaller than this many bytes, e.g.
+      the error bodies of `register_error_handlers`, are sent as they are
+      (default 1024)
+    - `COMPRESSION_MIMETYPES`: comma-separated allowlist
+    - `COMPRESSION_LEVEL` / `COMPRESSION_ZSTD_LEVEL`: gzip (default 6) and
+      zstd (default 3) levels
+
+    Streamed responses (e.g. the brand export) are compressed chunk by
+    chunk, each one flushed so streaming is preserved. The encoding is
+    appended to the ETag of compressed responses, so caches never mix up
+    the compressed and the identity bodies.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.min_size = 1024
+        self.mimetypes = frozenset(_DEFAULT_MIMETYPES.split(','))
+        self.encoders: Dict[str, Callable[[], Any]] = {}
+        self.counters: Dict[str, Dict[str, float]] = {}
+
+    def init_app(self, app: Flask) -> None:
+        self.enabled = (
+            os.getenv('ENABLE_COMPRESSION', 'true').lower() == 'true'
+        )
+        self.min_size = int(os.getenv('COMPRESSION_MIN_SIZE', '1024'))
+        self.mimetypes = frozenset(
+            os.getenv('COMPRESSION_MIMETYPES', _DEFAULT_MIMETYPES).split(','),
+        )
+        gzip_level = int(os.getenv('COMPRESSION_LEVEL', '6'))
+        # In order of preference when the client accepts both
+        self.encoders = {}
+        if zstandard is not None:
+            zstd_level = int(os.getenv('COMPRESSION_ZSTD_LEVEL', '3'))
+            self.encoders['zstd'] = lambda: _ZstdEncoder(zstd_level)
+        self.encoders['gzip'] = lambda: _GzipEncoder(gzip_level)
+        self.counters = {
+            encoding: {
+                'responses': 0,
+                'bytes_in': 0,
+                'bytes_out': 0,
+                'cpu_seconds': 0.0,
+            }
+            for encoding in self.encoders
+        }
+        app.extensions['compression'] = self
+        if self.enabled:
+            app.after_request(self._compress)
+
+    def _negotiate(self, response: Response) -> Optional[str]:
+        if (
+            request.method == 'HEAD'
+            or response.direct_passthrough
+            or 'Content-Encoding' in response.headers
+        ):
+            return None
+        length = None
+        if not response.is_streamed:
+            length = response.calculate_content_length()
+            if length is None:
+                return None
+        return self.negotiate(
+            request.accept_encodings,
+            response.status_code,
+            response.mimetype,
+            length,
+            response.headers.get('Cache-Control', ''),
+        )
+
+    def negotiate(
+            self,
+            accept_encodings: Accept,
+            status_code: int,
+            mimetype: Optional[str],
+            length: Optional[int],
+            cache_control: str = '',
+    ) -> Optional[str]:
+        """Encoding to compress a response with, `None` to send it as it
+        is; `length` is `None` for streamed bodies. For entry points
+        without Flask (see `app.asgi`), along with `compress`."""
+        if (
+            status_code < 200
+            or status_code in (204, 304)
+            or mimetype not in self.mimetypes
+            or 'no-transform' in cache_control
+            or (length is not None and length < self.min_size)
+        ):
+            return None
+        return accept_encodings.best_match(list(self.encoders))
+
+    def _compress(self, response: Response) -> Response:
+        response.vary.add('Accept-Encoding')
+        encoding = self._negotiate(response)
+        if encoding is None:
+            return response
+
+        response.headers['Content-Encoding'] = encoding
+        etag, weak = response.get_etag()
+        if etag:
+            # Another body, so another ETag; see `conditional_get`
+            response.set_etag(encoded_etag(etag, encoding), weak)
+        if response.is_streamed:
+            counters = self.counters[encoding]
+            counters['responses'] += 1
+            response.headers.pop('Content-Length', None)
+            response.response = self._stream(
+                response.response, self.encoders[encoding](), counters,
+            )
+            return response
+
+        response.set_data(self.compress(response.get_data(), encoding))
+        return response
+
+    def compress(self, data: bytes, encoding: str) -> bytes:
+        """`data` compressed with `encoding`, counted in `stats`"""
+        encoder = self.encoders[encoding]()
+        counters = self.counters[encoding]
+        counters['responses'] += 1
+        start = time.thread_time()
+        compressed = encoder.finish(data)
+        counters['cpu_seconds'] += time.thread_time() - start
+        counters['bytes_in'] += len(data)
+        counters['bytes_out'] += len(compressed)
+        return compressed
+
+    def _stream(
+            self,
+            chunks: Iterable[Any],
+            encoder: Any,
+            counters: Dict[str, float],
+    ) -> Iterator[bytes]:
+        try:
+            for chunk in chunks:
+                if isinstance(chunk, str):
+                    chunk = chunk.encode('utf-8')
+                start = time.thread_time()
+                compressed = encoder.chunk(chunk)
+                counters['cpu_seconds'] += time.thread_time() - start
+                counters['bytes_in'] += len(chunk)
+                counters['bytes_out'] += len(compressed)
+                if compressed:
+                    yield compressed
+            tail = encoder.finish()
+            counters['bytes_out'] += len(tail)
+            yield tail
+        finally:
+            # e.g. `stream_with_context` tears the request context down
+            close = getattr(chunks, 'close', None)
+            if close is not None:
+                close()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            encoding: {
+                **counters,
+                'bytes_saved': counters['bytes_in'] - counters['bytes_out'],
+                'cpu_seconds': round(counters['cpu_seconds'], 6),
+            }
+            for encoding, counters in self.counters.items()
+        }
@@ -0,0 +1,64 @@
+import hashlib
+import json
+from http import HTTPStatus
+from typing import Any
+from typing import Optional
+
+from flask import abort
+from flask import after_this_request
+from flask import request
+from flask import Response
+from werkzeug.datastructures import ETags
+
+from app.utils.compression import encoded_etag
+from app.utils.compression import ENCODINGS
+
+
+def hash_etag(*parts: Any) -> str:
+    """Build an ETag from the JSON representation of `parts`, e.g. the
+    query arguments and the `(id, version)` pairs of a page of rows."""
+    raw = json.dumps(parts, separators=(',', ':'), default=str)
+    return hashlib.blake2b(raw.encode('utf-8'), digest_size=16).hexdigest()
+
+
+def set_etag(etag: str) -> None:
+    """Send `etag` as the ETag header of the current (successful)
+    response."""
+    @after_this_request
+    def add_etag(response: Response) -> Response:
+        if response.status_code < 300:
+            response.set_etag(etag)
+        return response
+
+
+def conditional_get(etag: str) -> None:
+    """Answer the current request with `304 Not Modified` if its
+    `If-None-Match` header matches `etag`, otherwise send `etag` along
+    with the response. Call this before returning from a resource
+    decorated with `response_model` so unchanged data is never
+    serialized. ::
+
+    :param etag: Current (unquoted) ETag of the requested resource
+    :type etag: str
+    """
+    matched = matching_etag(request.if_none_match, etag)
+    if matched is not None:
+        response = Response(status=HTTPStatus.NOT_MODIFIED)
+        response.set_etag(matched)
+        abort(response)
+
+    set_etag(etag)
+
+
+def matching_etag(etags: ETags, etag: str) -> Optional[str]:
+    """The tag in `etags` (e.g. `If-None-Match`) matching `etag` or one of
+    its compressed variants (see `Compression`), weakly compared; `None`
+    when there is none."""
+    if etags.star_tag:
+        return etag
+    for candidate in (etag, *(
+            encoded_etag(etag, encoding) for encoding in ENCODINGS
+    )):
+        if etags.contains_weak(candidate):
+            return candidate
+    return None
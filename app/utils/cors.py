@@ -0,0 +1,112 @@
+import functools
+import os
+import re
+from typing import Dict
+from typing import Iterable
+from typing import Optional
+
+from flask import Flask
+from flask import request
+from flask import Response
+
+# Same rule as flask_cors: entries with any of these are regexes, matched
+# case-insensitively from the start of the origin; others are exact,
+# case-insensitive origins
+_REGEX_CHARS = frozenset('*\\]?$^[()')
+
+METHODS = frozenset(
+    ['DELETE', 'GET', 'HEAD', 'OPTIONS', 'PATCH', 'POST', 'PUT'],
+)
+ALLOW_METHODS = ', '.join(sorted(METHODS))
+
+
+class Cors:
+    """CORS headers for the allowed `origins`, replacing flask_cors.
+
+    The exact origins go in a set and the patterns are compiled into a
+    single regex, and each origin's decision is kept in an LRU of
+    `CORS_CACHE_SIZE` entries. Preflights to existing routes are answered
+    by a before-request hook, so they never reach Flask-RESTful, with an
+    `Access-Control-Max-Age` of `CORS_MAX_AGE` seconds (default 7200, the
+    Chromium cap) so browsers reuse them. Hooks registered after it don't
+    run for them, so it goes after the metrics and request timing.
+    """
+
+    def __init__(self):
+        self.exact: frozenset = frozenset()
+        self.pattern: Optional[re.Pattern] = None
+        self.max_age = '7200'
+        self.is_allowed = self._match
+
+    def init_app(self, app: Flask, origins: Iterable[str]) -> None:
+        exact = []
+        patterns = []
+        for origin in origins:
+            if _REGEX_CHARS.intersection(origin):
+                patterns.append(f'(?:{origin})')
+            else:
+                exact.append(origin.lower())
+        self.exact = frozenset(exact)
+        self.pattern = (
+            re.compile('|'.join(patterns), re.IGNORECASE) if patterns
+            else None
+        )
+        self.max_age = os.getenv('CORS_MAX_AGE', '7200')
+        # Per app, so the LRU never holds decisions for stale origins
+        self.is_allowed = functools.lru_cache(
+            maxsize=int(os.getenv('CORS_CACHE_SIZE', 1024)),
+        )(self._match)
+
+        app.extensions['cors'] = self
+        app.before_request(self._preflight)
+        # Also runs for the responses built by `register_error_handlers`
+        app.after_request(self._add_headers)
+
+    def _match(self, origin: str) -> bool:
+        if origin.lower() in self.exact:
+            return True
+        return bool(self.pattern and self.pattern.match(origin))
+
+    def _preflight(self) -> Optional[Response]:
+        # Unknown routes get their usual 404
+        if request.method != 'OPTIONS' or request.url_rule is None:
+            return None
+        headers = request.headers
+        origin = headers.get('Origin')
+        method = headers.get('Access-Control-Request-Method')
+        if origin is None or method is None:
+            return None
+
+        response = Response(status=204)
+        response.vary.add('Origin')
+        if self.is_allowed(origin) and method.upper() in METHODS:
+            response.headers.update({
+                'Access-Control-Allow-Origin': origin,
+                'Access-Control-Allow-Credentials': 'true',
+                'Access-Control-Allow-Methods': ALLOW_METHODS,
+                'Access-Control-Max-Age': self.max_age,
+            })
+            requested = headers.get('Access-Control-Request-Headers')
+            if requested:
+                response.headers['Access-Control-Allow-Headers'] = requested
+        return response
+
+    def _add_headers(self, response: Response) -> Response:
+        if 'Access-Control-Allow-Origin' in response.headers:
+            # Preflight answered by `_preflight`
+            return response
+        response.vary.add('Origin')
+        response.headers.update(
+            self.allow_headers(request.headers.get('Origin')),
+        )
+        return response
+
+    def allow_headers(self, origin: Optional[str]) -> Dict[str, str]:
+        """CORS headers of a response (other than a preflight) to a
+        request sent from `origin`; none when it is not allowed."""
+        if origin is None or not self.is_allowed(origin):
+            return {}
+        return {
+            'Access-Control-Allow-Origin': origin,
+            'Access-Control-Allow-Credentials': 'true',
+        }
@@ -0,0 +1,46 @@
+import base64
+import binascii
+import json
+from typing import Any
+from typing import Dict
+
+
+class InvalidCursorError(ValueError):
+    pass
+
+
+def encode_cursor(position: Dict[str, Any]) -> str:
+    """Encode a keyset position (e.g. `{'id': 42}`) into a URL-safe
+    cursor string that can be handed back to clients. ::
+
+    :param position: Column values of the last row of the current page
+    :type position: Dict[str, Any]
+    :return: Cursor string
+    :rtype: str
+    """
+    raw = json.dumps(position, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).rstrip(b'=').decode('ascii')
+
+
+def decode_cursor(cursor: str) -> Dict[str, Any]:
+    """Decode a cursor built by `encode_cursor` back into its keyset
+    position. Raises `InvalidCursorError` if the cursor is not valid
+    base64 JSON holding an object. Cursors are not signed: a client can
+    build its own, so callers still have to validate the values in the
+    position. ::
+
+    :param cursor: Opaque cursor string sent by the client
+    :type cursor: str
+    :return: Keyset position
+    :rtype: Dict[str, Any]
+    """
+    padding = '=' * (-len(cursor) % 4)
+    try:
+        raw = base64.urlsafe_b64decode(cursor + padding)
+        position = json.loads(raw)
+    except (binascii.Error, ValueError) as e:
+        raise InvalidCursorError(f'Invalid cursor: {cursor}') from e
+
+    if not isinstance(position, dict):
+        raise InvalidCursorError(f'Invalid cursor: {cursor}')
+    return position
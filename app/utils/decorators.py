@@ -1,4 +1,8 @@
+import hmac
+import os
 from enum import Enum
+from functools import lru_cache
+from functools import partial
 from functools import wraps
 from http import HTTPStatus
 from typing import Any
@@ -7,17 +11,25 @@ from typing import ClassVar
 from typing import Dict
 from typing import Optional
 from typing import Protocol
+from typing import Tuple
 from typing import Type
 
 import desert
-import jwt
 from flask import abort
 from flask import request
-from flask_apispec.annotations import activate
-from flask_apispec.annotations import annotate
 from marshmallow import Schema
 
-from app.schemas.decorators import JwtToken
+from app.errors import ResourceNotFoundError
+from app.extensions import token_verifier
+from app.utils.docs import activate
+from app.utils.docs import annotate
+from app.utils.serializers import compile_dumper
+from app.utils.serializers import compile_loader
+from app.utils.sparse import parse_fields
+from app.utils.timing import phase
+
+
+_LOOPBACK_ADDRESSES = frozenset(['127.0.0.1', '::1'])
 
 
 class DataClass(Protocol):
@@ -29,6 +41,66 @@ class _RequestLocation(Enum):
     QUERY = 'query'
 
 
+def _use_fast_serializers(fast: Optional[bool]) -> bool:
+    if fast is None:
+        return os.getenv('ENABLE_FAST_SERIALIZERS', 'false').lower() == 'true'
+    return fast
+
+
+def build_loader(
+    Schema: Type[Schema],
+    model: Type[DataClass],
+    fast: Optional[bool] = None,
+) -> Callable[[Any], DataClass]:
+    """Load function turning request data into a `model` instance, the
+    same one `request_model` uses. Schema instances hold no per-call
+    state, so one loader can be shared by every request."""
+    schema = Schema()
+    if _use_fast_serializers(fast):
+        return compile_loader(schema, model) or schema.load
+    return schema.load
+
+
+def build_dumper(
+    Schema: Type[Schema],
+    many: bool = False,
+    fast: Optional[bool] = None,
+) -> Callable[[Any], Any]:
+    """Dump function serializing a response, the same one
+    `response_model` uses."""
+    schema = Schema(many=many)
+    if _use_fast_serializers(fast):
+        return compile_dumper(schema) or schema.dump
+    return schema.dump
+
+
+def build_sparse_dumper(
+    Schema: Type[Schema],
+    key: str,
+    many: bool = False,
+    fast: Optional[bool] = None,
+) -> Callable[[Optional[str]], Callable[[Any], Any]]:
+    """Function returning the dumper for a sparse fieldset, i.e. a
+    `fields` query argument, which only serializes those fields of the
+    nested schema under `key`. Dumpers are built once per set of fields
+    and reused; an empty `fields` gets the full dumper."""
+    dump = build_dumper(Schema, many, fast)
+    others = tuple(name for name in Schema().fields if name != key)
+
+    @lru_cache(maxsize=128)
+    def trimmed(names: Tuple[str, ...]) -> Callable[[Any], Any]:
+        only = others + tuple(f'{key}.{name}' for name in names)
+        return build_dumper(partial(Schema, only=only), many, fast)
+
+    def for_fields(fields: Optional[str]) -> Callable[[Any], Any]:
+        names = parse_fields(fields)
+        if not names:
+            return dump
+        return trimmed(tuple(sorted(names)))
+
+    return for_fields
+
+
 def _annotate_request(fn: Callable, Schema: Type[Schema], location: str):
     """Annotate the function `fn`'s request sample with
     the given schema `Schema`. `location` can be set to `body`
@@ -100,6 +172,7 @@ def request_model(
     query_model: Optional[Type[DataClass]] = None,
     meta: Dict[str, Any] = {},
     query_meta: Dict[str, Any] = {},
+    fast: Optional[bool] = None,
 ):
     """Deserialize incoming request data and inject the deserialized
     data as additional `kwargs` to the decorated function. `body_model`
@@ -129,6 +202,10 @@ def request_model(
     :param query_meta: Marshmallow meta class params for the
         schema used to validate the query parameters, defaults to {}
     :type query_meta: Dict[str, Any], optional
+    :param fast: Whether to deserialize with a loader generated from the
+        schemas (see `app.utils.serializers`) instead of marshmallow,
+        defaults to the `ENABLE_FAST_SERIALIZERS` environment variable
+    :type fast: Optional[bool], optional
     """
 
     def decorator(fn: Callable):
@@ -139,6 +216,7 @@ def request_model(
             Schema = desert.schema_class(body_model, meta=meta)
             # Add swagger docs for the body (and query params if needed)
             _annotate_request(fn, Schema, location=_RequestLocation.BODY.value)
+            load_body = build_loader(Schema, body_model, fast)
         QuerySchema = None
         if query_model:
             QuerySchema = desert.schema_class(query_model, meta=query_meta)
@@ -147,6 +225,7 @@ def request_model(
                 QuerySchema,
                 location=_RequestLocation.QUERY.value,
             )
+            load_query = build_loader(QuerySchema, query_model, fast)
 
         @wraps(fn)
         def wrapper(*args, **kwargs):
@@ -162,14 +241,16 @@ def request_model(
                 # Grab the request body and convert it to
                 # an object of the type `body_model`
                 json_payload = request.get_json()
-                processed_payload = Schema().load(json_payload)
+                with phase('deserialize'):
+                    processed_payload = load_body(json_payload)
                 # Inject the deserialized data into the decorated function
                 kwargs.update({'payload': processed_payload})
             if QuerySchema:
                 # Grab the request query params and convert them to
                 # an object of the type `query_model`
                 query_args = request.args
-                processed_args = QuerySchema().load(query_args)
+                with phase('deserialize'):
+                    processed_args = load_query(query_args)
                 # Inject a value for query_args into the decorated function
                 kwargs.update({'query_args': processed_args})
             return fn(*args, **kwargs)
@@ -185,6 +266,8 @@ def response_model(
     meta: Dict[str, Any] = {},
     status_code: str = '200',
     doc_description: str = '',
+    fast: Optional[bool] = None,
+    sparse: Optional[str] = None,
 ):
     """Serialize outgoing response data according to the given
     `model`. The decorated function is expected to return an object with
@@ -213,6 +296,14 @@ def response_model(
     :param doc_description: Description used for the response in the Swagger
         documentation, defaults to ""
     :type doc_description: str, optional
+    :param fast: Whether to serialize with a dumper generated from the
+        schema (see `app.utils.serializers`) instead of marshmallow,
+        defaults to the `ENABLE_FAST_SERIALIZERS` environment variable
+    :type fast: Optional[bool], optional
+    :param sparse: Field of `model` holding the nested item(s) that the
+        `fields` attribute of the injected `query_args` trims
+        (see `build_sparse_dumper`), defaults to None
+    :type sparse: Optional[str], optional
     """
 
     def decorator(fn: Callable):
@@ -226,14 +317,23 @@ def response_model(
             status_code=status_code,
             description=doc_description,
         )
+        dump = build_dumper(Schema, many, fast)
+        if sparse:
+            dump_sparse = build_sparse_dumper(Schema, sparse, many, fast)
 
         @wraps(fn)
         def wrapper(*args, **kwargs):
+            dump_response = dump
+            if sparse:
+                query_args = kwargs.get('query_args')
+                dump_response = dump_sparse(getattr(query_args, 'fields', ''))
             # Execute the function
             # TODO(avon) fixed mypy issue; ask help from brian
-            response: DataClass = fn(*args, **kwargs)  # type: ignore
+            with phase('core'):
+                response: DataClass = fn(*args, **kwargs)  # type: ignore
             # Deserialize the result using the schema built previously
-            processed_response = Schema(many=many).dump(response)
+            with phase('serialize'):
+                processed_response = dump_response(response)
             return processed_response
 
         return wrapper
@@ -251,18 +351,40 @@ def use_user_token():
             encoded_user_token = request.cookies.get('next-auth.session-token')
             if not encoded_user_token:
                 abort(HTTPStatus.UNAUTHORIZED)
-            encoded_token_bytes = encoded_user_token.encode('utf-8')
             # JWT Decode the cookie header and inject it into the decorated
-            # function
-            decoded_user_token = jwt.decode(
-                encoded_token_bytes,
-                'SECRET_KEY1',
-                algorithms=['HS256'],
-            )
-            jwt_obj = desert.schema(JwtToken).load(decoded_user_token)
+            # function; repeated tokens come from the verified-token cache
+            jwt_obj = token_verifier.verify(encoded_user_token)
             kwargs.update({'user_token': jwt_obj})
             return fn(*args, **kwargs)
 
         return wrapper
 
     return decorator
+
+
+def internal_only():
+    """Only serve the decorated route to internal callers, e.g. the
+    Prometheus scraper: requests with an `Authorization: Bearer` header
+    holding `INTERNAL_API_TOKEN`, or, when that is not set, requests from
+    the loopback interface. Anyone else gets a 404, as if the route did
+    not exist."""
+    def decorator(fn: Callable):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            token = os.getenv('INTERNAL_API_TOKEN')
+            if token:
+                allowed = hmac.compare_digest(
+                    request.headers.get('Authorization', ''),
+                    f'Bearer {token}',
+                )
+            else:
+                allowed = request.remote_addr in _LOOPBACK_ADDRESSES
+            if not allowed:
+                raise ResourceNotFoundError(
+                    description=f'{request.path} was not found',
+                )
+            return fn(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,216 @@
+"""Swagger docs for the resources, kept out of app start: flask-apispec
+and apispec are only imported on the first `/swagger/` request or by
+`flask docs export`. Resources are annotated with `doc` and
+`MethodResource` from here, which record the same `__apispec__`
+annotations as their flask-apispec counterparts for `LazyApiSpec` to hand
+to flask-apispec's converters.
+"""
+import importlib.util
+import json
+import os
+import threading
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import List
+from typing import Optional
+
+import flask
+import flask.views
+
+
+class Annotation:
+    """`flask_apispec.utils.Annotation`, which its converters merge these
+    with when resolving a resource's annotations"""
+
+    def __init__(self, options=None, inherit=None, apply=None):
+        self.options = options or []
+        self.inherit = inherit
+        self.apply = apply
+
+    def __eq__(self, other):
+        if isinstance(other, Annotation):
+            return (
+                self.options == other.options
+                and self.inherit == other.inherit
+                and self.apply == other.apply
+            )
+        return NotImplemented
+
+    def resolve(self, obj):
+        # No `flask_apispec.Ref` in the options, so nothing to resolve
+        return self
+
+    def merge(self, other):
+        if self.inherit is False:
+            return self
+        return Annotation(
+            self.options + other.options,
+            inherit=other.inherit,
+            apply=self.apply if self.apply is not None else other.apply,
+        )
+
+
+def annotate(func: Callable, key: str, options: List, **kwargs) -> None:
+    """Add an annotation under `key` (`docs`, `args` or `schemas`), as
+    `flask_apispec.annotations.annotate` does"""
+    func.__apispec__ = func.__dict__.get('__apispec__', {})
+    func.__apispec__.setdefault(key, []).insert(
+        0, Annotation(options, **kwargs),
+    )
+
+
+def activate(func: Callable) -> Callable:
+    """Mark `func` as handled. flask-apispec wraps views to parse and
+    marshal their annotated arguments and responses, but every annotation
+    made here has `apply=False`: `request_model` and `response_model` do
+    both themselves."""
+    if not isinstance(func, type):
+        func.__apispec__ = func.__dict__.get('__apispec__', {})
+        func.__apispec__['wrapped'] = True
+    return func
+
+
+def doc(inherit=None, **kwargs):
+    """Swagger attributes of the decorated resource or method, e.g.
+    `tags`, as `flask_apispec.doc`"""
+    def wrapper(func):
+        annotate(func, 'docs', [kwargs], inherit=inherit)
+        return activate(func)
+    return wrapper
+
+
+def _inherit(child, parents) -> None:
+    child.__apispec__ = child.__dict__.get('__apispec__', {})
+    for key in ('args', 'schemas', 'docs'):
+        child.__apispec__.setdefault(key, []).extend(
+            annotation
+            for parent in parents
+            for annotation in getattr(parent, '__apispec__', {}).get(key, [])
+            if annotation not in child.__apispec__[key]
+        )
+
+
+class ResourceMeta(type(flask.views.MethodView)):
+    """Passes the annotations of resource classes on to their methods,
+    as `flask_apispec.ResourceMeta`"""
+
+    def __new__(mcs, name, bases, attrs):
+        klass = super().__new__(mcs, name, bases, attrs)
+        mro = klass.mro()
+        _inherit(klass, mro[1:])
+        methods = [
+            method.lower() for method in
+            getattr(klass, 'methods', None) or flask.views.http_method_funcs
+        ]
+        for key, value in attrs.items():
+            if key.lower() in methods:
+                _inherit(value, [
+                    getattr(parent, key) for parent in mro
+                    if hasattr(parent, key)
+                ])
+                setattr(klass, key, activate(value))
+                value.__apispec__['ismethod'] = True
+        return klass
+
+
+class MethodResource(flask.views.MethodView, metaclass=ResourceMeta):
+    """`flask_apispec.MethodResource`"""
+    methods = None
+
+
+def _flask_apispec_dir() -> str:
+    # Found without importing the package
+    spec = importlib.util.find_spec('flask_apispec')
+    return list(spec.submodule_search_locations)[0]
+
+
+class LazyApiSpec:
+    """`flask_apispec.FlaskApiSpec` that only adds the swagger routes in
+    `init_app`. The spec is generated on the first `/swagger/` request, or
+    read from `APISPEC_SPEC_FILE` when the file was written ahead of time
+    (see the `flask docs export` command), so resolving every schema is
+    kept out of app start.
+
+    `APISPEC_SPEC` may be a callable returning the `APISpec`, so building
+    it is deferred as well.
+    """
+
+    def __init__(self, document_options: bool = True):
+        self.app: Optional[flask.Flask] = None
+        self.spec = None
+        self.document_options = document_options
+        self._registered: List[type] = []
+        self._lock = threading.Lock()
+        self._spec_dict: Optional[Dict[str, Any]] = None
+
+    def init_app(self, app: flask.Flask) -> None:
+        self.app = app
+        self.add_swagger_routes()
+
+    def add_swagger_routes(self) -> None:
+        # Named as flask-apispec's, whose template and static files it serves
+        package_dir = _flask_apispec_dir()
+        blueprint = flask.Blueprint(
+            'flask-apispec',
+            __name__,
+            static_folder=os.path.join(package_dir, 'static'),
+            template_folder=os.path.join(package_dir, 'templates'),
+            static_url_path='/flask-apispec/static',
+        )
+        config = self.app.config
+        json_url = config.get('APISPEC_SWAGGER_URL', '/swagger/')
+        if json_url:
+            blueprint.add_url_rule(json_url, 'swagger-json', self.swagger_json)
+        ui_url = config.get('APISPEC_SWAGGER_UI_URL', '/swagger-ui/')
+        if ui_url:
+            blueprint.add_url_rule(ui_url, 'swagger-ui', self.swagger_ui)
+        self.app.register_blueprint(blueprint)
+
+    def register(self, resource: type) -> None:
+        """Document `resource`, a `MethodResource`, when the spec is
+        built"""
+        self._registered.append(resource)
+
+    def build(self):
+        """Generate the spec from the registered resources, once."""
+        from flask_apispec.apidoc import ResourceConverter  # type: ignore
+        from flask_apispec.extension import make_apispec  # type: ignore
+
+        with self._lock:
+            if self.spec is not None:
+                return self.spec
+
+            config = self.app.config
+            spec = config.get('APISPEC_SPEC')
+            if callable(spec):
+                spec = spec()
+            spec = spec or make_apispec(
+                config.get('APISPEC_TITLE', 'flask-apispec'),
+                config.get('APISPEC_VERSION', 'v1'),
+                config.get('APISPEC_OAS_VERSION', '2.0'),
+            )
+            converter = ResourceConverter(
+                self.app, spec, self.document_options,
+            )
+            for resource in self._registered:
+                for path in converter.convert(resource):
+                    spec.path(**path)
+            self.spec = spec
+            return spec
+
+    def spec_dict(self) -> Dict[str, Any]:
+        if self._spec_dict is None:
+            path = self.app.config.get('APISPEC_SPEC_FILE')
+            if path and os.path.exists(path):
+                with open(path) as spec_file:
+                    self._spec_dict = json.load(spec_file)
+            else:
+                self._spec_dict = self.build().to_dict()
+        return self._spec_dict
+
+    def swagger_json(self):
+        return flask.jsonify(self.spec_dict())
+
+    def swagger_ui(self):
+        return flask.render_template('swagger-ui.html')
@@ -0,0 +1,38 @@
+import csv
+import json
+from typing import Iterable
+from typing import Iterator
+from typing import Sequence
+
+
+class _Echo:
+    """File-like object handing back whatever `csv.writer` writes, so rows
+    can be formatted one at a time without buffering a whole file."""
+
+    def write(self, value: str) -> str:
+        return value
+
+
+def ndjson_chunks(
+    batches: Iterable[Sequence[Sequence]],
+    columns: Sequence[str],
+) -> Iterator[str]:
+    """Format batches of rows as newline-delimited JSON, one chunk per
+    batch."""
+    dumps = json.JSONEncoder(separators=(',', ':')).encode
+    for batch in batches:
+        yield ''.join(
+            dumps(dict(zip(columns, row))) + '\n' for row in batch
+        )
+
+
+def csv_chunks(
+    batches: Iterable[Sequence[Sequence]],
+    columns: Sequence[str],
+) -> Iterator[str]:
+    """Format batches of rows as CSV with a header line, one chunk per
+    batch."""
+    writer = csv.writer(_Echo())
+    yield writer.writerow(columns)
+    for batch in batches:
+        yield ''.join(writer.writerow(row) for row in batch)
@@ -0,0 +1,91 @@
+import csv
+import io
+import json
+from itertools import islice
+from typing import Any
+from typing import Dict
+from typing import Iterable
+from typing import Iterator
+from typing import List
+from typing import Optional
+from typing import Sequence
+from typing import TextIO
+from typing import Tuple
+
+from sqlalchemy import Connection
+from sqlalchemy import Table
+
+# (line number, parsed record or `None` if the line couldn't be parsed)
+Record = Tuple[int, Optional[Dict[str, Any]]]
+
+
+def iter_records(stream: TextIO, fmt: str) -> Iterator[Record]:
+    """Parse an uploaded CSV (with a header line) or NDJSON stream one
+    record at a time. Empty CSV cells are left out of the record so the
+    schema defaults apply. ::
+
+    :param stream: Text stream to read from
+    :type stream: TextIO
+    :param fmt: `csv` or `ndjson`
+    :type fmt: str
+    :return: Line numbers and parsed records
+    :rtype: Iterator[Record]
+    """
+    if fmt == 'csv':
+        reader = csv.DictReader(stream)
+        for record in reader:
+            yield reader.line_num, {
+                key: value
+                for key, value in record.items()
+                if key is not None and value not in ('', None)
+            }
+        return
+
+    for line_num, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            record = None
+        yield line_num, record if isinstance(record, dict) else None
+
+
+def batched(iterable: Iterable, size: int) -> Iterator[List]:
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def copy_rows(
+    connection: Connection,
+    table: Table,
+    rows: Sequence[Sequence[Any]],
+) -> None:
+    """Bulk load `rows` (tuples in `table.columns` order) into `table`.
+    Uses `COPY ... FROM STDIN` on psycopg2 and a plain executemany INSERT
+    on other drivers (e.g. SQLite test databases)."""
+    if not rows:
+        return
+
+    if connection.dialect.driver != 'psycopg2':
+        keys = [column.name for column in table.columns]
+        connection.execute(
+            table.insert(),
+            [dict(zip(keys, row)) for row in rows],
+        )
+        return
+
+    # Quote every string so empty strings aren't read back as NULL
+    buffer = io.StringIO()
+    csv.writer(buffer, quoting=csv.QUOTE_NONNUMERIC).writerows(rows)
+    buffer.seek(0)
+    columns = ', '.join(column.name for column in table.columns)
+    cursor = connection.connection.cursor()
+    try:
+        cursor.copy_expert(
+            f'COPY {table.name} ({columns}) FROM STDIN WITH (FORMAT csv)',
+            buffer,
+        )
+    finally:
+        cursor.close()
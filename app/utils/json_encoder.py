@@ -0,0 +1,129 @@
+import json
+import os
+from typing import Any
+from typing import Dict
+from typing import Optional
+
+from flask import current_app
+from flask import Flask
+from flask import make_response
+from flask import Response
+from flask.json.provider import DefaultJSONProvider
+from flask_restful import Api
+
+try:
+    # Optional; the stdlib encoder is used when it is not installed
+    import orjson  # type: ignore
+except ImportError:  # pragma: no cover
+    orjson = None
+
+_ENCODERS = ('orjson', 'json')
+
+
+class JsonEncoder:
+    """Encodes the JSON responses of `api_v1` (replacing Flask-RESTful's
+    `output_json`) and of plain Flask routes and error handlers (as the
+    app's JSON provider). Configured through the environment:
+
+    - `JSON_ENCODER`: `orjson` (default) or `json`; `orjson` falls back to
+      `json` when it is not installed
+
+    orjson writes UTF-8 bytes, which go into the response as they are.
+    Values it has no native encoding for, and datetimes, are converted
+    the way Flask's own provider does, subclasses of `dict`, `list`, `str`
+    and `int` the way the stdlib encoder sees them (e.g. a werkzeug
+    `MultiDict` through its `items()`, keeping the first value of each
+    key), and values orjson rejects, like integers beyond 64 bits, are
+    left to the stdlib encoder. The output then differs in whitespace,
+    in non-ASCII characters not being escaped, in enums being encoded as
+    their values instead of failing, and in NaN and infinities being
+    encoded as `null` instead of the non-standard `NaN`/`Infinity`.
+    """
+
+    def __init__(self):
+        self.configure()
+
+    def init_app(self, app: Flask, api: Api) -> None:
+        self.configure()
+        app.json = _JSONProvider(app, self)
+        api.representations['application/json'] = self.output_json
+        app.extensions['json_encoder'] = self
+
+    def configure(self) -> None:
+        name = os.getenv('JSON_ENCODER', 'orjson').lower()
+        if name not in _ENCODERS:
+            raise ValueError(
+                f'JSON_ENCODER must be one of {", ".join(_ENCODERS)}',
+            )
+        if name == 'orjson' and orjson is None:
+            name = 'json'
+        self.name = name
+
+    def dumps(
+            self,
+            obj: Any,
+            sort_keys: bool = False,
+            settings: Optional[Dict[str, Any]] = None,
+    ) -> bytes:
+        """`obj` as JSON bytes. `settings` are `json.dumps` arguments,
+        e.g. `RESTFUL_JSON`, only used by the stdlib encoder."""
+        if self.name == 'orjson':
+            option = (
+                orjson.OPT_NON_STR_KEYS
+                | orjson.OPT_PASSTHROUGH_DATETIME
+                | orjson.OPT_PASSTHROUGH_SUBCLASS
+            )
+            if sort_keys:
+                option |= orjson.OPT_SORT_KEYS
+            try:
+                return orjson.dumps(obj, default=_default, option=option)
+            except orjson.JSONEncodeError:
+                # e.g. integers beyond 64 bits; if the stdlib encoder
+                # can't encode it either, it raises its own error
+                pass
+        settings = {
+            'default': DefaultJSONProvider.default,
+            'sort_keys': sort_keys,
+            **(settings or {}),
+        }
+        return json.dumps(obj, **settings).encode('utf-8')
+
+    def output_json(self, data: Any, code: int, headers=None) -> Response:
+        """Flask-RESTful representation for `application/json`"""
+        body = self.dumps(
+            data, settings=current_app.config.get('RESTFUL_JSON'),
+        )
+        # Always end with a new line, as Flask-RESTful does
+        response = make_response(body + b'\n', code)
+        response.headers.extend(headers or {})
+        return response
+
+
+def _default(value: Any) -> Any:
+    """orjson `default`: subclasses of the types orjson encodes natively
+    are handed over here (`OPT_PASSTHROUGH_SUBCLASS`) and converted the
+    way the stdlib encoder reads them"""
+    if isinstance(value, dict):
+        # The stdlib encoder goes through `items()`, orjson would not
+        return dict(value.items())
+    if isinstance(value, list):
+        return list(value)
+    if isinstance(value, str):
+        return str.__str__(value)
+    if isinstance(value, int):
+        return int(value)
+    return DefaultJSONProvider.default(value)
+
+
+class _JSONProvider(DefaultJSONProvider):
+    def __init__(self, app: Flask, encoder: JsonEncoder):
+        super().__init__(app)
+        self.encoder = encoder
+
+    def response(self, *args: Any, **kwargs: Any) -> Response:
+        obj = self._prepare_response_obj(args, kwargs)
+        # Flask's compact separators, for the stdlib encoder
+        body = self.encoder.dumps(
+            obj, sort_keys=self.sort_keys, settings={'separators': (',', ':')},
+        )
+        return self._app.response_class(body + b'\n', mimetype=self.mimetype)
@@ -0,0 +1,131 @@
+import os
+import time
+from typing import Any
+from typing import Dict
+from typing import Tuple
+
+from flask import Flask
+from flask import request
+from flask import Response
+from prometheus_client import CollectorRegistry
+from prometheus_client import CONTENT_TYPE_LATEST
+from prometheus_client import generate_latest
+from prometheus_client import Histogram
+from prometheus_client import multiprocess
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+_DB_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0,
+    2.5,
+)
+
+
+def multiprocess_mode() -> bool:
+    """Whether samples go to the shared `PROMETHEUS_MULTIPROC_DIR`; it has
+    to be set (and emptied) before the server starts so every gunicorn
+    worker writes to the same directory."""
+    return 'PROMETHEUS_MULTIPROC_DIR' in os.environ
+
+
+class Metrics:
+    """Prometheus metrics served on `/metrics`. Enabled unless
+    `ENABLE_METRICS=false`.
+
+    With `PROMETHEUS_MULTIPROC_DIR` set, every worker writes its samples to
+    memory-mapped files in that directory and `/metrics` aggregates all of
+    them, whichever worker answers the scrape.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        # Its `_count` series doubles as the request counter, so each
+        # request costs a single observation
+        self.latency = Histogram(
+            'http_request_duration_seconds',
+            'Request latency by resource, method and status class',
+            ['resource', 'method', 'status'],
+        )
+        # `labels()` takes about as long as the observation itself, so
+        # the labelled children are kept here
+        self._latency_children: Dict[Tuple[str, str, str], Any] = {}
+        self.db_latency = Histogram(
+            'db_query_duration_seconds',
+            'SQL statement latency',
+            buckets=_DB_BUCKETS,
+        )
+
+    def init_app(self, app: Flask) -> None:
+        self.enabled = os.getenv('ENABLE_METRICS', 'true').lower() == 'true'
+        app.extensions['metrics'] = self
+        if not self.enabled:
+            return
+
+        with app.app_context():
+            for engine in app.extensions['sqlalchemy'].engines.values():
+                self.instrument(engine)
+        app.before_request(_start)
+        # Also runs for the responses built by `register_error_handlers`
+        app.after_request(self._observe)
+
+    def _observe(self, response: Response) -> Response:
+        # Each access through the `request` proxy costs about as much as
+        # the observation, so it is resolved once
+        current_request = request._get_current_object()
+        start = current_request.environ.get('metrics.start')
+        if start is None:
+            return response
+
+        # Flask-RESTful names endpoints after the resource class
+        self.observe(
+            current_request.endpoint or 'unmatched',
+            current_request.method,
+            response.status_code,
+            time.perf_counter() - start,
+        )
+        return response
+
+    def observe(
+            self,
+            resource: str,
+            method: str,
+            status_code: int,
+            seconds: float,
+    ) -> None:
+        """Record a request; for entry points without Flask (see
+        `app.asgi`)."""
+        key = (resource, method, f'{status_code // 100}xx')
+        child = self._latency_children.get(key)
+        if child is None:
+            child = self._latency_children[key] = self.latency.labels(*key)
+        child.observe(seconds)
+
+    def instrument(self, engine: Engine) -> None:
+        """Record the statement latency of `engine`, e.g. the
+        `sync_engine` of an async engine."""
+        event.listen(engine, 'before_cursor_execute', _before_cursor)
+        event.listen(engine, 'after_cursor_execute', self._after_cursor)
+
+    def _after_cursor(
+            self, conn, cursor, statement, parameters, context, many,
+    ):
+        start = conn.info.pop('metrics_query_start', None)
+        if start is not None:
+            self.db_latency.observe(time.perf_counter() - start)
+
+    def export(self) -> Tuple[bytes, str]:
+        """Current samples in the Prometheus text format, and their content
+        type."""
+        if multiprocess_mode():
+            registry = CollectorRegistry()
+            multiprocess.MultiProcessCollector(registry)
+            return generate_latest(registry), CONTENT_TYPE_LATEST
+        return generate_latest(), CONTENT_TYPE_LATEST
+
+
+def _start() -> None:
+    request.environ['metrics.start'] = time.perf_counter()
+
+
+def _before_cursor(conn, cursor, statement, parameters, context, many):
+    conn.info['metrics_query_start'] = time.perf_counter()
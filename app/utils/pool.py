@@ -0,0 +1,180 @@
+import os
+import statistics
+import threading
+import time
+from collections import deque
+from typing import Any
+from typing import Deque
+from typing import Dict
+from typing import List
+from typing import Type
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import TimeoutError
+from sqlalchemy.pool import NullPool
+from sqlalchemy.pool import Pool
+from sqlalchemy.pool import QueuePool
+
+
+def _env_flag(name: str, default: str = 'false') -> bool:
+    return os.getenv(name, default).lower() == 'true'
+
+
+def pgbouncer_mode() -> bool:
+    """`DB_PGBOUNCER=true` when connecting through PgBouncer in
+    transaction pooling mode: pooling is left to PgBouncer and prepared
+    statements are disabled."""
+    return _env_flag('DB_PGBOUNCER')
+
+
+def engine_options(url: str, pool_class: Type[Pool] = QueuePool):
+    """Engine options configured through the environment:
+
+    - `DB_POOL_SIZE`, `DB_MAX_OVERFLOW`: connections kept open and allowed
+      on top of them
+    - `DB_POOL_TIMEOUT`: seconds to wait for a free connection
+    - `DB_POOL_RECYCLE`: max connection age in seconds (`-1` to disable)
+    - `DB_POOL_PRE_PING`: check connections with a round trip before
+      handing them out, i.e. on every request (default `false`; the
+      recycling already replaces connections before most servers and
+      load balancers drop them)
+    - `DB_STATEMENT_TIMEOUT_MS`: Postgres `statement_timeout`, sent as a
+      startup option (PgBouncer needs `ignore_startup_parameters = options`)
+    - `DB_PGBOUNCER`: see `pgbouncer_mode`
+
+    SQLite keeps SQLAlchemy's defaults. ::
+
+    :param url: Database URL the options are for
+    :type url: str
+    :param pool_class: Queue pool class to use, e.g. from
+        `PoolStats.pool_class`, defaults to QueuePool
+    :type pool_class: Type[Pool], optional
+    :return: Keyword arguments for `create_engine`
+    :rtype: Dict[str, Any]
+    """
+    if make_url(url).get_backend_name() == 'sqlite':
+        return {}
+
+    options: Dict[str, Any] = {
+        'pool_pre_ping': _env_flag('DB_POOL_PRE_PING'),
+    }
+    if pgbouncer_mode():
+        options['poolclass'] = NullPool
+    else:
+        options.update({
+            'poolclass': pool_class,
+            'pool_size': int(os.getenv('DB_POOL_SIZE', '5')),
+            'max_overflow': int(os.getenv('DB_MAX_OVERFLOW', '10')),
+            'pool_timeout': float(os.getenv('DB_POOL_TIMEOUT', '30')),
+            'pool_recycle': int(os.getenv('DB_POOL_RECYCLE', '1800')),
+        })
+
+    statement_timeout = os.getenv('DB_STATEMENT_TIMEOUT_MS')
+    if statement_timeout:
+        options['connect_args'] = {
+            'options': f'-c statement_timeout={int(statement_timeout)}',
+        }
+    return options
+
+
+class PoolStats:
+    """Connection pool counters fed by pool events, plus the time spent
+    waiting for a connection. Counters are per worker process."""
+
+    def __init__(self, max_samples: int = 1024):
+        self.connects = 0
+        self.checkouts = 0
+        self.checkins = 0
+        self.invalidations = 0
+        self.timeouts = 0
+        self._lock = threading.Lock()
+        self._waits: Deque[float] = deque(maxlen=max_samples)
+        self._max_wait = 0.0
+        self._engines: List[Engine] = []
+
+    def pool_class(self, base: Type[QueuePool] = QueuePool):
+        """Subclass of `base` timing every checkout into these stats. Pools
+        are rebuilt from their class on `Engine.dispose`, so the timing
+        lives on the class rather than on a pool instance."""
+        stats = self
+
+        class TimedPool(base):  # type: ignore
+            def connect(self):
+                start = time.perf_counter()
+                try:
+                    return super().connect()
+                except TimeoutError:
+                    stats.timeouts += 1
+                    raise
+                finally:
+                    stats._record_wait(time.perf_counter() - start)
+
+        TimedPool.__name__ = f'Timed{base.__name__}'
+        return TimedPool
+
+    def _record_wait(self, seconds: float) -> None:
+        with self._lock:
+            self._waits.append(seconds)
+            self._max_wait = max(self._max_wait, seconds)
+
+    def attach(self, engine: Engine) -> None:
+        """Count connects, checkouts, checkins and invalidations of
+        `engine`'s pool and report its current size."""
+        @event.listens_for(engine, 'connect')
+        def on_connect(dbapi_connection, connection_record):
+            self.connects += 1
+
+        @event.listens_for(engine, 'checkout')
+        def on_checkout(dbapi_connection, connection_record, proxy):
+            self.checkouts += 1
+
+        @event.listens_for(engine, 'checkin')
+        def on_checkin(dbapi_connection, connection_record):
+            self.checkins += 1
+
+        @event.listens_for(engine, 'invalidate')
+        def on_invalidate(dbapi_connection, connection_record, exception):
+            self.invalidations += 1
+
+        @event.listens_for(engine, 'soft_invalidate')
+        def on_soft_invalidate(dbapi_connection, connection_record, exc):
+            self.invalidations += 1
+
+        self._engines.append(engine)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            waits = sorted(self._waits)
+            max_wait = self._max_wait
+
+        pools = []
+        for engine in self._engines:
+            pool = engine.pool
+            pool_stats: Dict[str, Any] = {'class': type(pool).__name__}
+            # Only queue pools have a size to report
+            if isinstance(pool, QueuePool):
+                pool_stats.update({
+                    'size': pool.size(),
+                    'checked_out': pool.checkedout(),
+                    'overflow': pool.overflow(),
+                })
+            pools.append(pool_stats)
+
+        wait_ms = None
+        if waits:
+            wait_ms = {
+                'p50': statistics.median(waits) * 1000,
+                'p99': waits[int(len(waits) * 0.99)] * 1000,
+                'max': max_wait * 1000,
+            }
+        return {
+            'connects': self.connects,
+            'checkouts': self.checkouts,
+            'checkins': self.checkins,
+            'invalidations': self.invalidations,
+            'timeouts': self.timeouts,
+            'checkout_wait_ms': wait_ms,
+            'pools': pools,
+        }
@@ -0,0 +1,148 @@
+import re
+import threading
+from enum import Enum
+from typing import Callable
+from typing import Dict
+from typing import Hashable
+from typing import Iterable
+from typing import Optional
+from typing import Set
+from typing import Tuple
+
+from sqlalchemy.sql.elements import ColumnElement
+
+
+class MatchMode(Enum):
+    CONTAINS = 'contains'
+    PREFIX = 'prefix'
+    EXACT = 'exact'
+
+
+def escape_like(value: str) -> str:
+    return re.sub(r'([\\%_])', r'\\\1', value)
+
+
+def text_filter(
+        column,
+        term: str,
+        mode: MatchMode = MatchMode.CONTAINS,
+) -> Optional[ColumnElement]:
+    """Build a case-insensitive predicate for `column` from a search term.
+    Returns `None` for an empty term, which is no filter at all, so
+    callers can drop the predicate entirely instead of forcing a scan. ::
+
+    :param column: Column to filter on
+    :param term: Search term; `%` and `_` in it match literally
+    :type term: str
+    :param mode: How `term` has to match, defaults to a substring match
+    :type mode: MatchMode, optional
+    :return: Predicate, or `None` if no filtering is needed
+    :rtype: Optional[ColumnElement]
+    """
+    if not term:
+        return None
+
+    pattern = escape_like(term)
+    if mode is MatchMode.PREFIX:
+        pattern = f'{pattern}%'
+    elif mode is MatchMode.CONTAINS:
+        pattern = f'%{pattern}%'
+    return column.ilike(pattern, escape='\\')
+
+
+class NgramIndex:
+    """In-process n-gram index over a single text column, used where the
+    database has no trigram index support (e.g. SQLite test databases).
+
+    The index is built lazily from `(id, text)` rows on the first search,
+    and rebuilt when the `version` passed to `search` differs from the one
+    it was built at, so writes made by other processes are picked up;
+    `invalidate` drops it right away after a write made by this one.
+    `search` returns the ids of matching rows, or `None` when the index
+    cannot narrow the search down enough to be worth it, in which case the
+    caller should just run the query as is.
+    """
+
+    def __init__(self, n: int = 3, max_matches: int = 500):
+        self.n = n
+        self.max_matches = max_matches
+        self._lock = threading.Lock()
+        self._texts: Optional[Dict[int, str]] = None
+        self._grams: Dict[str, Set[int]] = {}
+        self._version: Hashable = None
+
+    def _ngrams(self, text: str) -> Set[str]:
+        return {
+            text[i:i + self.n]
+            for i in range(len(text) - self.n + 1)
+        }
+
+    def _build(self, rows: Iterable[Tuple[int, str]]) -> None:
+        texts: Dict[int, str] = {}
+        grams: Dict[str, Set[int]] = {}
+        for row_id, text in rows:
+            text = text.lower()
+            texts[row_id] = text
+            for gram in self._ngrams(text):
+                grams.setdefault(gram, set()).add(row_id)
+        self._texts = texts
+        self._grams = grams
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._texts = None
+            self._grams = {}
+
+    def search(
+        self,
+        term: str,
+        mode: MatchMode,
+        load_rows: Callable[[], Iterable[Tuple[int, str]]],
+        version: Hashable = None,
+    ) -> Optional[Set[int]]:
+        """Ids of the rows matching `term`. ::
+
+        :param term: Search term
+        :type term: str
+        :param mode: How `term` has to match
+        :type mode: MatchMode
+        :param load_rows: Called for the `(id, text)` rows to build from
+        :type load_rows: Callable[[], Iterable[Tuple[int, str]]]
+        :param version: Value that changes whenever the rows do, e.g. read
+            from the database right before the search, defaults to None
+        :type version: Hashable, optional
+        :return: Matching ids, or `None` to run the query unnarrowed
+        :rtype: Optional[Set[int]]
+        """
+        value = term.lower()
+        if len(value) < self.n:
+            return None
+
+        with self._lock:
+            if self._texts is None or version != self._version:
+                self._build(load_rows())
+                self._version = version
+            texts = self._texts
+            grams = self._grams
+
+        # Intersect the posting lists, smallest first
+        postings = sorted(
+            (grams.get(gram, set()) for gram in self._ngrams(value)),
+            key=len,
+        )
+        candidates = set(postings[0])
+        for posting in postings[1:]:
+            candidates &= posting
+            if not candidates:
+                break
+
+        if mode is MatchMode.EXACT:
+            matches = {i for i in candidates if texts[i] == value}
+        elif mode is MatchMode.PREFIX:
+            matches = {i for i in candidates if texts[i].startswith(value)}
+        else:
+            matches = {i for i in candidates if value in texts[i]}
+
+        if len(matches) > self.max_matches:
+            return None
+        return matches
@@ -0,0 +1,344 @@
+import re
+from collections.abc import Mapping
+from collections.abc import Sequence
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Type
+
+from marshmallow import fields
+from marshmallow import missing
+from marshmallow import RAISE
+from marshmallow import Schema
+from marshmallow import utils
+from marshmallow import ValidationError
+
+# Field classes whose `_serialize` returns the value untouched when it
+# already has the given type, so the generated code can skip the call
+_PASSTHROUGH_TYPES: Dict[type, type] = {
+    fields.Integer: int,
+    fields.String: str,
+    fields.Boolean: bool,
+}
+
+_DUMP_HOOKS = ('pre_dump', 'post_dump')
+
+_is_digits = re.compile(r'-?[0-9]+').fullmatch
+
+
+class _Unsupported(Exception):
+    """Raised at compile time for schemas the code generator can't
+    reproduce exactly; the caller keeps using marshmallow."""
+
+
+class _Fallback(Exception):
+    """Raised at load time for input the generated loader doesn't handle
+    (including invalid input); the caller defers to marshmallow, which
+    produces the exact same result or error messages."""
+
+
+class _Codegen:
+    def __init__(self):
+        self.lines: List[str] = []
+        self.namespace: Dict[str, Any] = {
+            '_missing': missing,
+            '_get_value': utils.get_value,
+            '_Fallback': _Fallback,
+            '_Mapping': Mapping,
+            '_Sequence': Sequence,
+            '_is_digits': _is_digits,
+        }
+        self._functions = 0
+
+    def bind(self, value: Any) -> str:
+        name = f'_c{len(self.namespace)}'
+        self.namespace[name] = value
+        return name
+
+    def function_name(self, prefix: str) -> str:
+        self._functions += 1
+        return f'{prefix}_{self._functions}'
+
+    def build(self, name: str) -> Callable:
+        source = '\n'.join(self.lines)
+        exec(compile(source, f'<{name}>', 'exec'), self.namespace)
+        return self.namespace[name]
+
+
+def _check_dump_hooks(schema: Schema) -> None:
+    for (tag, _), hooks in schema._hooks.items():
+        if tag in _DUMP_HOOKS and hooks:
+            raise _Unsupported(f'{tag} hooks are not supported')
+    if type(schema).get_attribute is not Schema.get_attribute:
+        raise _Unsupported('Custom get_attribute is not supported')
+    if schema.dict_class is not dict:
+        raise _Unsupported('Ordered schemas are not supported')
+
+
+def _value_expr(
+    gen: _Codegen,
+    field: fields.Field,
+    attr: str,
+    value: str,
+    depth: int = 0,
+) -> str:
+    """Python expression equivalent to `field._serialize(value, attr, obj)`
+    """
+    field_type = type(field)
+    if field_type in _PASSTHROUGH_TYPES and not getattr(
+        field, 'as_string', False,
+    ):
+        type_name = gen.bind(_PASSTHROUGH_TYPES[field_type])
+        bound = gen.bind(field)
+        return (
+            f'({value} if {value}.__class__ is {type_name} '
+            f'else {bound}._serialize({value}, {attr!r}, obj))'
+        )
+
+    if field_type is fields.Nested:
+        schema = field.schema
+        dump = _compile_dump_function(gen, schema)
+        if schema.many or field.many:
+            item = f'_i{depth}'
+            return (
+                f'(None if {value} is None else '
+                f'[{dump}({item}) for {item} in {value}])'
+            )
+        return f'(None if {value} is None else {dump}({value}))'
+
+    if field_type is fields.List:
+        item = f'_i{depth}'
+        inner = _value_expr(gen, field.inner, attr, item, depth + 1)
+        return (
+            f'(None if {value} is None else '
+            f'[{inner} for {item} in {value}])'
+        )
+
+    # Anything else goes through marshmallow's own implementation
+    bound = gen.bind(field)
+    return f'{bound}._serialize({value}, {attr!r}, obj)'
+
+
+def _compile_dump_function(gen: _Codegen, schema: Schema) -> str:
+    _check_dump_hooks(schema)
+    name = gen.function_name('_dump')
+    dump_fields = list(schema.dump_fields.items())
+    attributes = [field.attribute or attr for attr, field in dump_fields]
+
+    # Plain dicts (e.g. the dicts returned by the core layer) are read with
+    # `dict.get`; named tuples (e.g. SQLAlchemy rows), whose `__getitem__`
+    # rejects names, and objects without `__getitem__` (e.g. ORM
+    # instances) with `getattr`; anything else through marshmallow's
+    # accessor
+    dict_safe = all(
+        '.' not in attribute and not hasattr(dict, attribute)
+        for attribute in attributes
+    )
+
+    def read(accessor: str, indent: str = '        ') -> List[str]:
+        return [
+            f'{indent}v{i} = {accessor.format(attribute=attribute)}'
+            for i, attribute in enumerate(attributes)
+        ]
+
+    lines = [f'def {name}(obj):']
+    if not attributes:
+        pass
+    elif dict_safe:
+        lines += ['    cls = type(obj)', '    if cls is dict:']
+        lines += read('obj.get({attribute!r}, _missing)')
+        lines += [
+            "    elif hasattr(cls, '__getitem__') and not (",
+            "        hasattr(cls, '_fields') and issubclass(cls, _Sequence)",
+            '    ):',
+        ]
+        lines += read('_get_value(obj, {attribute!r}, _missing)')
+        lines += ['    else:']
+        lines += read('getattr(obj, {attribute!r}, _missing)')
+    else:
+        lines += read('_get_value(obj, {attribute!r}, _missing)', '    ')
+
+    body: List[str] = ['    out = {}']
+    for i, (attr, field) in enumerate(dump_fields):
+        key = field.data_key if field.data_key is not None else attr
+        value = f'v{i}'
+        if field.dump_default is not missing:
+            default = gen.bind(field.dump_default)
+            if callable(field.dump_default):
+                default = f'{default}()'
+            body.append(f'    if {value} is _missing:')
+            body.append(f'        {value} = {default}')
+        body.append(f'    if {value} is not _missing:')
+        expr = _value_expr(gen, field, attr, value)
+        if type(field) in _PASSTHROUGH_TYPES or type(field) in (
+            fields.Nested, fields.List,
+        ):
+            body.append(f'        out[{key!r}] = {expr}')
+        else:
+            body.append(f'        r = {expr}')
+            body.append('        if r is not _missing:')
+            body.append(f'            out[{key!r}] = r')
+
+    gen.lines += lines + body + ['    return out', '']
+    return name
+
+
+def compile_dumper(schema: Schema) -> Optional[Callable[[Any], Any]]:
+    """Generate a plain-Python function that produces the same output as
+    `schema.dump(obj)`, without marshmallow's per-field dispatch. Returns
+    `None` if the schema uses features that can't be reproduced exactly
+    (dump hooks, ordered output, custom accessors), in which case the
+    caller should keep using `schema.dump`. ::
+
+    :param schema: Schema instance to compile, `many` is honoured
+    :type schema: Schema
+    :return: Dump function, or `None` if the schema is not supported
+    :rtype: Optional[Callable[[Any], Any]]
+    """
+    gen = _Codegen()
+    try:
+        name = _compile_dump_function(gen, schema)
+    except _Unsupported:
+        return None
+
+    dump_one = gen.build(name)
+    if not schema.many:
+        return dump_one
+
+    def dump_many(obj):
+        if obj is None:
+            return dump_one(obj)
+        return [dump_one(item) for item in obj]
+
+    return dump_many
+
+
+def _conversion_lines(gen: _Codegen, field: fields.Field) -> List[str]:
+    """Lines converting `raw` into `value` the way `field._deserialize`
+    does, raising `_Fallback` for anything unusual."""
+    field_type = type(field)
+    if field_type is fields.Integer:
+        lines = [
+            '        if raw.__class__ is int:',
+            '            value = raw',
+        ]
+        if not field.strict:
+            lines += [
+                '        elif raw.__class__ is str and _is_digits(raw):',
+                '            value = int(raw)',
+            ]
+        return lines + [
+            '        else:',
+            '            raise _Fallback',
+        ]
+
+    if field_type is fields.String:
+        return [
+            '        if raw.__class__ is not str:',
+            '            raise _Fallback',
+            '        value = raw',
+        ]
+
+    if field_type is fields.Boolean and field.truthy:
+        truthy = gen.bind(field.truthy)
+        falsy = gen.bind(field.falsy)
+        return [
+            '        if raw.__class__ not in (str, int, bool):',
+            '            raise _Fallback',
+            f'        if raw in {truthy}:',
+            '            value = True',
+            f'        elif raw in {falsy}:',
+            '            value = False',
+            '        else:',
+            '            raise _Fallback',
+        ]
+
+    raise _Unsupported(f'{field_type.__name__} fields are not supported')
+
+
+def compile_loader(
+    schema: Schema,
+    model: Type[Any],
+) -> Optional[Callable[[Any], Any]]:
+    """Generate a plain-Python function equivalent to `schema.load(data)`
+    for a flat desert schema built from the dataclass `model`. Input the
+    generated code doesn't handle, including anything invalid, is handed
+    over to `schema.load` so validation errors stay exactly the same.
+    Returns `None` if the schema is not supported. ::
+
+    :param schema: Schema instance built by `desert.schema_class(model)`
+    :type schema: Schema
+    :param model: Dataclass the schema loads into
+    :type model: Type[Any]
+    :return: Load function, or `None` if the schema is not supported
+    :rtype: Optional[Callable[[Any], Any]]
+    """
+    for (tag, _), hooks in schema._hooks.items():
+        if hooks and (tag != 'post_load' or hooks != ['make_data_class']):
+            return None
+    if schema.many or schema.unknown != RAISE:
+        return None
+
+    gen = _Codegen()
+    model_name = gen.bind(model)
+    known = {
+        field.data_key if field.data_key is not None else attr
+        for attr, field in schema.load_fields.items()
+    }
+    lines = [
+        'def _load(data):',
+        '    if not isinstance(data, _Mapping):',
+        '        raise _Fallback',
+        '    for key in data:',
+        f'        if key not in {gen.bind(frozenset(known))}:',
+        '            raise _Fallback',
+        '    kwargs = {}',
+    ]
+    try:
+        for attr, field in schema.load_fields.items():
+            if field.attribute is not None:
+                raise _Unsupported('Field attributes are not supported')
+            key = field.data_key if field.data_key is not None else attr
+            lines.append(f'    raw = data.get({key!r}, _missing)')
+            lines.append('    if raw is _missing:')
+            if field.load_default is not missing:
+                default = gen.bind(field.load_default)
+                if callable(field.load_default):
+                    default = f'{default}()'
+                lines.append(f'        kwargs[{attr!r}] = {default}')
+            elif field.required:
+                lines.append('        raise _Fallback')
+            else:
+                lines.append('        pass')
+            lines.append('    elif raw is None:')
+            if field.allow_none:
+                lines.append(f'        kwargs[{attr!r}] = None')
+            else:
+                lines.append('        raise _Fallback')
+            lines.append('    else:')
+            lines += _conversion_lines(gen, field)
+            for validator in field.validators:
+                # Validators raise ValidationError or may return False
+                lines.append(
+                    f'        if {gen.bind(validator)}(value) is False:',
+                )
+                lines.append('            raise _Fallback')
+            lines.append(f'        kwargs[{attr!r}] = value')
+    except _Unsupported:
+        return None
+
+    gen.lines = lines + [f'    return {model_name}(**kwargs)', '']
+    load_fast = gen.build('_load')
+
+    def load(data):
+        try:
+            return load_fast(data)
+        # ValueError: `int()` refuses digit strings longer than
+        # `sys.get_int_max_str_digits()`, which marshmallow reports as a
+        # validation error
+        except (_Fallback, ValidationError, ValueError):
+            return schema.load(data)
+
+    return load
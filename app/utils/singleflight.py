@@ -0,0 +1,286 @@
+import asyncio
+import json
+import logging
+import threading
+import time
+from typing import Any
+from typing import Awaitable
+from typing import Callable
+from typing import Dict
+from typing import Optional
+from typing import Tuple
+
+from app.utils.cache import LRUBackend
+
+try:
+    # Optional; only needed with a redis-py `shared` client
+    from redis.exceptions import RedisError  # type: ignore
+except ImportError:  # pragma: no cover
+    RedisError = None
+
+logger = logging.getLogger(__name__)
+
+
+class _Call:
+    __slots__ = ('done', 'result', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """Coalesces concurrent calls with the same key: the first caller
+    runs the function, callers arriving while it runs wait for it and get
+    the same result (or exception) instead of running it again.
+
+    - `window`: seconds a finished result keeps being returned for its
+      key, 0 to only share calls that are still running
+    - `shared`: client speaking the redis-py API (`get`, `set` with `nx`
+      and `px`, `delete`, `incr`), e.g. `redis.Redis`, to also coalesce
+      across workers; a worker that finds the key taken by another waits
+      up to `timeout` seconds for the result it publishes for `window`
+      seconds, so `shared` needs a `window`. `encode`/`decode` turn
+      results into JSON serializable values and back. `errors` raised by
+      it (redis-py's `RedisError` by default) are logged and counted in
+      `failures`, and calls are only coalesced in this worker until it
+      is back.
+
+    Results are shared between requests and must not be modified. Call
+    `clear` after a write so later calls don't get results read before
+    it. With `shared`, it bumps a generation counter that is part of
+    every key, so no worker reuses results read before it, whether
+    published or in its own window; a call already running in another
+    worker still returns its result to the callers waiting on it.
+
+    Only calls that overlap are coalesced, so without a `window` this
+    does nothing for workers serving one request at a time (gunicorn's
+    `sync` workers); it pays off with threads, gevent or asyncio.
+    """
+
+    def __init__(
+            self,
+            window: float = 0,
+            enabled: bool = True,
+            shared: Any = None,
+            encode: Callable[[Any], Any] = lambda value: value,
+            decode: Callable[[Any], Any] = lambda value: value,
+            timeout: float = 10,
+            prefix: str = 'singleflight:',
+            errors: Tuple[type, ...] = (),
+    ):
+        if shared is not None and window <= 0:
+            raise ValueError('Coalescing across workers needs a window')
+        self.enabled = enabled
+        self.shared = shared
+        self.encode = encode
+        self.decode = decode
+        self.timeout = timeout
+        self.prefix = prefix
+        self.errors = errors or ((RedisError,) if RedisError else ())
+        self.failures = 0
+        self.executed = 0
+        self.coalesced = 0
+        self.window_hits = 0
+        self.shared_hits = 0
+        self._lock = threading.Lock()
+        self._calls: Dict[str, _Call] = {}
+        self._futures: Dict[str, asyncio.Future] = {}
+        # Bumped by `clear`, so calls running across a write don't put
+        # their result in the window
+        self._generation = 0
+        self._recent = (
+            LRUBackend(max_size=1024, ttl=window) if window > 0 else None
+        )
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Any:
+        """Result of `fn()`, shared with identical calls (same `key`)."""
+        if not self.enabled:
+            return fn()
+        shared = self.shared is not None
+        if shared:
+            generation = self._shared_generation()
+            shared = generation is not None
+            # Also scopes this worker's window, so `clear` in any worker
+            # drops it
+            key = f'{generation}:{key}' if shared else f'local:{key}'
+        result = self._recent_result(key)
+        if result is not None:
+            return result
+
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                self.coalesced += 1
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        generation = self._generation
+        try:
+            call.result = self._execute(key, fn, shared)
+            self._remember(key, call.result, generation)
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                if self._calls.get(key) is call:
+                    del self._calls[key]
+            call.done.set()
+
+    async def do_async(
+            self,
+            key: str,
+            fn: Callable[[], Awaitable[Any]],
+    ) -> Any:
+        """`do` for coroutines, coalescing calls made on the running
+        event loop; `shared` is not used."""
+        if not self.enabled:
+            return await fn()
+        result = self._recent_result(key)
+        if result is not None:
+            return result
+
+        future = self._futures.get(key)
+        if future is not None:
+            self.coalesced += 1
+            # A follower going away must not cancel the leader's call
+            return await asyncio.shield(future)
+
+        future = asyncio.get_running_loop().create_future()
+        self._futures[key] = future
+        generation = self._generation
+        try:
+            self.executed += 1
+            result = await fn()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            # Retrieved here so an exception nobody waited for is not logged
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            self._remember(key, result, generation)
+            return result
+        finally:
+            if self._futures.get(key) is future:
+                del self._futures[key]
+
+    def _recent_result(self, key: str) -> Optional[Any]:
+        if self._recent is None:
+            return None
+        result = self._recent.get(key)
+        if result is not None:
+            self.window_hits += 1
+        return result
+
+    def _remember(self, key: str, result: Any, generation: int) -> None:
+        if self._recent is not None and generation == self._generation:
+            self._recent.set(key, result)
+
+    def _execute(
+            self,
+            key: str,
+            fn: Callable[[], Any],
+            shared: bool,
+    ) -> Any:
+        if not shared:
+            self.executed += 1
+            return fn()
+
+        lock_key = f'{self.prefix}lock:{key}'
+        result_key = f'{self.prefix}result:{key}'
+        result = self._shared_result(result_key)
+        if result is not None:
+            return result
+
+        if self._shared_call(
+                'set', lock_key, '1', nx=True, px=int(self.timeout * 1000),
+        ):
+            try:
+                self.executed += 1
+                result = fn()
+                self._shared_call(
+                    'set',
+                    result_key,
+                    json.dumps(self.encode(result), separators=(',', ':')),
+                    px=max(int(self._recent.ttl * 1000), 1),
+                )
+                return result
+            finally:
+                self._shared_call('delete', lock_key)
+
+        # Another worker is running it; wait for the result it publishes
+        deadline = time.monotonic() + self.timeout
+        while time.monotonic() < deadline:
+            time.sleep(0.01)
+            result = self._shared_result(result_key)
+            if result is not None:
+                return result
+            if self._shared_call('get', lock_key) is None:
+                break
+        self.executed += 1
+        return fn()
+
+    def _failed(self, operation: str, error: Exception) -> None:
+        self.failures += 1
+        logger.warning('Coalescing %s failed: %s', operation, error)
+
+    def _shared_call(self, operation: str, *args, **kwargs) -> Any:
+        """`shared.<operation>(...)`, or `None` when it fails"""
+        try:
+            return getattr(self.shared, operation)(*args, **kwargs)
+        except self.errors as e:
+            self._failed(operation, e)
+            return None
+
+    def _shared_generation(self) -> Optional[int]:
+        """Current shared generation, `None` when `shared` is down"""
+        try:
+            raw = self.shared.get(f'{self.prefix}generation')
+        except self.errors as e:
+            self._failed('get', e)
+            return None
+        return int(raw) if raw is not None else 0
+
+    def _shared_result(self, result_key: str) -> Optional[Any]:
+        raw = self._shared_call('get', result_key)
+        if raw is None:
+            return None
+        self.shared_hits += 1
+        return self.decode(json.loads(raw))
+
+    def clear(self) -> None:
+        """Start new calls for every key; running calls still return to
+        the callers already waiting on them."""
+        with self._lock:
+            self._generation += 1
+            self._calls.clear()
+        self._futures.clear()
+        if self._recent is not None:
+            self._recent.clear()
+        if self.shared is not None:
+            # Every worker moves on to new shared keys; the old ones expire
+            self._shared_call('incr', f'{self.prefix}generation')
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'enabled': self.enabled,
+            'executed': self.executed,
+            'coalesced': self.coalesced,
+            'window_hits': self.window_hits,
+            'shared_hits': self.shared_hits,
+            'failures': self.failures,
+            'in_flight': len(self._calls) + len(self._futures),
+        }
@@ -0,0 +1,12 @@
+from typing import Optional
+from typing import Tuple
+
+
+def parse_fields(value: Optional[str]) -> Tuple[str, ...]:
+    """Field names of a sparse fieldset query parameter, e.g.
+    `fields=id,code`, in the order given and without repeats or blanks.
+    An empty tuple means every field."""
+    if not value:
+        return ()
+    names = (name.strip() for name in value.split(','))
+    return tuple(dict.fromkeys(name for name in names if name))
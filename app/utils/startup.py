@@ -0,0 +1,44 @@
+import time
+from contextlib import contextmanager
+from typing import Any
+from typing import Dict
+from typing import Iterator
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+
+class StartupReport:
+    """Wall time of each `create_app` init phase, plus the imports that
+    ran before it when `imports_started` is given."""
+
+    def __init__(self, imports_started: Optional[float] = None):
+        self.started = time.perf_counter()
+        self.phases: List[Tuple[str, float]] = []
+        if imports_started is not None:
+            self.phases.append(('imports', self.started - imports_started))
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.append((name, time.perf_counter() - start))
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            'phases_ms': {
+                name: round(seconds * 1000, 2)
+                for name, seconds in self.phases
+            },
+            'total_ms': round(
+                sum(seconds for _, seconds in self.phases) * 1000, 2,
+            ),
+        }
+
+    def __str__(self) -> str:
+        phases = ', '.join(
+            f'{name} {seconds * 1000:.1f} ms' for name, seconds in self.phases
+        )
+        return f'Startup: {phases} (total {self.as_dict()["total_ms"]} ms)'
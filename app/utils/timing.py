@@ -0,0 +1,175 @@
+import json
+import logging
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict
+from typing import Iterator
+from typing import Optional
+
+from flask import Flask
+from flask import g
+from flask import has_request_context
+from flask import request
+from flask import Response
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+
+class _Timings:
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.phases: Dict[str, float] = {}
+        self.queries = 0
+        self.db_seconds = 0.0
+
+
+# Timings of requests served without Flask, see `RequestTiming.begin`
+_timings: ContextVar[Optional[_Timings]] = ContextVar(
+    'request_timings', default=None,
+)
+
+
+def _current() -> Optional[_Timings]:
+    if not has_request_context():
+        return _timings.get()
+    return g.get('request_timings')
+
+
+class RequestTiming:
+    """Per-request phase timing, sent as a `Server-Timing` header and a
+    JSON log line. Enabled with `ENABLE_SERVER_TIMING=true`; requests
+    running more than `QUERY_BUDGET` SQL statements are logged as
+    warnings and flagged in the header so N+1 patterns show up early.
+
+    Phases are recorded with `phase` (see `request_model` and
+    `response_model`), SQL statements and their time through cursor
+    events on every engine of the app.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.query_budget = 20
+
+    def init_app(self, app: Flask) -> None:
+        self.enabled = (
+            os.getenv('ENABLE_SERVER_TIMING', 'false').lower() == 'true'
+        )
+        self.query_budget = int(os.getenv('QUERY_BUDGET', '20'))
+        app.extensions['request_timing'] = self
+        if not self.enabled:
+            return
+
+        with app.app_context():
+            for engine in app.extensions['sqlalchemy'].engines.values():
+                self.instrument(engine)
+        app.before_request(_start)
+        app.after_request(self._finish)
+
+    def instrument(self, engine: Engine) -> None:
+        """Count the statements of `engine`, e.g. the `sync_engine` of an
+        async engine."""
+        event.listen(engine, 'before_cursor_execute', _before_cursor)
+        event.listen(engine, 'after_cursor_execute', _after_cursor)
+
+    def begin(self) -> None:
+        """Start timing the request running in the current context, for
+        entry points without Flask (see `app.asgi`); `end` returns its
+        `Server-Timing` header."""
+        if self.enabled:
+            _timings.set(_Timings())
+
+    def end(self, method: str, path: str, status: int) -> Optional[str]:
+        timings = _timings.get()
+        if timings is None:
+            return None
+        _timings.set(None)
+        return self._report(timings, method, path, status)
+
+    def _finish(self, response: Response) -> Response:
+        timings = _current()
+        if timings is None:
+            return response
+
+        response.headers['Server-Timing'] = self._report(
+            timings, request.method, request.path, response.status_code,
+        )
+        return response
+
+    def _report(
+            self,
+            timings: _Timings,
+            method: str,
+            path: str,
+            status: int,
+    ) -> str:
+        """Log the `timings` of a request and return them as a
+        `Server-Timing` header."""
+        total = time.perf_counter() - timings.start
+        over_budget = timings.queries > self.query_budget
+        metrics = [
+            f'{name};dur={seconds * 1000:.2f}'
+            for name, seconds in timings.phases.items()
+        ]
+        metrics.append(
+            f'db;dur={timings.db_seconds * 1000:.2f};'
+            f'desc="{timings.queries} queries"',
+        )
+        if over_budget:
+            metrics.append('query-budget;desc="exceeded"')
+        metrics.append(f'total;dur={total * 1000:.2f}')
+
+        record = {
+            'method': method,
+            'path': path,
+            'status': status,
+            'total_ms': round(total * 1000, 2),
+            'phases_ms': {
+                name: round(seconds * 1000, 2)
+                for name, seconds in timings.phases.items()
+            },
+            'queries': timings.queries,
+            'db_ms': round(timings.db_seconds * 1000, 2),
+            'query_budget_exceeded': over_budget,
+        }
+        level = logging.WARNING if over_budget else logging.INFO
+        logger.log(level, json.dumps(record))
+        return ', '.join(metrics)
+
+
+def _start() -> None:
+    g.request_timings = _Timings()
+
+
+def _before_cursor(conn, cursor, statement, parameters, context, many):
+    conn.info['query_start'] = time.perf_counter()
+
+
+def _after_cursor(conn, cursor, statement, parameters, context, many):
+    timings = _current()
+    start = conn.info.pop('query_start', None)
+    if timings is None or start is None:
+        return
+    timings.queries += 1
+    timings.db_seconds += time.perf_counter() - start
+
+
+@contextmanager
+def phase(name: str) -> Iterator[None]:
+    """Add the time spent in the block to the `name` phase of the current
+    request. Does nothing when timing is disabled or outside requests."""
+    timings = _current()
+    if timings is None:
+        yield
+        return
+
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.phases[name] = (
+            timings.phases.get(name, 0.0) + time.perf_counter() - start
+        )
@@ -0,0 +1,126 @@
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any
+from typing import Dict
+from typing import Tuple
+
+import desert
+from flask import Flask
+from marshmallow import EXCLUDE
+
+from app.schemas.decorators import JwtToken
+
+
+def load_keys() -> Tuple[Dict[str, str], str]:
+    """Signing keys configured through the environment, by key id, and
+    the key for tokens without a `kid` header:
+
+    - `JWT_SECRET_KEYS`: comma-separated `kid:secret` pairs; the first one
+      is the default, so put the current key first while rotating
+    - `JWT_SECRET_KEY`: single key used for every token, whatever its
+      `kid`, when `JWT_SECRET_KEYS` is not set
+    """
+    pairs = os.getenv('JWT_SECRET_KEYS')
+    if not pairs:
+        return {}, os.getenv('JWT_SECRET_KEY', 'SECRET_KEY1')
+
+    keys = {}
+    for pair in pairs.split(','):
+        kid, _, secret = pair.strip().partition(':')
+        keys[kid] = secret
+    return keys, next(iter(keys.values()))
+
+
+class TokenVerifier:
+    """Verifies HS256 session tokens and loads them into `JwtToken`.
+
+    Verified tokens are kept in an LRU of `JWT_CACHE_SIZE` entries keyed
+    by the token's SHA-256, so a session repeating its cookie skips the
+    signature check and the schema load. An entry is dropped at the
+    token's `exp` or after `JWT_CACHE_TTL` seconds, whichever comes first,
+    which also bounds how long a token signed with a retired key is still
+    accepted. Cached `JwtToken` instances are shared between requests and
+    must not be modified.
+    """
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        # next-auth adds claims of its own, e.g. `exp` and `jti`
+        self._schema = desert.schema(JwtToken, meta={'unknown': EXCLUDE})
+        self._lock = threading.Lock()
+        self._entries: 'OrderedDict[bytes, Tuple[float, Any]]' = (
+            OrderedDict()
+        )
+        self.configure()
+
+    def init_app(self, app: Flask) -> None:
+        self.configure()
+        app.extensions['token_verifier'] = self
+
+    def configure(self) -> None:
+        self.keys, self.default_key = load_keys()
+        self.max_size = int(os.getenv('JWT_CACHE_SIZE', '4096'))
+        self.ttl = float(os.getenv('JWT_CACHE_TTL', '300'))
+        with self._lock:
+            self._entries.clear()
+
+    def verify(self, encoded_token: str) -> JwtToken:
+        """Decode and verify `encoded_token`, raising the `jwt` errors
+        handled by `register_error_handlers` when it is invalid."""
+        digest = hashlib.sha256(encoded_token.encode('utf-8')).digest()
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is not None:
+                expires_at, token = entry
+                if expires_at > now:
+                    self._entries.move_to_end(digest)
+                    self.hits += 1
+                    return token
+                del self._entries[digest]
+            self.misses += 1
+
+        # Imported on the first miss rather than at app start
+        import jwt
+
+        claims = jwt.decode(
+            encoded_token,
+            self._key(encoded_token),
+            algorithms=['HS256'],
+        )
+        token = self._schema.load(claims)
+
+        expires_at = now + self.ttl
+        if 'exp' in claims:
+            expires_at = min(expires_at, float(claims['exp']))
+        with self._lock:
+            self._entries[digest] = (expires_at, token)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        return token
+
+    def _key(self, encoded_token: str) -> str:
+        import jwt
+
+        if not self.keys:
+            return self.default_key
+        kid = jwt.get_unverified_header(encoded_token).get('kid')
+        if kid is None:
+            return self.default_key
+        key = self.keys.get(kid)
+        if key is None:
+            raise jwt.InvalidSignatureError(f'Unknown key id {kid!r}')
+        return key
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 4) if lookups else None,
+            'size': len(self._entries),
+        }
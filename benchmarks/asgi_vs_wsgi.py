@@ -0,0 +1,86 @@
+"""Concurrent-client throughput of the sync gunicorn setup (3 sync
+workers, as in the Dockerfile) against the ASGI entry point on uvicorn
+with the same number of workers. ::
+
+    python -m benchmarks.asgi_vs_wsgi --clients 32 --seconds 10
+    python -m benchmarks.asgi_vs_wsgi --db-url postgresql://...
+
+Both servers run as subprocesses against the same database, which is
+seeded once before the runs. An in-memory SQLite database can't be shared
+between processes, so a temporary SQLite file is used by default.
+"""
+import argparse
+import os
+import subprocess
+import tempfile
+from typing import Dict
+
+from benchmarks.common import load
+from benchmarks.common import make_app
+from benchmarks.common import seed_brands
+from benchmarks.common import wait_until_up
+
+SERVERS = {
+    'gunicorn (sync)': [
+        'gunicorn', '-w={workers}', '-t=0', '-b=127.0.0.1:{port}',
+        'wsgi:create_app()',
+    ],
+    'uvicorn (asgi)': [
+        'uvicorn', '--workers={workers}', '--port={port}',
+        '--log-level=warning', 'asgi:app',
+    ],
+}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--db-url')
+    parser.add_argument('--brands', type=int, default=20000)
+    parser.add_argument('--clients', type=int, default=32)
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--workers', type=int, default=3)
+    parser.add_argument('--port', type=int, default=8901)
+    args = parser.parse_args()
+
+    db_url = args.db_url
+    if db_url is None:
+        db_file = tempfile.NamedTemporaryFile(suffix='.db', delete=False)
+        db_url = f'sqlite:///{db_file.name}'
+    seed_brands(make_app(db_url), args.brands)
+
+    paths = [f'/v1/brand/{i}' for i in range(1, args.brands, 97)]
+    paths += [
+        f'/v1/brand?page={page}&per_page=20' for page in range(1, 50)
+    ]
+    paths += ['/v1/brand?name=grocery&per_page=20']
+
+    env = dict(os.environ, DB_URL=db_url)
+    results: Dict[str, Dict[str, float]] = {}
+    for label, command in SERVERS.items():
+        command = [
+            part.format(workers=args.workers, port=args.port)
+            for part in command
+        ]
+        server = subprocess.Popen(command, env=env)
+        base_url = f'http://127.0.0.1:{args.port}'
+        try:
+            wait_until_up(base_url)
+            results[label] = load(base_url, paths, args.clients, args.seconds)
+        finally:
+            server.terminate()
+            server.wait()
+
+    print(
+        f'{args.clients} clients, {args.workers} workers, '
+        f'{args.seconds:.0f}s per server',
+    )
+    for label, stats in results.items():
+        print(
+            f'{label:<18} {stats["requests_per_second"]:>8.1f} req/s  '
+            f'p50 {stats["p50_ms"]:>7.1f} ms  p99 {stats["p99_ms"]:>7.1f} ms'
+            f'  errors {stats["errors"]:.0f}',
+        )
+
+
+if __name__ == '__main__':
+    main()
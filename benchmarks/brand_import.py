@@ -0,0 +1,71 @@
+"""Throughput of the streaming import (`POST /v1/brand/import`, COPY on
+Postgres) against creating the same brands one `POST /v1/brand` at a
+time. ::
+
+    python -m benchmarks.brand_import --rows 100000 --post-rows 2000
+    python -m benchmarks.brand_import --db-url postgresql://...
+"""
+import argparse
+import time
+
+from benchmarks.common import make_app
+from benchmarks.common import seed_brands
+
+
+def _csv(rows: int, offset: int = 0) -> bytes:
+    lines = ['code,name,is_active']
+    lines += [
+        f'IM{i:09d},Imported brand {i},{"true" if i % 3 else "false"}'
+        for i in range(offset, offset + rows)
+    ]
+    return ('\n'.join(lines) + '\n').encode('utf-8')
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--db-url', default='sqlite://')
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument(
+        '--post-rows', type=int, default=2000,
+        help='Rows sent through the per-row POST path (it is much slower)',
+    )
+    args = parser.parse_args()
+
+    app = make_app(args.db_url)
+    client = app.test_client()
+
+    seed_brands(app, 0)
+    start = time.perf_counter()
+    for i in range(args.post_rows):
+        client.post('/v1/brand', json={
+            'code': f'PO{i:09d}', 'name': f'Posted brand {i}',
+        })
+    post_seconds = time.perf_counter() - start
+
+    seed_brands(app, 0)
+    body = _csv(args.rows)
+    start = time.perf_counter()
+    response = client.post(
+        '/v1/brand/import?format=csv', data=body, content_type='text/csv',
+    )
+    import_seconds = time.perf_counter() - start
+    result = response.get_json()
+
+    # Second run: every row already exists, nothing changes
+    start = time.perf_counter()
+    client.post(
+        '/v1/brand/import?format=csv', data=body, content_type='text/csv',
+    )
+    reimport_seconds = time.perf_counter() - start
+
+    print(f'{"path":<28} {"rows":>9} {"seconds":>9} {"rows/s":>10}')
+    for label, rows, seconds in (
+        ('POST /v1/brand per row', args.post_rows, post_seconds),
+        ('import (new rows)', result['rows_read'], import_seconds),
+        ('import (unchanged rows)', args.rows, reimport_seconds),
+    ):
+        print(f'{label:<28} {rows:>9} {seconds:>9.2f} {rows / seconds:>10.0f}')
+
+
+if __name__ == '__main__':
+    main()
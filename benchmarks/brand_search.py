@@ -0,0 +1,51 @@
+"""List latency of `BrandCore.get_all` text filters as the brand table
+grows. ::
+
+    python -m benchmarks.brand_search --sizes 10000 100000 1000000
+    python -m benchmarks.brand_search --db-url postgresql://...
+"""
+import argparse
+
+from benchmarks.common import make_app
+from benchmarks.common import measure
+from benchmarks.common import seed_brands
+
+FILTERS = {
+    'no filter': {},
+    'substring code': {'code': '0004242'},
+    'substring name': {'name': ' 4242 '},
+    'broad substring': {'name': 'electro'},
+    'prefix code': {'code': 'BR000424', 'match': 'prefix'},
+    'exact code': {'code': 'BR00000042', 'match': 'exact'},
+}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        '--sizes', type=int, nargs='+', default=[10000, 100000, 1000000],
+    )
+    parser.add_argument('--db-url', default='sqlite://')
+    parser.add_argument('--repeat', type=int, default=30)
+    args = parser.parse_args()
+
+    app = make_app(args.db_url)
+    client = app.test_client()
+    print(f'{"rows":>9}  {"filter":<16} {"p50 ms":>9} {"p99 ms":>9}')
+    for size in args.sizes:
+        seed_brands(app, size)
+        for label, params in FILTERS.items():
+            # Warm up (builds the n-gram index on SQLite)
+            client.get('/v1/brand', query_string=params)
+            stats = measure(
+                lambda: client.get('/v1/brand', query_string=params),
+                repeat=args.repeat,
+            )
+            print(
+                f'{size:>9}  {label:<16} '
+                f'{stats["p50_ms"]:>9.2f} {stats["p99_ms"]:>9.2f}',
+            )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,130 @@
+import os
+import statistics
+import threading
+import time
+import urllib.request
+from typing import Callable
+from typing import Dict
+from typing import List
+
+from flask import Flask
+from sqlalchemy import insert
+from sqlalchemy import text
+
+
+def make_app(db_url: str = 'sqlite://') -> Flask:
+    """Build the app against `db_url`. `create_app` registers resources on
+    the global `api_v1`, so this can only be called once per process; use
+    `seed_brands` to reset the data between runs.
+    """
+    os.environ['DB_URL'] = db_url
+    os.environ.setdefault('WEBSERVICE_ENV', 'localhost')
+
+    from app import create_app
+    from app.extensions import db
+
+    app = create_app()
+    with app.app_context():
+        if db.engine.dialect.name == 'postgresql':
+            with db.engine.begin() as conn:
+                conn.execute(text('CREATE EXTENSION IF NOT EXISTS pg_trgm'))
+    return app
+
+
+def seed_brands(app: Flask, count: int, chunk_size: int = 10000) -> None:
+    """Recreate the brand table with `count` generated brands."""
+    from app.extensions import db
+    from app.models.brand import Brand
+    from app.core.brand import clear_list_caches
+    from app.resources.brand import brand_core
+
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        for start in range(0, count, chunk_size):
+            rows = [
+                {
+                    'code': f'BR{i:08d}',
+                    'name': f'Brand {i} {_WORDS[i % len(_WORDS)]}',
+                    'is_active': i % 7 != 0,
+                }
+                for i in range(start, min(start + chunk_size, count))
+            ]
+            db.session.execute(insert(Brand), rows)
+        db.session.commit()
+    # Rows were written behind BrandCore's back
+    brand_core._invalidate_search()
+    clear_list_caches()
+
+
+_WORDS = [
+    'apparel', 'beverages', 'cosmetics', 'dairy', 'electronics',
+    'footwear', 'grocery', 'hardware', 'industrial', 'jewelry',
+]
+
+
+def measure(fn: Callable[[], object], repeat: int = 50) -> Dict[str, float]:
+    """Run `fn` `repeat` times and return latency stats in milliseconds."""
+    samples: List[float] = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return {
+        'p50_ms': statistics.median(samples),
+        'p99_ms': samples[min(len(samples) - 1, int(len(samples) * 0.99))],
+        'mean_ms': statistics.fmean(samples),
+    }
+
+
+def wait_until_up(base_url: str, timeout: float = 30) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            urllib.request.urlopen(base_url + '/', timeout=1).read()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f'Server at {base_url} did not start')
+
+
+def load(base_url: str, paths: List[str], clients: int, seconds: float):
+    """GET `paths` round-robin from `clients` threads for `seconds`."""
+    latencies: List[float] = []
+    errors = 0
+    lock = threading.Lock()
+    deadline = time.monotonic() + seconds
+
+    def client(offset: int) -> None:
+        nonlocal errors
+        i = offset
+        while time.monotonic() < deadline:
+            path = paths[i % len(paths)]
+            i += clients
+            start = time.perf_counter()
+            try:
+                urllib.request.urlopen(base_url + path, timeout=30).read()
+                failed = False
+            except OSError:
+                failed = True
+            elapsed = (time.perf_counter() - start) * 1000
+            with lock:
+                latencies.append(elapsed)
+                errors += failed
+
+    threads = [
+        threading.Thread(target=client, args=(n,)) for n in range(clients)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    latencies.sort()
+    return {
+        'requests_per_second': len(latencies) / seconds,
+        'p50_ms': statistics.median(latencies),
+        'p99_ms': latencies[int(len(latencies) * 0.99)],
+        'errors': errors,
+    }
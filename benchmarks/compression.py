@@ -0,0 +1,44 @@
+"""Ratio and CPU cost of each compression level on a 100-brand
+`GET /v1/brand` page, to pick `COMPRESSION_LEVEL` and
+`COMPRESSION_ZSTD_LEVEL`. ::
+
+    python -m benchmarks.compression
+"""
+import timeit
+
+from app.utils import compression
+from benchmarks.common import make_app
+from benchmarks.common import seed_brands
+
+_LEVELS = {
+    'gzip': (compression._GzipEncoder, (1, 3, 6, 9)),
+    'zstd': (compression._ZstdEncoder, (1, 3, 6, 12)),
+}
+
+
+def main(number: int = 200) -> None:
+    app = make_app()
+    seed_brands(app, 1000)
+    page = app.test_client().get(
+        '/v1/brand', query_string={'per_page': 100},
+        headers={'Accept-Encoding': 'identity'},
+    ).get_data()
+
+    print(f'{len(page)} bytes uncompressed')
+    print(f'{"encoding":<10} {"level":>5} {"bytes":>7} {"ratio":>6} '
+          f'{"us":>8}')
+    for encoding, (Encoder, levels) in _LEVELS.items():
+        if encoding == 'zstd' and compression.zstandard is None:
+            print('zstd      skipped, zstandard is not installed')
+            continue
+        for level in levels:
+            size = len(Encoder(level).finish(page))
+            seconds = timeit.timeit(
+                lambda: Encoder(level).finish(page), number=number,
+            ) / number
+            print(f'{encoding:<10} {level:>5} {size:>7} '
+                  f'{len(page) / size:>6.1f} {seconds * 1e6:>8.1f}')
+
+
+if __name__ == '__main__':
+    main()
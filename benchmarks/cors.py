@@ -0,0 +1,76 @@
+"""`app.utils.cors.Cors` against flask_cors with the app's origins: the
+origin check alone, and a preflight and a simple GET through the test
+client. ::
+
+    python -m benchmarks.cors
+"""
+import timeit
+
+from flask import Flask
+from flask_cors import CORS
+from flask_cors.core import try_match_any
+
+from app import CORS_ORIGINS
+from app.utils.cors import Cors
+
+# The last pattern, as from most CloudFront deployments
+_ORIGIN = 'https://d1234abcd.cloudfront.net'
+
+_PREFLIGHT = {
+    'Origin': _ORIGIN,
+    'Access-Control-Request-Method': 'PATCH',
+    'Access-Control-Request-Headers': 'content-type',
+}
+
+
+def _make_app(init) -> Flask:
+    app = Flask(__name__)
+    init(app)
+
+    @app.route('/v1/brand/<int:brand_id>', methods=['GET', 'PATCH'])
+    def brand(brand_id):
+        return {'id': brand_id}
+
+    return app
+
+
+def _time(fn, number: int) -> float:
+    fn()  # warm up
+    return timeit.timeit(fn, number=number) / number * 1e6
+
+
+def main(number: int = 5000) -> None:
+    flask_cors_app = _make_app(lambda app: CORS(
+        app, supports_credentials=True, origins=CORS_ORIGINS,
+    ))
+    cors = Cors()
+    cors_app = _make_app(lambda app: cors.init_app(app, CORS_ORIGINS))
+
+    cases = {
+        'origin check': (
+            lambda: try_match_any(_ORIGIN, CORS_ORIGINS),
+            lambda: cors.is_allowed(_ORIGIN),
+        ),
+    }
+    for label, method, headers in (
+        ('preflight', 'OPTIONS', _PREFLIGHT),
+        ('GET', 'GET', {'Origin': _ORIGIN}),
+    ):
+        clients = (flask_cors_app.test_client(), cors_app.test_client())
+        cases[label] = tuple(
+            lambda client=client: client.open(
+                '/v1/brand/1', method=method, headers=headers,
+            )
+            for client in clients
+        )
+
+    print(f'{"case":<14} {"flask_cors us":>14} {"Cors us":>10}')
+    for label, (before, after) in cases.items():
+        print(
+            f'{label:<14} {_time(before, number):>14.2f} '
+            f'{_time(after, number):>10.2f}',
+        )
+
+
+if __name__ == '__main__':
+    main()
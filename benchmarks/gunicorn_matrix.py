@@ -0,0 +1,106 @@
+"""Throughput of the brand endpoints under `gunicorn.conf.py` for each
+worker class. ::
+
+    python -m benchmarks.gunicorn_matrix --clients 32 --seconds 10
+    python -m benchmarks.gunicorn_matrix --worker-classes sync gthread \\
+        --workers 4 --db-url postgresql://...
+
+Servers are configured the way production is, through the environment
+read by `gunicorn.conf.py`; `gevent` is skipped when it is not installed.
+As in `benchmarks.asgi_vs_wsgi`, a temporary SQLite file is used by
+default so every worker sees the seeded rows.
+"""
+import argparse
+import importlib.util
+import os
+import subprocess
+import tempfile
+from typing import Dict
+from typing import List
+
+from benchmarks.common import load
+from benchmarks.common import make_app
+from benchmarks.common import seed_brands
+from benchmarks.common import wait_until_up
+
+
+def endpoint_paths(brands: int) -> Dict[str, List[str]]:
+    return {
+        'GET /v1/brand/<id>': [
+            f'/v1/brand/{i}' for i in range(1, brands, 97)
+        ],
+        'GET /v1/brand': [
+            f'/v1/brand?page={page}&per_page=20' for page in range(1, 50)
+        ],
+        'GET /v1/brand (filtered)': ['/v1/brand?name=grocery&per_page=20'],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--db-url')
+    parser.add_argument('--brands', type=int, default=20000)
+    parser.add_argument('--clients', type=int, default=32)
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--workers', type=int, default=3)
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--port', type=int, default=8902)
+    parser.add_argument(
+        '--worker-classes', nargs='+', default=['sync', 'gthread', 'gevent'],
+    )
+    args = parser.parse_args()
+
+    db_url = args.db_url
+    if db_url is None:
+        db_file = tempfile.NamedTemporaryFile(suffix='.db', delete=False)
+        db_url = f'sqlite:///{db_file.name}'
+    seed_brands(make_app(db_url), args.brands)
+
+    base_url = f'http://127.0.0.1:{args.port}'
+    rows = []
+    for worker_class in args.worker_classes:
+        if (
+            worker_class == 'gevent'
+            and importlib.util.find_spec('gevent') is None
+        ):
+            print('gevent skipped, it is not installed')
+            continue
+
+        env = dict(
+            os.environ,
+            DB_URL=db_url,
+            PORT=str(args.port),
+            WEB_CONCURRENCY=str(args.workers),
+            GUNICORN_WORKER_CLASS=worker_class,
+            GUNICORN_THREADS=str(args.threads),
+        )
+        server = subprocess.Popen(
+            ['gunicorn', '--log-level=warning', 'wsgi:create_app()'],
+            env=env,
+        )
+        try:
+            wait_until_up(base_url)
+            for endpoint, paths in endpoint_paths(args.brands).items():
+                stats = load(base_url, paths, args.clients, args.seconds)
+                rows.append((worker_class, endpoint, stats))
+        finally:
+            server.terminate()
+            server.wait()
+
+    print(
+        f'{args.clients} clients, {args.workers} workers '
+        f'({args.threads} threads for gthread), {args.seconds:.0f}s per '
+        'endpoint',
+    )
+    print(f'{"class":<8} {"endpoint":<26} {"req/s":>8} {"p50 ms":>8} '
+          f'{"p99 ms":>8} {"errors":>6}')
+    for worker_class, endpoint, stats in rows:
+        print(
+            f'{worker_class:<8} {endpoint:<26} '
+            f'{stats["requests_per_second"]:>8.1f} {stats["p50_ms"]:>8.1f} '
+            f'{stats["p99_ms"]:>8.1f} {stats["errors"]:>6.0f}',
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,52 @@
+"""Cost of encoding a serialized 100-brand `GET /v1/brand` page with each
+`JSON_ENCODER`, next to Flask-RESTful's own `output_json`, and of the
+whole representation call. ::
+
+    python -m benchmarks.json_encoding
+"""
+import timeit
+
+from flask_restful.representations.json import output_json
+
+from app.extensions import json_encoder
+from app.utils import json_encoder as json_encoder_module
+from benchmarks.common import make_app
+from benchmarks.common import seed_brands
+
+
+def main(number: int = 500) -> None:
+    app = make_app()
+    seed_brands(app, 1000)
+    from app.resources.brand import BrandListsResource
+
+    with app.test_request_context('/v1/brand?per_page=100'):
+        page = BrandListsResource().get()
+
+    encoders = ['json']
+    if json_encoder_module.orjson is not None:
+        encoders.append('orjson')
+    else:
+        print('orjson skipped, it is not installed')
+
+    def report(label, fn) -> None:
+        body = fn()
+        if not isinstance(body, bytes):
+            body = body.get_data()
+        seconds = timeit.timeit(fn, number=number) / number
+        print(f'{label:<36} {len(body):>7} {seconds * 1e6:>8.1f}')
+
+    print(f'{"case":<36} {"bytes":>7} {"us":>8}')
+    with app.test_request_context():
+        report('Flask-RESTful output_json', lambda: output_json(page, 200))
+        for name in encoders:
+            json_encoder.name = name
+            report(f'dumps ({name})', lambda: json_encoder.dumps(page))
+            report(
+                f'output_json ({name})',
+                lambda: json_encoder.output_json(page, 200),
+            )
+    json_encoder.configure()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,40 @@
+"""Per-request cost of recording the Prometheus metrics, i.e. the
+before/after request hooks of `app.utils.metrics.Metrics`. ::
+
+    python -m benchmarks.metrics_overhead
+    PROMETHEUS_MULTIPROC_DIR=$(mktemp -d) python -m benchmarks.metrics_overhead
+
+The multiprocess store has to be chosen before `prometheus_client` is
+imported, hence the environment variable rather than a flag.
+"""
+import os
+import timeit
+
+from flask import Response
+
+from benchmarks.common import make_app
+
+
+def main(number: int = 50000) -> None:
+    app = make_app()
+    from app.extensions import metrics
+    from app.utils.metrics import _start
+
+    response = Response()
+
+    def record():
+        _start()
+        metrics._observe(response)
+
+    with app.test_request_context('/v1/brand'):
+        seconds = timeit.timeit(record, number=number) / number
+
+    mode = (
+        'multiprocess' if 'PROMETHEUS_MULTIPROC_DIR' in os.environ
+        else 'single process'
+    )
+    print(f'{mode}: {seconds * 1e6:.2f} us per request')
+
+
+if __name__ == '__main__':
+    main()
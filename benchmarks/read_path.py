@@ -0,0 +1,91 @@
+"""Memory and allocations of the Core `select()` read path used by
+`BrandCore.get_all` and `get`, compared with loading `Brand` ORM instances
+for the same rows, for a 100-brand page and for a large scan. ::
+
+    python -m benchmarks.read_path
+    python -m benchmarks.read_path --brands 200000 --db-url postgresql://...
+
+Each case loads the rows and serializes them the way `response_model`
+does, in a fresh session so the identity map starts empty; memory is
+measured under `tracemalloc`, time in a separate untraced call.
+"""
+import argparse
+import time
+import tracemalloc
+from typing import Callable
+from typing import Dict
+
+import desert
+from sqlalchemy import select
+
+from app.schemas.resources.brand import BrandSchemas
+from app.utils.decorators import build_dumper
+from benchmarks.common import make_app
+from benchmarks.common import seed_brands
+
+
+def traced(fn: Callable[[], object]) -> Dict[str, float]:
+    """Peak traced memory and allocated blocks still alive at the end of
+    one call of `fn`."""
+    tracemalloc.start()
+    result = fn()
+    blocks = sum(
+        stat.count for stat in tracemalloc.take_snapshot().statistics('lineno')
+    )
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return {'peak_kib': peak / 1024, 'blocks': blocks}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--db-url', default='sqlite://')
+    parser.add_argument('--brands', type=int, default=50000)
+    args = parser.parse_args()
+
+    app = make_app(args.db_url)
+    seed_brands(app, args.brands)
+
+    from app.extensions import db
+    from app.models.brand import Brand
+    from app.resources.brand import brand_core
+
+    dump = build_dumper(
+        desert.schema_class(BrandSchemas.GetListResponse), fast=True,
+    )
+    query_args = BrandSchemas.GetListQuery(per_page=100, count='none')
+    columns = [Brand.id, Brand.code, Brand.name, Brand.is_active]
+
+    def page(rows):
+        return dump({'data': rows, 'page_num': 1, 'page_size': 100})
+
+    cases = {
+        '100-brand page (ORM)': lambda: page(
+            Brand.query.limit(100).all(),
+        ),
+        '100-brand page (Core)': lambda: dump(brand_core.get_all(query_args)),
+        f'scan {args.brands} brands (ORM)': lambda: page(
+            Brand.query.all(),
+        ),
+        f'scan {args.brands} brands (Core)': lambda: page(
+            db.session.execute(select(*columns, Brand.version)).all(),
+        ),
+    }
+
+    print(f'{"case":<28} {"peak KiB":>10} {"blocks":>9} {"ms":>9}')
+    for label, fn in cases.items():
+        with app.app_context():
+            fn()  # warm up the statement caches
+        with app.app_context():
+            stats = traced(fn)
+        with app.app_context():
+            start = time.perf_counter()
+            fn()
+            stats['ms'] = (time.perf_counter() - start) * 1000
+        print(f'{label:<28} {stats["peak_kib"]:>10.1f} '
+              f'{stats["blocks"]:>9.0f} {stats["ms"]:>9.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,282 @@
+"""Baseline benchmark suite for the brand API: every `BrandListsResource`
+and `BrandResource` method through the test client, the decorators on
+their own, and app cold start. Results are written as JSON so runs can be
+compared. ::
+
+    python -m benchmarks.suite --output baseline.json
+    python -m benchmarks.suite --baseline baseline.json --threshold 0.25
+    python -m benchmarks.suite --db-url postgresql://... --brands 100000
+
+With `--baseline`, exits with a non-zero status if the p50 latency of any
+case grew by more than `--threshold` (a fraction) over the baseline.
+"""
+import argparse
+import itertools
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from dataclasses import dataclass
+from typing import Callable
+from typing import Dict
+from typing import List
+
+import jwt
+
+from benchmarks.common import make_app
+from benchmarks.common import measure
+from benchmarks.common import seed_brands
+
+Results = Dict[str, Dict[str, float]]
+
+_COLD_START = (
+    'import time; start = time.perf_counter(); '
+    'from app import create_app; create_app(); '
+    'print(time.perf_counter() - start)'
+)
+
+
+def _ok(response) -> None:
+    if response.status_code >= 400:
+        raise RuntimeError(
+            f'{response.request.method} {response.request.path} returned '
+            f'{response.status_code}: {response.get_data(as_text=True)}',
+        )
+
+
+def _case(fn: Callable[[], object], repeat: int) -> Dict[str, float]:
+    fn()  # warm up
+    stats = measure(fn, repeat=repeat)
+    stats['ops_per_second'] = 1000 / stats['mean_ms']
+    return stats
+
+
+def endpoint_cases(app, brands: int, repeat: int) -> Results:
+    client = app.test_client()
+    ids = itertools.cycle(range(1, brands + 1, max(brands // repeat, 1)))
+    codes = itertools.count()
+
+    def create():
+        response = client.post('/v1/brand', json={
+            'code': f'SU{next(codes):09d}', 'name': 'Suite brand',
+        })
+        _ok(response)
+        return response.get_json()['data']['id']
+
+    def patch():
+        brand_id = next(ids)
+        _ok(client.patch(f'/v1/brand/{brand_id}', json={
+            'code': f'BR{brand_id - 1:08d}', 'name': f'Renamed {brand_id}',
+        }))
+
+    results = {
+        'GET /v1/brand': lambda: _ok(client.get(
+            '/v1/brand', query_string={'per_page': 20, 'page': 10},
+        )),
+        'GET /v1/brand (keyset)': lambda: _ok(client.get(
+            '/v1/brand', query_string={'per_page': 20, 'after': ''},
+        )),
+        'GET /v1/brand (filtered)': lambda: _ok(client.get(
+            '/v1/brand', query_string={'name': 'grocery', 'per_page': 20},
+        )),
+        'GET /v1/brand/<id>': lambda: _ok(
+            client.get(f'/v1/brand/{next(ids)}'),
+        ),
+        'POST /v1/brand': create,
+        'PATCH /v1/brand/<id>': patch,
+    }
+    results = {
+        label: _case(fn, repeat) for label, fn in results.items()
+    }
+
+    # Delete brands created for that purpose, so every call finds its row
+    to_delete = iter([create() for _ in range(repeat + 1)])
+    results['DELETE /v1/brand/<id>'] = _case(
+        lambda: _ok(client.delete(f'/v1/brand/{next(to_delete)}')),
+        repeat,
+    )
+    return results
+
+
+def decorator_cases(app, repeat: int) -> Results:
+    from app.models.brand import Brand
+    from app.schemas.resources.brand import BrandSchemas
+    from app.utils.decorators import request_model
+    from app.utils.decorators import response_model
+    from app.utils.decorators import use_user_token
+
+    @request_model(
+        body_model=BrandSchemas.PostRequest,
+        query_model=BrandSchemas.GetListQuery,
+    )
+    def load(payload, query_args):
+        return payload
+
+    page = {
+        'data': [
+            Brand(id=i, code=f'BR{i:08d}', name=f'Brand {i}', is_active=True)
+            for i in range(100)
+        ],
+        'page_num': 1,
+        'page_size': 100,
+        'total_pages': 10,
+    }
+
+    @response_model(BrandSchemas.GetListResponse)
+    def dump():
+        return page
+
+    @use_user_token()
+    def token(user_token):
+        return user_token
+
+    session_token = jwt.encode(
+        {'name': 'Suite', 'email': 'suite@fgi.local', 'sub': '1', 'iat': 0},
+        'SECRET_KEY1',
+        algorithm='HS256',
+    )
+    contexts = {
+        'request_model (body + query)': (load, app.test_request_context(
+            '/v1/brand?page=2&code=abc', method='POST',
+            json={'code': 'A', 'name': 'Alpha'},
+        )),
+        'response_model (100-item page)': (dump, app.test_request_context(
+            '/v1/brand',
+        )),
+        'use_user_token': (token, app.test_request_context(
+            '/', headers={
+                'Cookie': f'next-auth.session-token={session_token}',
+            },
+        )),
+    }
+
+    results = {}
+    for label, (fn, context) in contexts.items():
+        with context:
+            results[label] = _case(fn, repeat)
+    return results
+
+
+def cold_start_case(runs: int, env: Dict[str, str]) -> Dict[str, float]:
+    """`create_app()` (including imports) in fresh interpreters; it can
+    only run once per process."""
+    samples: List[float] = []
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, '-c', _COLD_START],
+            env=env, check=True, capture_output=True, text=True,
+        ).stdout
+        samples.append(float(output.strip().splitlines()[-1]) * 1000)
+    samples.sort()
+    return {
+        'p50_ms': samples[len(samples) // 2],
+        'p99_ms': samples[-1],
+        'mean_ms': sum(samples) / len(samples),
+    }
+
+
+@dataclass
+class Regression:
+    case: str
+    baseline_ms: float
+    current_ms: float
+
+    def __str__(self) -> str:
+        change = self.current_ms / self.baseline_ms - 1
+        return (
+            f'{self.case}: p50 {self.baseline_ms:.3f} ms -> '
+            f'{self.current_ms:.3f} ms ({change:+.0%})'
+        )
+
+
+def find_regressions(
+    baseline: Results,
+    current: Results,
+    threshold: float,
+) -> List[Regression]:
+    """Cases whose p50 grew by more than `threshold` over `baseline`;
+    cases missing from either run are ignored."""
+    regressions = []
+    for case, stats in current.items():
+        before = baseline.get(case)
+        if before is None or before['p50_ms'] <= 0:
+            continue
+        if stats['p50_ms'] > before['p50_ms'] * (1 + threshold):
+            regressions.append(
+                Regression(case, before['p50_ms'], stats['p50_ms']),
+            )
+    return regressions
+
+
+def _git_revision() -> str:
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            check=True, capture_output=True, text=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--db-url', default='sqlite://')
+    parser.add_argument('--brands', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=200)
+    parser.add_argument('--cold-starts', type=int, default=5)
+    parser.add_argument('--output', help='Write the results to this file')
+    parser.add_argument('--baseline', help='Results file to compare with')
+    parser.add_argument('--threshold', type=float, default=0.2)
+    args = parser.parse_args()
+
+    app = make_app(args.db_url)
+    seed_brands(app, args.brands)
+
+    results: Results = {}
+    results.update(endpoint_cases(app, args.brands, args.repeat))
+    results.update(decorator_cases(app, args.repeat))
+    results['cold start'] = cold_start_case(
+        args.cold_starts, dict(os.environ),
+    )
+
+    report = {
+        'meta': {
+            'revision': _git_revision(),
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'database': args.db_url.split(':', 1)[0],
+            'brands': args.brands,
+            'repeat': args.repeat,
+        },
+        'results': results,
+    }
+
+    print(f'{"case":<32} {"p50 ms":>9} {"p99 ms":>9} {"ops/s":>10}')
+    for case, stats in results.items():
+        ops = stats.get('ops_per_second')
+        print(
+            f'{case:<32} {stats["p50_ms"]:>9.3f} {stats["p99_ms"]:>9.3f} '
+            f'{f"{ops:.0f}" if ops else "-":>10}',
+        )
+
+    if args.output:
+        with open(args.output, 'w') as output:
+            json.dump(report, output, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            baseline = json.load(baseline_file)['results']
+        regressions = find_regressions(baseline, results, args.threshold)
+        for regression in regressions:
+            print(f'REGRESSION {regression}')
+        if regressions:
+            sys.exit(1)
+        print(f'No regressions over {args.threshold:.0%} against '
+              f'{args.baseline}')
+
+
+if __name__ == '__main__':
+    main()
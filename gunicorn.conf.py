@@ -0,0 +1,134 @@
+"""gunicorn settings, read from the working directory by default. Every
+setting can be overridden through the environment:
+
+- `PORT`: port to bind (default 5000)
+- `WEB_CONCURRENCY`: worker processes (default 2 x CPUs + 1, counting
+  the CPUs the process may run on and the container's CPU quota)
+- `GUNICORN_WORKER_CLASS`: `sync` (default), `gthread` or `gevent`; the
+  latter needs the `gevent` package, and `wsgi.py` patches the standard
+  library for it before the app is imported
+- `GUNICORN_THREADS`: threads per `gthread` worker (default 4)
+- `GUNICORN_WORKER_CONNECTIONS`: concurrent requests per `gevent` worker
+  (default 100)
+- `GUNICORN_PRELOAD`: build the app once in the master and fork it
+  (default `true`)
+- `GUNICORN_TIMEOUT`: seconds before a silent worker is restarted, 0
+  to never restart them (default 0 for `sync` workers, which are silent
+  for a whole request, e.g. a streamed export or a large import; 120
+  for the others)
+- `GUNICORN_KEEPALIVE`: seconds to keep idle connections open; set it
+  above the load balancer's idle timeout (default 75)
+- `GUNICORN_MAX_REQUESTS` / `GUNICORN_MAX_REQUESTS_JITTER`: recycle a
+  worker after this many requests, plus up to the jitter so workers do
+  not all restart at once (default 1000 / 100; 0 disables)
+- `PROMETHEUS_MULTIPROC_DIR`: directory the workers share their metrics
+  through (see `app.utils.metrics`); created and emptied on startup
+"""
+import math
+import multiprocessing
+import os
+import shutil
+from typing import Optional
+
+_WORKER_CLASSES = ('sync', 'gthread', 'gevent')
+
+
+def _cpu_quota() -> Optional[float]:
+    """CPUs allowed by the cgroup (v2, then v1) CPU quota, e.g. a
+    container's `--cpus`; `None` when there is no quota."""
+    try:
+        with open('/sys/fs/cgroup/cpu.max') as f:
+            quota, period = f.read().split()
+        if quota != 'max':
+            return int(quota) / int(period)
+        return None
+    except (OSError, ValueError):
+        pass
+    try:
+        with open('/sys/fs/cgroup/cpu/cpu.cfs_quota_us') as f:
+            quota = int(f.read())
+        with open('/sys/fs/cgroup/cpu/cpu.cfs_period_us') as f:
+            period = int(f.read())
+    except (OSError, ValueError):
+        return None
+    return quota / period if quota > 0 else None
+
+
+def available_cpus() -> int:
+    """CPUs the workers can actually use: `cpu_count` is the host's,
+    however few of them the container gets."""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        # Not available on macOS
+        cpus = multiprocessing.cpu_count()
+    quota = _cpu_quota()
+    if quota is not None:
+        cpus = min(cpus, max(math.ceil(quota), 1))
+    return cpus
+
+
+bind = f":{os.getenv('PORT', '5000')}"
+workers = int(os.getenv('WEB_CONCURRENCY', available_cpus() * 2 + 1))
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'sync')
+if worker_class not in _WORKER_CLASSES:
+    raise ValueError(
+        f'GUNICORN_WORKER_CLASS must be one of {", ".join(_WORKER_CLASSES)}',
+    )
+threads = int(os.getenv('GUNICORN_THREADS', '4'))
+worker_connections = int(os.getenv('GUNICORN_WORKER_CONNECTIONS', '100'))
+preload_app = os.getenv('GUNICORN_PRELOAD', 'true').lower() == 'true'
+timeout = int(os.getenv(
+    'GUNICORN_TIMEOUT', '0' if worker_class == 'sync' else '120',
+))
+graceful_timeout = 30
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', '75'))
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', '1000'))
+max_requests_jitter = int(os.getenv('GUNICORN_MAX_REQUESTS_JITTER', '100'))
+# Heartbeat files on tmpfs; a disk-backed /tmp can stall workers
+if os.path.isdir('/dev/shm'):
+    worker_tmp_dir = '/dev/shm'
+
+
+_PROMETHEUS_DIR = os.getenv('PROMETHEUS_MULTIPROC_DIR')
+if _PROMETHEUS_DIR:
+    # The preloaded app opens its metric files in it
+    os.makedirs(_PROMETHEUS_DIR, exist_ok=True)
+
+
+def on_starting(server):
+    # Samples left by a previous run would be added to this one's. Runs
+    # after the app is preloaded, which is fine: the master never records
+    # anything, and each worker opens files of its own after the fork.
+    if not _PROMETHEUS_DIR:
+        return
+    for name in os.listdir(_PROMETHEUS_DIR):
+        path = os.path.join(_PROMETHEUS_DIR, name)
+        if os.path.isdir(path):
+            shutil.rmtree(path)
+        else:
+            os.remove(path)
+
+
+def post_fork(server, worker):
+    # The preloaded app's engines may hold connections opened in the
+    # master; drop them from the child's pools without closing them, so
+    # each worker opens its own
+    if not server.cfg.preload_app:
+        return
+
+    from app.extensions import db
+
+    app = server.app.wsgi()
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=False)
+
+
+def child_exit(server, worker):
+    # Drop the live gauges of dead workers; the counters and histograms
+    # they wrote are kept and still aggregated by /metrics
+    if 'PROMETHEUS_MULTIPROC_DIR' in os.environ:
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,43 @@
+"""add brand trigram indexes
+
+Revision ID: 48c56128bfbc
+Revises: fd8ec587dece
+Create Date: 2026-10-18 09:10:04.512337
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '48c56128bfbc'
+down_revision = 'fd8ec587dece'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # pg_trgm GIN indexes let Postgres answer `ILIKE '%term%'` without a
+    # sequential scan. Other dialects (e.g. SQLite test databases) fall
+    # back to the in-process n-gram index in `app.utils.search`.
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    op.create_index(
+        'ix_brand_code_trgm', 'brand', ['code'],
+        postgresql_using='gin',
+        postgresql_ops={'code': 'gin_trgm_ops'},
+    )
+    op.create_index(
+        'ix_brand_name_trgm', 'brand', ['name'],
+        postgresql_using='gin',
+        postgresql_ops={'name': 'gin_trgm_ops'},
+    )
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    op.drop_index('ix_brand_name_trgm', table_name='brand')
+    op.drop_index('ix_brand_code_trgm', table_name='brand')
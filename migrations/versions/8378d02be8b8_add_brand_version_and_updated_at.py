@@ -0,0 +1,34 @@
+"""add brand version and updated_at
+
+Revision ID: 8378d02be8b8
+Revises: 48c56128bfbc
+Create Date: 2026-10-18 10:02:41.270915
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8378d02be8b8'
+down_revision = '48c56128bfbc'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('brand', schema=None) as batch_op:
+        batch_op.add_column(sa.Column(
+            'version', sa.Integer(), server_default='1', nullable=False,
+        ))
+        batch_op.add_column(sa.Column(
+            'updated_at', sa.DateTime(), server_default=sa.text(
+                'CURRENT_TIMESTAMP',
+            ), nullable=False,
+        ))
+
+
+def downgrade():
+    with op.batch_alter_table('brand', schema=None) as batch_op:
+        batch_op.drop_column('updated_at')
+        batch_op.drop_column('version')
@@ -0,0 +1,62 @@
+"""add brand change feed
+
+Revision ID: c7d2e94f1a3b
+Revises: 8378d02be8b8
+Create Date: 2026-10-18 11:24:08.631207
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c7d2e94f1a3b'
+down_revision = '8378d02be8b8'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Existing brands are at sequence 0, so a feed client starting from
+    # scratch gets all of them
+    with op.batch_alter_table('brand', schema=None) as batch_op:
+        batch_op.add_column(sa.Column(
+            'change_seq', sa.BigInteger(), server_default='0', nullable=False,
+        ))
+        batch_op.create_index(
+            'ix_brand_change_seq', ['change_seq', 'id'], unique=False,
+        )
+
+    op.create_table(
+        'brand_tombstone',
+        sa.Column('brand_id', sa.Integer(), autoincrement=False,
+                  nullable=False),
+        sa.Column('change_seq', sa.BigInteger(), nullable=False),
+        sa.Column('deleted_at', sa.DateTime(), server_default=sa.text(
+            'CURRENT_TIMESTAMP',
+        ), nullable=False),
+        sa.PrimaryKeyConstraint('brand_id'),
+    )
+    op.create_index(
+        'ix_brand_tombstone_change_seq', 'brand_tombstone',
+        ['change_seq', 'brand_id'], unique=False,
+    )
+
+    counter = op.create_table(
+        'brand_change_counter',
+        sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column('value', sa.BigInteger(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.bulk_insert(counter, [{'id': 1, 'value': 0}])
+
+
+def downgrade():
+    op.drop_table('brand_change_counter')
+    op.drop_index(
+        'ix_brand_tombstone_change_seq', table_name='brand_tombstone',
+    )
+    op.drop_table('brand_tombstone')
+    with op.batch_alter_table('brand', schema=None) as batch_op:
+        batch_op.drop_index('ix_brand_change_seq')
+        batch_op.drop_column('change_seq')
@@ -0,0 +1,60 @@
+import os
+import tempfile
+
+import pytest
+
+# Read by the app modules when they are imported. A file, not an in-memory
+# database, so the ASGI app's async engine sees the same tables.
+os.environ.setdefault(
+    'DB_URL', f'sqlite:///{tempfile.mkdtemp()}/sample-gab-be.db',
+)
+os.environ.setdefault('WEBSERVICE_ENV', 'localhost')
+
+from app import create_app  # noqa: E402
+from app.core.brand import clear_list_caches  # noqa: E402
+from app.extensions import db  # noqa: E402
+from app.resources.brand import brand_core  # noqa: E402
+
+
+@pytest.fixture(scope='session')
+def app():
+    # Resources are added to the module-level `api_v1`, so there can only
+    # be one app per process
+    app = create_app()
+    app.testing = True
+    # As in production: Flask-RESTful only hands errors to the app's
+    # handlers when they are not propagated
+    app.config['PROPAGATE_EXCEPTIONS'] = False
+    return app
+
+
+@pytest.fixture(autouse=True)
+def database(app):
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+    # The tables were rebuilt behind BrandCore's back
+    clear_list_caches()
+    brand_core._invalidate_search()
+    yield
+    with app.app_context():
+        db.session.remove()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def make_brand(client):
+    def make_brand(code: str, name: str = '', is_active: bool = True):
+        response = client.post('/v1/brand', json={
+            'code': code,
+            'name': name or f'Brand {code}',
+            'is_active': is_active,
+        })
+        assert response.status_code == 200, response.json
+        return response.json['data']
+
+    return make_brand
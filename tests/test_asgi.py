@@ -0,0 +1,279 @@
+import asyncio
+import gzip
+import json
+
+import pytest
+from werkzeug.wrappers import Response
+
+from app.asgi import create_asgi_app
+
+
+class _Response(Response):
+    # Only what the app sent
+    default_mimetype = None
+
+
+class AsgiClient:
+    """Runs ASGI requests on an event loop of its own, with the lifespan
+    started once for all of them."""
+
+    def __init__(self, app):
+        self.app = app
+        self.loop = asyncio.new_event_loop()
+        self._lifespan_messages = None
+        self._lifespan_sent = []
+
+    def start(self):
+        self._lifespan_messages = asyncio.Queue()
+        self.loop.create_task(self.app(
+            {'type': 'lifespan'},
+            self._lifespan_messages.get,
+            self._record_lifespan,
+        ))
+        self._lifespan('lifespan.startup')
+
+    def stop(self):
+        self._lifespan('lifespan.shutdown')
+        self.loop.close()
+
+    async def _record_lifespan(self, message):
+        self._lifespan_sent.append(message['type'])
+
+    def _lifespan(self, message_type):
+        async def wait():
+            self._lifespan_messages.put_nowait({'type': message_type})
+            while not self._lifespan_sent or not (
+                    self._lifespan_sent[-1].startswith(message_type)
+            ):
+                await asyncio.sleep(0.001)
+
+        self.loop.run_until_complete(wait())
+        assert self._lifespan_sent[-1] == f'{message_type}.complete'
+
+    def open(self, method, path, query_string='', headers=None, json=None):
+        headers = dict(headers or {})
+        body = b''
+        if json is not None:
+            body = _dumps(json)
+            headers['Content-Type'] = 'application/json'
+            headers['Content-Length'] = str(len(body))
+        scope = {
+            'type': 'http',
+            'asgi': {'version': '3.0'},
+            'http_version': '1.1',
+            'method': method,
+            'scheme': 'http',
+            'path': path,
+            'raw_path': path.encode(),
+            'root_path': '',
+            'query_string': query_string.encode(),
+            'headers': [
+                (name.lower().encode(), value.encode())
+                for name, value in headers.items()
+            ],
+            'client': ('127.0.0.1', 50000),
+            'server': ('localhost', 80),
+        }
+        received = []
+        sent = []
+
+        async def receive():
+            if received:
+                # The body was read; wait as a connected client would
+                await asyncio.sleep(3600)
+            received.append(True)
+            return {'type': 'http.request', 'body': body, 'more_body': False}
+
+        async def send(message):
+            sent.append(message)
+
+        self.loop.run_until_complete(self.app(scope, receive, send))
+        start = sent[0]
+        return _Response(
+            b''.join(message.get('body', b'') for message in sent[1:]),
+            status=start['status'],
+            headers=[
+                (name.decode('latin-1'), value.decode('latin-1'))
+                for name, value in start['headers']
+            ],
+        )
+
+
+def _dumps(value):
+    return json.dumps(value).encode()
+
+
+@pytest.fixture(scope='module')
+def asgi(app):
+    client = AsgiClient(create_asgi_app(app))
+    client.start()
+    yield client
+    client.stop()
+
+
+# Headers both apps have to send the same way
+_HEADERS = (
+    'Access-Control-Allow-Credentials',
+    'Access-Control-Allow-Origin',
+    'Content-Encoding',
+    'Content-Type',
+    'ETag',
+    'Vary',
+)
+
+
+def _body(response):
+    data = response.get_data()
+    if response.headers.get('Content-Encoding') == 'gzip':
+        data = gzip.decompress(data)
+    return json.loads(data) if data else None
+
+
+def _assert_same(wsgi_response, asgi_response):
+    assert asgi_response.status_code == wsgi_response.status_code
+    assert _body(asgi_response) == _body(wsgi_response)
+    for name in _HEADERS:
+        assert asgi_response.headers.get(name) == (
+            wsgi_response.headers.get(name)
+        ), name
+
+
+def _both(client, asgi, method, path, query_string='', **kwargs):
+    wsgi_response = client.open(
+        path, method=method, query_string=query_string, **kwargs,
+    )
+    return wsgi_response, asgi.open(method, path, query_string, **kwargs)
+
+
+@pytest.mark.parametrize('path, query_string, headers', [
+    ('/v1/brand', '', {}),
+    ('/v1/brand', 'per_page=2&code=b&match=prefix', {}),
+    ('/v1/brand', 'fields=code', {'Origin': 'https://fgi.local'}),
+    ('/v1/brand', 'fields=name,is_active&per_page=2&after=', {}),
+    ('/v1/brand', 'fields=code,secret', {}),
+    ('/v1/brand', 'per_page=50', {'Accept-Encoding': 'gzip'}),
+    ('/v1/brand', 'per_page=1000', {}),
+    ('/v1/brand', 'after=bad', {'Origin': 'https://evil.example'}),
+    ('/v1/brand/{id}', '', {}),
+    ('/v1/brand/{id}', 'fields=name', {}),
+    ('/v1/brand/{id}', 'fields=id,code', {'Accept-Encoding': 'gzip'}),
+    ('/v1/brand/{id}', 'fields=secret', {}),
+    ('/v1/brand/999', '', {}),
+    ('/v1/brand/changes', '', {}),
+    ('/v1/brand/changes', 'limit=5', {'Accept-Encoding': 'gzip'}),
+    ('/v1/brand/changes', 'since=bad', {}),
+])
+def test_reads_match_wsgi(client, asgi, make_brand, path, query_string,
+                          headers):
+    brands = [make_brand(f'B{number:02}') for number in range(30)]
+    path = path.format(id=brands[0]['id'])
+
+    _assert_same(*_both(
+        client, asgi, 'GET', path, query_string, headers=headers,
+    ))
+
+
+def test_conditional_get_matches_wsgi(client, asgi, make_brand):
+    for number in range(30):
+        make_brand(f'B{number:02}')
+    headers = {'Accept-Encoding': 'gzip'}
+    etag = client.get(
+        '/v1/brand?per_page=50', headers=headers,
+    ).headers['ETag']
+
+    wsgi_response, asgi_response = _both(
+        client, asgi, 'GET', '/v1/brand', 'per_page=50',
+        headers={**headers, 'If-None-Match': etag},
+    )
+
+    assert asgi_response.status_code == 304
+    _assert_same(wsgi_response, asgi_response)
+
+
+def test_writes_match_wsgi(client, asgi, make_brand):
+    make_brand('A1')
+    taken = {'code': 'A1', 'name': 'Taken'}
+    _assert_same(*_both(client, asgi, 'POST', '/v1/brand', json=taken))
+    _assert_same(*_both(client, asgi, 'POST', '/v1/brand', json={'x': 1}))
+    _assert_same(*_both(
+        client, asgi, 'PATCH', '/v1/brand/999', json={'name': 'New'},
+    ))
+
+    created = asgi.open('POST', '/v1/brand', json={'code': 'C1'})
+    brand_id = created.json['data']['id']
+    assert client.get(f'/v1/brand/{brand_id}').json['data']['code'] == 'C1'
+
+    response = asgi.open(
+        'PATCH', f'/v1/brand/{brand_id}', json={'name': 'Renamed'},
+        headers={'If-Match': '"brand-0-0"'},
+    )
+    assert response.status_code == 412
+    response = asgi.open(
+        'PATCH', f'/v1/brand/{brand_id}', json={'name': 'Renamed'},
+    )
+    assert response.json['data']['name'] == 'Renamed'
+    assert client.get(f'/v1/brand/{brand_id}').json['data']['name'] == (
+        'Renamed'
+    )
+    assert asgi.open('DELETE', f'/v1/brand/{brand_id}').status_code == 200
+    assert client.get(f'/v1/brand/{brand_id}').status_code == 404
+
+
+def test_change_feed_follows_writes(client, asgi, make_brand):
+    make_brand('A1')
+    first = asgi.open('GET', '/v1/brand/changes').json
+    assert [change['code'] for change in first['data']] == ['A1']
+
+    created = asgi.open('POST', '/v1/brand', json={'code': 'C1'})
+    asgi.open('DELETE', f"/v1/brand/{created.json['data']['id']}")
+
+    _assert_same(*_both(
+        client, asgi, 'GET', '/v1/brand/changes',
+        f"since={first['next_token']}",
+    ))
+    changes = asgi.open(
+        'GET', '/v1/brand/changes', f"since={first['next_token']}",
+    ).json['data']
+    assert [change['deleted'] for change in changes] == [True]
+
+
+@pytest.mark.parametrize('method, path, kwargs', [
+    ('GET', '/', {}),
+    ('GET', '/v1/brand/export', {'query_string': 'format=ndjson'}),
+    ('POST', '/v1/brand/batch', {
+        'json': {'items': [{'op': 'delete', 'id': 999}]},
+    }),
+    ('PUT', '/v1/brand', {}),
+    ('GET', '/missing', {}),
+    ('OPTIONS', '/v1/brand', {'headers': {
+        'Origin': 'https://fgi.local',
+        'Access-Control-Request-Method': 'PATCH',
+    }}),
+])
+def test_other_routes_are_served_by_flask(client, asgi, make_brand, method,
+                                          path, kwargs):
+    make_brand('A1')
+    kwargs = dict(kwargs)
+    query_string = kwargs.pop('query_string', '')
+    wsgi_response, asgi_response = _both(
+        client, asgi, method, path, query_string, **kwargs,
+    )
+
+    assert asgi_response.status_code == wsgi_response.status_code
+    assert asgi_response.get_data() == wsgi_response.get_data()
+    assert asgi_response.headers.get('Access-Control-Allow-Methods') == (
+        wsgi_response.headers.get('Access-Control-Allow-Methods')
+    )
+
+
+def test_native_requests_are_in_the_metrics(asgi, make_brand):
+    make_brand('A1')
+    asgi.open('GET', '/v1/brand')
+
+    response = asgi.open('GET', '/metrics')
+
+    assert response.status_code == 200
+    assert (
+        'http_request_duration_seconds_count{method="GET",'
+        'resource="brandlistsresource",status="2xx"}'
+    ) in response.get_data(as_text=True)
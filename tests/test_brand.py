@@ -0,0 +1,75 @@
+def test_create_and_get(client, make_brand):
+    brand = make_brand('A1', 'Alpha')
+
+    response = client.get(f"/v1/brand/{brand['id']}")
+
+    assert response.status_code == 200
+    assert response.json['data'] == {
+        'id': brand['id'],
+        'code': 'A1',
+        'name': 'Alpha',
+        'is_active': True,
+    }
+
+
+def test_create_duplicate_code_is_409(client, make_brand):
+    make_brand('A1')
+
+    response = client.post('/v1/brand', json={'code': 'A1', 'name': 'Again'})
+
+    assert response.status_code == 409
+    assert response.json['error'] == 'Brand code already exists'
+
+
+def test_get_missing_is_404(client):
+    response = client.get('/v1/brand/999')
+
+    assert response.status_code == 404
+    assert response.json['error'] == 'Brand not found'
+
+
+def test_invalid_body_is_400(client):
+    response = client.post('/v1/brand', json={'code': 1})
+
+    assert response.status_code == 400
+    assert 'code' in response.json['messages']
+
+
+def test_partial_patch_only_writes_sent_fields(client, make_brand):
+    brand = make_brand('A1', 'Alpha', is_active=False)
+
+    response = client.patch(f"/v1/brand/{brand['id']}", json={'name': 'x'})
+
+    assert response.status_code == 200
+    assert response.json['data'] == {
+        'id': brand['id'],
+        'code': 'A1',
+        'name': 'x',
+        'is_active': False,
+    }
+    assert client.get(f"/v1/brand/{brand['id']}").json['data']['code'] == 'A1'
+
+
+def test_patch_to_taken_code_is_409(client, make_brand):
+    make_brand('A1')
+    brand = make_brand('B2')
+
+    response = client.patch(f"/v1/brand/{brand['id']}", json={'code': 'A1'})
+
+    assert response.status_code == 409
+
+
+def test_patch_missing_is_404(client):
+    response = client.patch('/v1/brand/999', json={'name': 'x'})
+
+    assert response.status_code == 404
+
+
+def test_delete(client, make_brand):
+    brand = make_brand('A1')
+
+    response = client.delete(f"/v1/brand/{brand['id']}")
+
+    assert response.status_code == 200
+    assert client.get(f"/v1/brand/{brand['id']}").status_code == 404
+    assert client.delete(f"/v1/brand/{brand['id']}").status_code == 404
@@ -0,0 +1,54 @@
+def test_batch_applies_every_op(client, make_brand):
+    kept = make_brand('A1')
+    gone = make_brand('B1')
+
+    response = client.post('/v1/brand/batch', json={'items': [
+        {'op': 'update', 'id': kept['id'], 'name': 'Renamed'},
+        {'op': 'delete', 'id': gone['id']},
+        {'op': 'create', 'code': 'B1', 'name': 'Reused'},
+        {'op': 'delete', 'id': 999},
+    ]})
+
+    assert response.status_code == 200
+    assert [item['status'] for item in response.json['data']] == [
+        'updated', 'deleted', 'created', 'not_found',
+    ]
+    assert client.get(f"/v1/brand/{kept['id']}").json['data']['name'] == (
+        'Renamed'
+    )
+
+
+def test_oversized_batch_is_400(client):
+    items = [{'op': 'delete', 'id': number} for number in range(1001)]
+
+    response = client.post('/v1/brand/batch', json={'items': items})
+
+    assert response.status_code == 400
+    assert response.json['messages'] == {
+        'items': ['Longer than maximum length 1000.'],
+    }
+
+
+def test_update_to_taken_empty_code_is_conflict(client, make_brand):
+    make_brand('')
+    brand = make_brand('A1')
+
+    response = client.post('/v1/brand/batch', json={'items': [
+        {'op': 'update', 'id': brand['id'], 'code': ''},
+        {'op': 'update', 'id': brand['id'], 'name': 'Still written'},
+    ]})
+
+    assert response.status_code == 200
+    assert [item['status'] for item in response.json['data']] == [
+        'conflict', 'updated',
+    ]
+    assert client.get(f"/v1/brand/{brand['id']}").json['data']['code'] == 'A1'
+
+
+def test_batch_without_items_is_400(client):
+    response = client.post('/v1/brand/batch', json={})
+
+    assert response.status_code == 400
+    assert response.json['messages'] == {
+        'items': ['Missing data for required field.'],
+    }
@@ -0,0 +1,81 @@
+from sqlalchemy.dialects import postgresql
+
+from app.core.brand import change_seq_expression
+from app.core.brand import changes_statement
+from app.core.brand import insert_brand
+
+
+def _codes(changes):
+    return [change['code'] for change in changes]
+
+
+def test_feed_pages_through_writes_and_deletes(client, make_brand):
+    first = make_brand('A1')
+    make_brand('B1')
+    make_brand('C1')
+
+    page = client.get('/v1/brand/changes?limit=2').json
+    assert _codes(page['data']) == ['A1', 'B1']
+    assert page['has_more'] is True
+
+    client.patch(f"/v1/brand/{first['id']}", json={'name': 'Renamed'})
+    client.delete(f"/v1/brand/{first['id']}")
+    page = client.get(f"/v1/brand/changes?since={page['next_token']}").json
+    assert _codes(page['data']) == ['C1', None]
+    assert page['data'][1] == {
+        'id': first['id'],
+        'deleted': True,
+        'code': None,
+        'name': None,
+        'is_active': None,
+        'updated_at': page['data'][1]['updated_at'],
+    }
+    assert page['has_more'] is False
+
+    empty = client.get(f"/v1/brand/changes?since={page['next_token']}").json
+    assert empty == {
+        'data': [], 'next_token': page['next_token'], 'has_more': False,
+    }
+
+
+def test_batch_is_one_change(client, make_brand):
+    make_brand('A1')
+    token = client.get('/v1/brand/changes').json['next_token']
+
+    client.post('/v1/brand/batch', json={'items': [
+        {'op': 'create', 'code': 'B1'},
+        {'op': 'create', 'code': 'C1'},
+    ]})
+
+    page = client.get(f'/v1/brand/changes?since={token}').json
+    assert _codes(page['data']) == ['B1', 'C1']
+
+
+def test_invalid_token_is_400(client):
+    assert client.get('/v1/brand/changes?since=bad').status_code == 400
+
+
+def _postgres_sql(statement):
+    return str(statement.compile(dialect=postgresql.dialect()))
+
+
+def test_postgres_writes_use_the_transaction_id():
+    statement = insert_brand(
+        {'code': 'A1', 'change_seq': change_seq_expression('postgresql')},
+        'postgresql',
+    )
+
+    assert 'pg_current_xact_id()' in _postgres_sql(statement)
+    assert 'brand_change_counter' not in _postgres_sql(statement)
+
+
+def test_postgres_feed_stops_at_running_transactions():
+    sql = _postgres_sql(changes_statement(0, 0, 100, 'postgresql'))
+
+    # Once for each side of the union
+    assert sql.count('pg_snapshot_xmin(pg_current_snapshot())') == 2
+
+
+def test_other_databases_use_the_counter():
+    assert change_seq_expression('sqlite') is None
+    assert 'pg_snapshot_xmin' not in str(changes_statement(0, 0, 100, 'sqlite'))
@@ -0,0 +1,137 @@
+import csv
+import io
+import json
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy import insert
+from sqlalchemy.engine import Row
+
+from app.extensions import db
+from app.models.brand import Brand
+from app.resources.brand import brand_core
+from app.schemas.resources.brand import BrandSchemas
+
+
+@pytest.fixture
+def brands(make_brand):
+    make_brand('A1', 'Alpha, Inc.')
+    make_brand('B1', 'Beta "Foods"', is_active=False)
+    make_brand('C1', 'Gamma')
+
+
+def _export(client, **params):
+    response = client.get('/v1/brand/export', query_string=params)
+    assert response.status_code == 200, response.json
+    return response
+
+
+def test_ndjson_export(client, brands):
+    response = _export(client)
+
+    assert response.mimetype == 'application/x-ndjson'
+    assert response.is_streamed
+    assert response.headers['Content-Disposition'] == (
+        'attachment; filename=brands.ndjson'
+    )
+    lines = response.get_data(as_text=True).splitlines()
+    assert [json.loads(line) for line in lines] == [
+        {'id': 1, 'code': 'A1', 'name': 'Alpha, Inc.', 'is_active': True},
+        {'id': 2, 'code': 'B1', 'name': 'Beta "Foods"', 'is_active': False},
+        {'id': 3, 'code': 'C1', 'name': 'Gamma', 'is_active': True},
+    ]
+
+
+def test_csv_export(client, brands):
+    response = _export(client, format='csv')
+
+    assert response.mimetype == 'text/csv'
+    assert response.is_streamed
+    assert response.headers['Content-Disposition'] == (
+        'attachment; filename=brands.csv'
+    )
+    rows = list(csv.reader(io.StringIO(response.get_data(as_text=True))))
+    assert rows == [
+        ['id', 'code', 'name', 'is_active'],
+        ['1', 'A1', 'Alpha, Inc.', 'True'],
+        ['2', 'B1', 'Beta "Foods"', 'False'],
+        ['3', 'C1', 'Gamma', 'True'],
+    ]
+
+
+@pytest.mark.parametrize('params, expected', [
+    ({'is_active': 'false'}, ['B1']),
+    ({'is_active': 'true'}, ['A1', 'C1']),
+    ({'code': 'c'}, ['C1']),
+    ({'name': 'alpha'}, ['A1']),
+    ({'name': 'a', 'is_active': 'true'}, ['A1', 'C1']),
+    ({'code': 'missing'}, []),
+])
+def test_export_applies_the_filters(client, brands, params, expected):
+    response = _export(client, **params)
+
+    assert [
+        json.loads(line)['code']
+        for line in response.get_data(as_text=True).splitlines()
+    ] == expected
+
+
+def test_export_of_selected_fields(client, brands):
+    response = _export(client, format='csv', fields='name,code')
+
+    # In `EXPORT_COLUMNS` order
+    assert response.get_data(as_text=True).splitlines()[:2] == [
+        'code,name', 'A1,"Alpha, Inc."',
+    ]
+
+
+def test_export_with_invalid_format_is_400(client):
+    response = client.get('/v1/brand/export?format=xml')
+
+    assert response.status_code == 400
+
+
+@pytest.fixture
+def many_brands(app):
+    with app.app_context():
+        db.session.execute(insert(Brand), [
+            {'code': f'K{number:04}', 'name': 'Brand', 'is_active': True}
+            for number in range(2500)
+        ])
+        db.session.commit()
+
+
+def test_large_export_is_streamed_in_batches(client, many_brands):
+    response = client.get('/v1/brand/export', buffered=False)
+
+    chunks = list(response.response)
+    response.close()
+
+    # One chunk per batch of 1000 rows
+    assert [chunk.count(b'\n') for chunk in chunks] == [1000, 1000, 500]
+
+
+def test_export_reads_plain_rows_through_one_cursor(app, many_brands):
+    executions = []
+
+    def record(conn, cursor, statement, parameters, context, many):
+        executions.append(context.execution_options)
+
+    query_args = BrandSchemas.ExportQuery()
+    with app.app_context():
+        event.listen(db.engine, 'before_cursor_execute', record)
+        try:
+            batches = brand_core.export(query_args, batch_size=100)
+            first = next(batches)
+            assert isinstance(first[0], Row)
+            sizes = [len(first)] + [len(batch) for batch in batches]
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', record)
+        # Rows, not ORM instances held by the session
+        assert not db.session.identity_map
+
+    assert sizes == [100] * 25
+    # A single query, fetched 100 rows at a time from a server-side cursor
+    (options,) = executions
+    assert options['yield_per'] == 100
+    assert options['stream_results'] is True
@@ -0,0 +1,71 @@
+import json
+
+
+def _import(client, body, fmt='ndjson'):
+    return client.post(f'/v1/brand/import?format={fmt}', data=body)
+
+
+def test_import_upserts_on_code(client, make_brand):
+    make_brand('A1', 'Old')
+
+    response = _import(client, 'code,name\nA1,New\nB1,Beta\n', 'csv')
+
+    assert response.status_code == 200
+    assert response.json['rows_read'] == 2
+    assert response.json['rows_merged'] == 2
+    codes = {
+        brand['code']: brand['name']
+        for brand in client.get('/v1/brand').json['data']
+    }
+    assert codes == {'A1': 'New', 'B1': 'Beta'}
+
+
+def test_csv_row_without_code_is_rejected(client):
+    response = _import(client, 'code,name\n,No code\nA1,Alpha\n', 'csv')
+
+    assert response.json['rows_rejected'] == 1
+    assert response.json['errors'] == [{
+        'line': 2,
+        'messages': {'code': ['Missing data for required field.']},
+    }]
+    brands = client.get('/v1/brand').json['data']
+    assert [brand['code'] for brand in brands] == ['A1']
+
+
+def test_reported_errors_are_capped(client):
+    lines = ['not json'] * 150 + [
+        json.dumps({'code': f'C{number}'}) for number in range(5)
+    ] + [json.dumps({'name': 'No code'})] * 50
+
+    response = _import(client, '\n'.join(lines) + '\n')
+
+    assert response.json['rows_read'] == 205
+    assert response.json['rows_rejected'] == 200
+    assert response.json['rows_merged'] == 5
+    assert len(response.json['errors']) == 100
+    assert response.json['errors'][0]['line'] == 1
+
+
+def test_ndjson_values_keep_unicode_line_separators(client):
+    name = 'Line\u2028Paragraph\u2029Next\x85Form\x0cGroup\x1d'
+    body = json.dumps({'code': 'A1', 'name': name}, ensure_ascii=False)
+
+    response = _import(client, body.encode() + b'\n')
+
+    assert response.json['rows_read'] == 1
+    assert response.json['rows_merged'] == 1
+    assert client.get('/v1/brand').json['data'][0]['name'] == name
+
+
+def test_csv_cells_keep_unicode_line_separators(client):
+    body = 'code,name\nA1,x\x0cy\u2028z\x1c\nB1,Beta\r\n'
+
+    response = _import(client, body.encode(), 'csv')
+
+    assert response.json['rows_read'] == 2
+    assert response.json['rows_rejected'] == 0
+    codes = {
+        brand['code']: brand['name']
+        for brand in client.get('/v1/brand').json['data']
+    }
+    assert codes == {'A1': 'x\x0cy\u2028z\x1c', 'B1': 'Beta'}
@@ -0,0 +1,144 @@
+import fakeredis
+import pytest
+
+from app.core.brand import BRAND_COUNTS_KEY
+from app.extensions import cache
+from app.extensions import db
+from app.models.brand import Brand
+from app.utils.cache import RedisBackend
+from app.utils.cursor import encode_cursor
+
+
+def test_keyset_pages_through_every_brand(client, make_brand):
+    ids = [make_brand(f'K{i}')['id'] for i in range(5)]
+
+    seen = []
+    response = client.get('/v1/brand?after=&per_page=2')
+    while True:
+        assert response.status_code == 200
+        body = response.json
+        assert body['total_pages'] is None
+        seen += [brand['id'] for brand in body['data']]
+        if body['next_cursor'] is None:
+            break
+        response = client.get(
+            f"/v1/brand?per_page=2&after={body['next_cursor']}",
+        )
+
+    assert seen == ids
+
+
+def test_keyset_applies_filters(client, make_brand):
+    make_brand('K1', is_active=False)
+    active = make_brand('K2')
+
+    response = client.get('/v1/brand?after=&is_active=true')
+
+    assert [brand['id'] for brand in response.json['data']] == [active['id']]
+
+
+@pytest.mark.parametrize('cursor', [
+    'not-a-cursor',
+    encode_cursor({'seq': 1}),
+    encode_cursor({'id': 'x'}),
+    encode_cursor({'id': 2 ** 64}),
+    'eyJpZCI6MWU5OTl9',  # {"id":1e999}
+])
+def test_keyset_invalid_cursor_is_400(client, cursor):
+    response = client.get(f'/v1/brand?after={cursor}')
+
+    assert response.status_code == 400
+    assert response.json['error'] == 'Invalid brand cursor'
+
+
+def test_offset_pages(client, make_brand):
+    for i in range(3):
+        make_brand(f'K{i}')
+
+    body = client.get('/v1/brand?per_page=2&page=2').json
+
+    assert body['total_pages'] == 2
+    assert [brand['code'] for brand in body['data']] == ['K2']
+
+
+def test_per_page_over_limit_is_400(client):
+    assert client.get('/v1/brand?per_page=1000').status_code == 400
+
+
+@pytest.fixture
+def shared_cache():
+    """`cache` on a Redis shared with a (simulated) other worker"""
+    server = fakeredis.FakeServer()
+    previous = cache.backend
+    cache.backend = RedisBackend(
+        fakeredis.FakeRedis(server=server), ttl=60, prefix='test:',
+    )
+    yield RedisBackend(
+        fakeredis.FakeRedis(server=server), ttl=60, prefix='test:',
+    )
+    cache.backend = previous
+
+
+def _insert_behind_the_back(app, code):
+    """Insert a brand without clearing this worker's caches, as a write
+    made in another worker looks to this one"""
+    with app.app_context():
+        db.session.add(Brand(code=code, name=code, is_active=True))
+        db.session.commit()
+
+
+def _page(client, count):
+    return client.get(f'/v1/brand?per_page=1&count={count}').json
+
+
+def test_exact_count(client, make_brand):
+    make_brand('K1')
+    make_brand('K2')
+
+    body = _page(client, 'exact')
+
+    assert (body['total_pages'], body['count_strategy']) == (2, 'exact')
+
+
+def test_no_count(client, make_brand):
+    make_brand('K1')
+
+    body = _page(client, 'none')
+
+    assert (body['total_pages'], body['count_strategy']) == (None, 'none')
+    assert len(body['data']) == 1
+
+
+def test_estimated_count_falls_back_to_exact_on_sqlite(client, make_brand):
+    make_brand('K1')
+    make_brand('K2')
+
+    body = _page(client, 'estimated')
+
+    assert (body['total_pages'], body['count_strategy']) == (2, 'exact')
+
+
+def test_cached_count_is_cleared_by_writes(app, client, make_brand):
+    make_brand('K1')
+    assert _page(client, 'cached')['total_pages'] == 1
+
+    _insert_behind_the_back(app, 'K2')
+    body = _page(client, 'cached')
+    assert (body['total_pages'], body['count_strategy']) == (1, 'cached')
+
+    make_brand('K3')
+    assert _page(client, 'cached')['total_pages'] == 3
+
+
+def test_cached_count_is_cleared_by_writes_in_other_workers(
+        app, client, make_brand, shared_cache,
+):
+    make_brand('K1')
+    assert _page(client, 'cached')['total_pages'] == 1
+    _insert_behind_the_back(app, 'K2')
+    assert _page(client, 'cached')['total_pages'] == 1
+
+    # What `clear_list_caches` does in the worker that wrote
+    shared_cache.delete(BRAND_COUNTS_KEY)
+
+    assert _page(client, 'cached')['total_pages'] == 2
@@ -0,0 +1,72 @@
+import pytest
+from sqlalchemy import insert
+
+from app.extensions import db
+from app.models.brand import Brand
+
+
+@pytest.fixture
+def brands(make_brand):
+    make_brand('ABC-1', 'Alpha Foods')
+    make_brand('XABC', 'Beta 100%')
+    make_brand('ABC', 'Gamma_Drinks')
+
+
+def codes(client, **params):
+    response = client.get('/v1/brand', query_string=params)
+    assert response.status_code == 200, response.json
+    return sorted(brand['code'] for brand in response.json['data'])
+
+
+@pytest.mark.parametrize('params, expected', [
+    ({'code': 'abc'}, ['ABC', 'ABC-1', 'XABC']),
+    ({'code': 'abc', 'match': 'prefix'}, ['ABC', 'ABC-1']),
+    ({'code': 'abc', 'match': 'exact'}, ['ABC']),
+    ({'name': 'foods'}, ['ABC-1']),
+    ({'code': '', 'match': 'prefix'}, ['ABC', 'ABC-1', 'XABC']),
+])
+def test_match_modes(client, brands, params, expected):
+    assert codes(client, **params) == expected
+
+
+def test_terms_are_literal(client, brands):
+    # `*` and quotes used to switch the match mode; they are plain text
+    assert codes(client, code='ABC*') == []
+    assert codes(client, code='"ABC"') == []
+    # LIKE wildcards match themselves only
+    assert codes(client, name='100%') == ['XABC']
+    assert codes(client, name='ta_1') == []
+    assert codes(client, name='a_d') == ['ABC']
+
+
+def test_unknown_match_mode_is_400(client):
+    response = client.get('/v1/brand', query_string={'match': 'regex'})
+
+    assert response.status_code == 400
+    assert 'match' in response.json['messages']
+
+
+def test_search_sees_rows_written_outside_brand_core(app, client, brands):
+    # Builds the in-process n-gram index used on SQLite
+    assert codes(client, code='abc') == ['ABC', 'ABC-1', 'XABC']
+
+    # e.g. another worker or a data migration
+    with app.app_context():
+        db.session.execute(insert(Brand), [
+            {'code': 'ZABC', 'name': 'Late', 'is_active': True},
+        ])
+        db.session.commit()
+
+    assert codes(client, code='abc') == ['ABC', 'ABC-1', 'XABC', 'ZABC']
+
+
+def test_export_applies_match_mode(client, brands):
+    response = client.get(
+        '/v1/brand/export',
+        query_string={'code': 'abc', 'match': 'exact', 'format': 'csv'},
+    )
+
+    assert response.status_code == 200
+    assert response.data.decode().splitlines()[1:] == [
+        '3,ABC,Gamma_Drinks,True',
+    ]
@@ -0,0 +1,94 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import fakeredis
+import pytest
+import redis
+
+from app.extensions import cache
+from app.utils.cache import Cache
+from app.utils.cache import LRUBackend
+from app.utils.cache import RedisBackend
+
+
+class _DownRedis:
+    """Client whose every call fails, as when Redis is unreachable"""
+
+    def __getattr__(self, name):
+        def fail(*args, **kwargs):
+            raise redis.ConnectionError('Connection refused')
+
+        return fail
+
+
+@pytest.fixture(params=['memory', 'redis'])
+def backend(request):
+    if request.param == 'memory':
+        return LRUBackend(ttl=60)
+    return RedisBackend(fakeredis.FakeRedis(), ttl=60, prefix='test:')
+
+
+@pytest.fixture
+def use_backend():
+    previous = cache.backend
+
+    def use_backend(backend):
+        cache.backend = backend
+
+    yield use_backend
+    cache.backend = previous
+
+
+def test_get_or_load_caches(backend):
+    store = Cache(backend)
+    assert store.get_or_load('key', lambda: {'value': 1}) == {'value': 1}
+    assert store.get_or_load('key', lambda: {'value': 2}) == {'value': 1}
+    assert (store.hits, store.misses) == (1, 1)
+
+
+def test_counters_add_up_across_threads():
+    store = Cache(LRUBackend(ttl=60))
+    keys = [f'key-{number % 50}' for number in range(2000)]
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        list(executor.map(
+            lambda key: store.get_or_load(key, lambda: {'key': key}), keys,
+        ))
+
+    assert store.hits + store.misses == len(keys)
+
+
+def test_invalidation_during_load_is_not_overwritten(backend):
+    store = Cache(backend)
+
+    def load():
+        # A write lands while the old value is being read
+        store.invalidate('key')
+        return {'value': 'stale'}
+
+    assert store.get_or_load('key', load) == {'value': 'stale'}
+    assert backend.get('key') is None
+    assert store.get_or_load('key', lambda: {'value': 'new'}) == {
+        'value': 'new',
+    }
+    assert backend.get('key') == {'value': 'new'}
+
+
+def test_redis_errors_fail_open():
+    backend = RedisBackend(_DownRedis(), ttl=60)
+    store = Cache(backend)
+    assert store.get_or_load('key', lambda: {'value': 1}) == {'value': 1}
+    store.invalidate_many(['key', 'other'])
+    assert store.stats()['failures'] == 4
+
+
+def test_brand_reads_survive_redis_outage(client, make_brand, use_backend):
+    brand = make_brand('A1')
+    use_backend(RedisBackend(_DownRedis(), ttl=60))
+
+    response = client.get(f'/v1/brand/{brand["id"]}')
+    assert response.status_code == 200
+    assert response.json['data']['code'] == 'A1'
+
+    response = client.patch(f'/v1/brand/{brand["id"]}', json={'name': 'New'})
+    assert response.status_code == 200
+    assert client.get(f'/v1/brand/{brand["id"]}').json['data']['name'] == 'New'
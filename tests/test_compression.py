@@ -0,0 +1,151 @@
+import gzip
+import zlib
+
+import pytest
+import zstandard
+from flask import Response
+from werkzeug.http import parse_accept_header
+
+from app.extensions import compression
+
+
+@pytest.fixture
+def brands(make_brand):
+    # Big enough for the list response to be compressed
+    for number in range(30):
+        make_brand(f'B{number:02}')
+
+
+def _decode(response):
+    encoding = response.headers.get('Content-Encoding')
+    data = response.get_data()
+    if encoding == 'gzip':
+        return gzip.decompress(data)
+    if encoding == 'zstd':
+        return zstandard.ZstdDecompressor().decompressobj().decompress(data)
+    return data
+
+
+@pytest.mark.parametrize('accept_encoding, expected', [
+    ('gzip', 'gzip'),
+    ('zstd', 'zstd'),
+    ('gzip, zstd', 'zstd'),
+    ('gzip, zstd;q=0.5', 'gzip'),
+    ('gzip;q=0.1, zstd;q=0.2', 'zstd'),
+    ('gzip;q=0, zstd;q=0', None),
+    ('*', 'zstd'),
+    ('identity', None),
+    ('br', None),
+    ('', None),
+])
+def test_encoding_is_negotiated(client, brands, accept_encoding, expected):
+    identity = client.get('/v1/brand?per_page=30')
+
+    response = client.get(
+        '/v1/brand?per_page=30', headers={'Accept-Encoding': accept_encoding},
+    )
+
+    assert response.headers.get('Content-Encoding') == expected
+    assert 'Accept-Encoding' in response.vary
+    assert _decode(response) == identity.get_data()
+
+
+def test_small_response_is_not_compressed(client, make_brand):
+    make_brand('A1')
+
+    response = client.get('/v1/brand', headers={'Accept-Encoding': 'gzip'})
+
+    assert len(response.get_data()) < compression.min_size
+    assert 'Content-Encoding' not in response.headers
+
+
+@pytest.mark.parametrize('length, expected', [
+    (1023, None),
+    (1024, 'gzip'),
+    (None, 'gzip'),
+])
+def test_minimum_size(length, expected):
+    assert compression.negotiate(
+        parse_accept_header('gzip'), 200, 'application/json', length,
+    ) == expected
+
+
+@pytest.mark.parametrize('mimetype, expected', [
+    ('application/json', 'gzip'),
+    ('application/x-ndjson', 'gzip'),
+    ('text/csv', 'gzip'),
+    ('text/html', 'gzip'),
+    ('image/png', None),
+    ('application/zip', None),
+    (None, None),
+])
+def test_mimetype_allowlist(mimetype, expected):
+    assert compression.negotiate(
+        parse_accept_header('gzip'), 200, mimetype, 4096,
+    ) == expected
+
+
+@pytest.mark.parametrize('status_code, cache_control, expected', [
+    (200, '', 'gzip'),
+    (204, '', None),
+    (304, '', None),
+    (200, 'public, no-transform', None),
+])
+def test_responses_left_as_they_are(status_code, cache_control, expected):
+    assert compression.negotiate(
+        parse_accept_header('gzip'),
+        status_code,
+        'application/json',
+        4096,
+        cache_control,
+    ) == expected
+
+
+@pytest.mark.parametrize('mimetype, headers', [
+    ('application/json', {'Content-Encoding': 'br'}),
+    ('image/png', {}),
+])
+def test_response_is_not_recompressed(app, mimetype, headers):
+    body = b'x' * 4096
+
+    with app.test_request_context(headers={'Accept-Encoding': 'gzip'}):
+        response = app.process_response(
+            Response(body, mimetype=mimetype, headers=headers),
+        )
+
+    assert response.headers.get('Content-Encoding') == headers.get(
+        'Content-Encoding',
+    )
+    assert response.get_data() == body
+
+
+def _decompressor(encoding):
+    if encoding == 'gzip':
+        return zlib.decompressobj(31)
+    return zstandard.ZstdDecompressor().decompressobj()
+
+
+@pytest.mark.parametrize('encoding', ['gzip', 'zstd'])
+@pytest.mark.parametrize('export_format', ['csv', 'ndjson'])
+def test_streamed_export_decodes_chunk_by_chunk(
+        client, brands, encoding, export_format,
+):
+    identity = client.get(f'/v1/brand/export?format={export_format}')
+
+    response = client.get(
+        f'/v1/brand/export?format={export_format}',
+        headers={'Accept-Encoding': encoding},
+        buffered=False,
+    )
+    assert response.headers['Content-Encoding'] == encoding
+    assert 'Content-Length' not in response.headers
+
+    decompressor = _decompressor(encoding)
+    decoded = b''
+    for chunk in response.response:
+        decoded += decompressor.decompress(chunk)
+        # Every chunk is flushed: whole lines can be decoded right away
+        assert decoded.endswith(b'\n')
+    response.close()
+
+    assert decoded == identity.get_data()
@@ -0,0 +1,88 @@
+def test_get_sends_etag_and_304(client, make_brand):
+    brand = make_brand('A1')
+
+    response = client.get(f"/v1/brand/{brand['id']}")
+    etag = response.headers['ETag']
+    response = client.get(
+        f"/v1/brand/{brand['id']}", headers={'If-None-Match': etag},
+    )
+
+    assert response.status_code == 304
+    assert response.headers['ETag'] == etag
+
+
+def test_fields_change_the_etag(client, make_brand):
+    brand = make_brand('A1')
+
+    full = client.get(f"/v1/brand/{brand['id']}")
+    sparse = client.get(f"/v1/brand/{brand['id']}?fields=code")
+    response = client.get(
+        f"/v1/brand/{brand['id']}?fields=code",
+        headers={'If-None-Match': full.headers['ETag']},
+    )
+
+    assert sparse.headers['ETag'] != full.headers['ETag']
+    assert response.status_code == 200
+    assert response.json['data'] == {'code': 'A1'}
+
+
+def test_patch_with_stale_if_match_is_412(client, make_brand):
+    brand = make_brand('A1')
+    etag = client.get(f"/v1/brand/{brand['id']}").headers['ETag']
+    client.patch(f"/v1/brand/{brand['id']}", json={'name': 'First'})
+
+    response = client.patch(
+        f"/v1/brand/{brand['id']}",
+        json={'name': 'Second'},
+        headers={'If-Match': etag},
+    )
+
+    assert response.status_code == 412
+    assert client.get(f"/v1/brand/{brand['id']}").json['data']['name'] == (
+        'First'
+    )
+
+
+def test_if_match_accepts_any_representation(client, make_brand):
+    brand = make_brand('A1')
+    etag = client.get(f"/v1/brand/{brand['id']}?fields=name").headers['ETag']
+
+    response = client.patch(
+        f"/v1/brand/{brand['id']}",
+        json={'name': 'New'},
+        headers={'If-Match': etag},
+    )
+    assert response.status_code == 200
+
+    stale = client.delete(
+        f"/v1/brand/{brand['id']}", headers={'If-Match': etag},
+    )
+    current = client.delete(
+        f"/v1/brand/{brand['id']}",
+        headers={'If-Match': response.headers['ETag']},
+    )
+    assert stale.status_code == 412
+    assert current.status_code == 200
+
+
+def test_compressed_responses_have_their_own_etag(client, make_brand):
+    for number in range(30):
+        make_brand(f'B{number:02}')
+
+    plain = client.get('/v1/brand?per_page=30')
+    gzip = client.get(
+        '/v1/brand?per_page=30', headers={'Accept-Encoding': 'gzip'},
+    )
+
+    assert gzip.headers['Content-Encoding'] == 'gzip'
+    assert gzip.headers['ETag'] == plain.headers['ETag'][:-1] + '-gzip"'
+
+    response = client.get(
+        '/v1/brand?per_page=30',
+        headers={
+            'Accept-Encoding': 'gzip',
+            'If-None-Match': gzip.headers['ETag'],
+        },
+    )
+    assert response.status_code == 304
+    assert response.headers['ETag'] == gzip.headers['ETag']
@@ -0,0 +1,104 @@
+import pytest
+
+
+def _preflight(client, path='/v1/brand', origin='https://fgi.local',
+               method='PATCH', **headers):
+    return client.options(path, headers={
+        'Origin': origin,
+        'Access-Control-Request-Method': method,
+        **headers,
+    })
+
+
+@pytest.mark.parametrize('origin', [
+    'https://fgi.local',
+    'HTTPS://FGI.LOCAL',
+    'https://shop.fgi.local',
+    'https://Shop.FGI.local',
+    'http://localhost:3000',
+])
+def test_allowed_origin_is_reflected(client, origin):
+    response = client.get('/v1/brand', headers={'Origin': origin})
+
+    assert response.headers['Access-Control-Allow-Origin'] == origin
+    assert response.headers['Access-Control-Allow-Credentials'] == 'true'
+    assert 'Origin' in response.vary
+
+
+@pytest.mark.parametrize('origin', [
+    'https://evil.example',
+    'https://fgi.local.evil.example',
+    'https://evil.example/?https://fgi.local',
+    'http://localhost:123456',
+    'https://service.ap-southeast-1.awsapprunner.com',
+])
+def test_disallowed_origin_gets_no_cors_headers(client, origin):
+    response = client.get('/v1/brand', headers={'Origin': origin})
+
+    assert response.status_code == 200
+    assert 'Access-Control-Allow-Origin' not in response.headers
+    assert 'Access-Control-Allow-Credentials' not in response.headers
+    assert 'Origin' in response.vary
+
+
+def test_request_without_origin_gets_no_cors_headers(client):
+    response = client.get('/v1/brand')
+
+    assert not [
+        name for name in response.headers.keys()
+        if name.startswith('Access-Control-')
+    ]
+    assert 'Origin' in response.vary
+
+
+def test_preflight_is_answered_with_204(client):
+    response = _preflight(
+        client, **{'Access-Control-Request-Headers': 'Authorization, X-Id'},
+    )
+
+    assert response.status_code == 204
+    assert response.get_data() == b''
+    assert response.headers['Access-Control-Allow-Origin'] == (
+        'https://fgi.local'
+    )
+    assert response.headers['Access-Control-Allow-Credentials'] == 'true'
+    assert response.headers['Access-Control-Allow-Methods'] == (
+        'DELETE, GET, HEAD, OPTIONS, PATCH, POST, PUT'
+    )
+    assert response.headers['Access-Control-Allow-Headers'] == (
+        'Authorization, X-Id'
+    )
+    assert response.headers['Access-Control-Max-Age'] == '7200'
+    assert 'Origin' in response.vary
+
+
+def test_preflight_from_disallowed_origin_is_not_allowed(client):
+    response = _preflight(client, origin='https://evil.example')
+
+    assert response.status_code == 204
+    assert 'Access-Control-Allow-Origin' not in response.headers
+    assert 'Access-Control-Allow-Methods' not in response.headers
+
+
+def test_preflight_for_unknown_method_is_not_allowed(client):
+    response = _preflight(client, method='TRACE')
+
+    assert 'Access-Control-Allow-Methods' not in response.headers
+
+
+def test_preflight_to_unknown_route_is_not_answered(client):
+    response = _preflight(client, path='/missing')
+
+    assert response.status_code != 204
+    assert 'Access-Control-Allow-Methods' not in response.headers
+
+
+def test_preflights_are_in_the_metrics(client):
+    _preflight(client)
+
+    response = client.get('/metrics')
+
+    assert (
+        'http_request_duration_seconds_count{method="OPTIONS",'
+        'resource="brandlistsresource",status="2xx"}'
+    ) in response.get_data(as_text=True)
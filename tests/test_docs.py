@@ -0,0 +1,84 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFERRED_MODULES = ('apispec', 'flask_apispec', 'jwt', 'webargs')
+
+
+def _run(script, tmp_path, **env):
+    # A fresh interpreter, as the test session has imported them all
+    result = subprocess.run(
+        [sys.executable, '-c', script],
+        env={
+            **os.environ,
+            'DB_URL': f'sqlite:///{tmp_path}/docs.db',
+            'WEBSERVICE_ENV': 'localhost',
+            'ENABLE_APISPEC': 'true',
+            **env,
+        },
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(result.stdout)
+
+
+APP_SCRIPT = f'''
+import json
+import sys
+
+from app import create_app
+
+def imported():
+    return [name for name in {DEFERRED_MODULES!r} if name in sys.modules]
+
+app = create_app()
+at_start = imported()
+response = app.test_client().get('/swagger/')
+print(json.dumps({{
+    'at_start': at_start,
+    'status': response.status_code,
+    'paths': sorted(response.json['paths']),
+    'after_swagger': imported(),
+}}))
+'''
+
+
+def test_docs_libraries_are_imported_on_the_first_swagger_request(tmp_path):
+    result = _run(APP_SCRIPT, tmp_path)
+
+    assert result['at_start'] == []
+    assert result['status'] == 200
+    assert '/v1/brand/{brand_id}' in result['paths']
+    assert {'apispec', 'flask_apispec'} <= set(result['after_swagger'])
+
+
+@pytest.mark.parametrize('spec_file', [False, True])
+def test_exported_spec_is_served(tmp_path, spec_file):
+    path = tmp_path / 'swagger.json'
+    subprocess.run(
+        [
+            sys.executable, '-m', 'flask', '--app', 'wsgi:create_app()',
+            'docs', 'export', str(path),
+        ],
+        env={**os.environ, 'DB_URL': 'sqlite://'},
+        cwd=ROOT,
+        capture_output=True,
+        check=True,
+    )
+    exported = json.loads(path.read_text())
+
+    result = _run(
+        APP_SCRIPT, tmp_path,
+        APISPEC_SPEC_FILE=str(path) if spec_file else '',
+    )
+
+    assert result['paths'] == sorted(exported['paths'])
+    if spec_file:
+        # Served from the file, so nothing was built
+        assert result['after_swagger'] == []
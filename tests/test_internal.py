@@ -0,0 +1,31 @@
+import pytest
+
+_ROUTES = ('/metrics', '/internal/stats')
+
+
+@pytest.mark.parametrize('path', _ROUTES)
+def test_served_on_loopback_without_token(client, path):
+    assert client.get(path).status_code == 200
+
+
+@pytest.mark.parametrize('path', _ROUTES)
+def test_hidden_from_other_addresses(client, path):
+    response = client.get(path, environ_base={'REMOTE_ADDR': '10.0.0.8'})
+
+    assert response.status_code == 404
+
+
+@pytest.mark.parametrize('path', _ROUTES)
+def test_token_is_required_when_set(client, monkeypatch, path):
+    monkeypatch.setenv('INTERNAL_API_TOKEN', 'scrape-token')
+    remote = {'REMOTE_ADDR': '10.0.0.8'}
+
+    assert client.get(path).status_code == 404
+    assert client.get(
+        path, environ_base=remote,
+        headers={'Authorization': 'Bearer wrong'},
+    ).status_code == 404
+    assert client.get(
+        path, environ_base=remote,
+        headers={'Authorization': 'Bearer scrape-token'},
+    ).status_code == 200
@@ -0,0 +1,60 @@
+import enum
+import json
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import date
+from decimal import Decimal
+
+import pytest
+from werkzeug.datastructures import ImmutableMultiDict
+from werkzeug.datastructures import MultiDict
+
+from app.utils.json_encoder import JsonEncoder
+
+
+class _Color(str, enum.Enum):
+    RED = 'red'
+
+
+class _Level(enum.IntEnum):
+    HIGH = 3
+
+
+@dataclass
+class _Point:
+    x: int
+
+
+@pytest.fixture
+def encoders(monkeypatch):
+    def encoder(name):
+        monkeypatch.setenv('JSON_ENCODER', name)
+        return JsonEncoder()
+
+    return encoder('orjson'), encoder('json')
+
+
+@pytest.mark.parametrize('value', [
+    MultiDict([('a', '1'), ('a', '2'), ('b', '3')]),
+    {'args': ImmutableMultiDict([('page', '2')])},
+    OrderedDict([('b', 1), ('a', 2)]),
+    {'color': _Color.RED, 'level': _Level.HIGH},
+    [_Point(1), uuid.UUID(int=1), Decimal('1.10'), date(2020, 1, 2)],
+    {1: 'int key', None: 'null key'},
+    {'big': 2 ** 70},
+    'ünïcode',
+])
+def test_orjson_matches_stdlib(encoders, value):
+    orjson_encoder, json_encoder = encoders
+
+    assert json.loads(orjson_encoder.dumps(value)) == (
+        json.loads(json_encoder.dumps(value))
+    )
+
+
+def test_unencodable_values_still_fail(encoders):
+    orjson_encoder, _ = encoders
+
+    with pytest.raises(TypeError):
+        orjson_encoder.dumps({'value': object()})
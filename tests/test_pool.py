@@ -0,0 +1,135 @@
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy import text
+from sqlalchemy.exc import TimeoutError
+from sqlalchemy.pool import NullPool
+from sqlalchemy.pool import QueuePool
+
+from app.core import brand_async
+from app.utils.pool import engine_options
+from app.utils.pool import PoolStats
+
+POSTGRES_URL = 'postgresql://user:password@db/brands'
+
+
+@pytest.fixture(autouse=True)
+def pool_env(monkeypatch):
+    for name in (
+            'DB_POOL_SIZE', 'DB_MAX_OVERFLOW', 'DB_POOL_TIMEOUT',
+            'DB_POOL_RECYCLE', 'DB_POOL_PRE_PING', 'DB_STATEMENT_TIMEOUT_MS',
+            'DB_PGBOUNCER', 'ASYNC_DB_URL',
+    ):
+        monkeypatch.delenv(name, raising=False)
+
+
+def test_sqlite_keeps_the_defaults():
+    assert engine_options('sqlite:///brands.db') == {}
+
+
+def test_queue_pool_defaults():
+    assert engine_options(POSTGRES_URL) == {
+        'pool_pre_ping': False,
+        'poolclass': QueuePool,
+        'pool_size': 5,
+        'max_overflow': 10,
+        'pool_timeout': 30.0,
+        'pool_recycle': 1800,
+    }
+
+
+def test_pool_settings_from_the_environment(monkeypatch):
+    monkeypatch.setenv('DB_POOL_SIZE', '20')
+    monkeypatch.setenv('DB_MAX_OVERFLOW', '0')
+    monkeypatch.setenv('DB_POOL_TIMEOUT', '2.5')
+    monkeypatch.setenv('DB_POOL_RECYCLE', '-1')
+    monkeypatch.setenv('DB_POOL_PRE_PING', 'true')
+
+    options = engine_options(POSTGRES_URL)
+
+    assert options['pool_size'] == 20
+    assert options['max_overflow'] == 0
+    assert options['pool_timeout'] == 2.5
+    assert options['pool_recycle'] == -1
+    assert options['pool_pre_ping'] is True
+
+
+def test_pgbouncer_leaves_pooling_to_pgbouncer(monkeypatch):
+    monkeypatch.setenv('DB_PGBOUNCER', 'true')
+
+    options = engine_options(POSTGRES_URL)
+
+    assert options['poolclass'] is NullPool
+    assert 'pool_size' not in options
+
+
+def test_statement_timeout_is_a_startup_option(monkeypatch):
+    monkeypatch.setenv('DB_STATEMENT_TIMEOUT_MS', '5000')
+
+    assert engine_options(POSTGRES_URL)['connect_args'] == {
+        'options': '-c statement_timeout=5000',
+    }
+
+
+def _async_engine_arguments(monkeypatch):
+    calls = []
+
+    def create_async_engine(url, **kwargs):
+        calls.append((url, kwargs))
+        return SimpleNamespace(sync_engine=None)
+
+    monkeypatch.setattr(
+        brand_async, 'create_async_engine', create_async_engine,
+    )
+    monkeypatch.setattr(brand_async.pool_stats, 'attach', lambda engine: None)
+    brand_async.create_engine_from_env()
+    return calls[0]
+
+
+def test_asyncpg_under_pgbouncer(monkeypatch):
+    monkeypatch.setenv('ASYNC_DB_URL', 'postgresql+asyncpg://db/brands')
+    monkeypatch.setenv('DB_PGBOUNCER', 'true')
+    monkeypatch.setenv('DB_STATEMENT_TIMEOUT_MS', '5000')
+
+    url, kwargs = _async_engine_arguments(monkeypatch)
+
+    assert kwargs['poolclass'] is NullPool
+    assert kwargs['connect_args'] == {
+        'server_settings': {'statement_timeout': '5000'},
+        'statement_cache_size': 0,
+    }
+    assert url.endswith('?prepared_statement_cache_size=0')
+
+
+def test_pool_stats_count_pool_events(tmp_path):
+    stats = PoolStats()
+    engine = create_engine(
+        f'sqlite:///{tmp_path}/pool.db',
+        poolclass=stats.pool_class(),
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=0.01,
+    )
+    stats.attach(engine)
+
+    for _ in range(3):
+        with engine.connect() as connection:
+            connection.execute(text('SELECT 1'))
+    with engine.connect():
+        with pytest.raises(TimeoutError):
+            engine.connect()
+
+    report = stats.stats()
+    assert (report['connects'], report['checkouts'], report['checkins']) == (
+        1, 4, 4,
+    )
+    assert report['timeouts'] == 1
+    assert set(report['checkout_wait_ms']) == {'p50', 'p99', 'max'}
+    assert report['checkout_wait_ms']['max'] >= 10
+    assert report['pools'] == [{
+        'class': 'TimedQueuePool',
+        'size': 1,
+        'checked_out': 0,
+        'overflow': 0,
+    }]
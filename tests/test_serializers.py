@@ -0,0 +1,114 @@
+from collections import namedtuple
+from types import SimpleNamespace
+
+import desert
+import pytest
+from marshmallow import ValidationError
+from werkzeug.datastructures import ImmutableMultiDict
+
+from app.models.brand import Brand
+from app.schemas.resources.brand import BrandSchemas
+from app.utils.serializers import compile_dumper
+from app.utils.serializers import compile_loader
+
+# Stands in for the SQLAlchemy rows of the Core read path
+_Row = namedtuple('_Row', ['id', 'code', 'name', 'version'])
+
+
+def _page(size: int):
+    return {
+        'data': [
+            Brand(id=i, code=f'BR{i:08d}', name=f'Brand {i}', is_active=True)
+            for i in range(size)
+        ],
+        'page_num': 1,
+        'page_size': size,
+        'total_pages': 10,
+    }
+
+
+DUMP_SAMPLES = [
+    (BrandSchemas.GetListResponse, _page(100)),
+    (BrandSchemas.GetListResponse, _page(0)),
+    (BrandSchemas.GetListResponse, {
+        'data': [
+            {'id': '7', 'code': 5, 'name': None, 'is_active': 1},
+            SimpleNamespace(id=True, code=b'x', name='n', is_active='no'),
+            {'id': 1},
+        ],
+        'page_num': 2.0,
+        'page_size': 1,
+        'total_pages': None,
+        'next_cursor': 'abc',
+    }),
+    (BrandSchemas.GetListResponse, {
+        'data': [_Row(1, 'A', 'Alpha', 3), _Row('2', None, 'B', 1)],
+    }),
+    (BrandSchemas.GetListResponse, {'data': None}),
+    (BrandSchemas.GetResponse, {
+        'data': Brand(id=1, code='A', name='B', is_active=False),
+    }),
+    (BrandSchemas.GetResponse, {'data': None}),
+    (BrandSchemas.GetResponse, {}),
+]
+
+LOAD_SAMPLES = [
+    (BrandSchemas.GetListQuery, {}),
+    (BrandSchemas.GetListQuery, {
+        'page': '2', 'per_page': '50', 'code': 'abc', 'is_active': 'true',
+    }),
+    (BrandSchemas.GetListQuery, {'page': 3, 'is_active': 0, 'after': ''}),
+    (BrandSchemas.GetListQuery, {'is_active': None, 'after': None}),
+    (BrandSchemas.GetListQuery, ImmutableMultiDict(
+        [('page', '4'), ('page', '5'), ('name', 'x')],
+    )),
+    (BrandSchemas.GetListQuery, {'per_page': '101'}),
+    (BrandSchemas.GetListQuery, {'per_page': '1.5'}),
+    (BrandSchemas.GetListQuery, {'page': True}),
+    # Over Python's limit on the digits `int()` converts
+    (BrandSchemas.GetListQuery, {'page': '1' * 5000}),
+    (BrandSchemas.GetListQuery, {'page': '-' + '9' * 5000}),
+    (BrandSchemas.GetListQuery, {'code': 'x' * 251}),
+    (BrandSchemas.GetListQuery, {'is_active': 'maybe'}),
+    (BrandSchemas.GetListQuery, {'match': 'prefix'}),
+    (BrandSchemas.GetListQuery, {'match': 'regex'}),
+    (BrandSchemas.GetListQuery, {'unknown': 1}),
+    (BrandSchemas.GetListQuery, {'page': None}),
+    (BrandSchemas.GetListQuery, []),
+    (BrandSchemas.PostRequest, {
+        'code': 'A', 'name': 'Alpha', 'is_active': False,
+    }),
+    (BrandSchemas.PostRequest, {'code': 'A'}),
+    (BrandSchemas.PostRequest, {'code': 1}),
+    (BrandSchemas.PostRequest, {'name': None}),
+    (BrandSchemas.PatchRequest, {}),
+    (BrandSchemas.PatchRequest, {'name': 'x', 'is_active': None}),
+]
+
+
+def _result(fn, data):
+    try:
+        return 'ok', fn(data)
+    except ValidationError as e:
+        return 'error', e.messages
+
+
+@pytest.mark.parametrize('model, sample', DUMP_SAMPLES)
+def test_fast_dumper_matches_marshmallow(model, sample):
+    schema = desert.schema(model)
+    dump = compile_dumper(schema)
+    assert dump is not None
+
+    expected, actual = schema.dump(sample), dump(sample)
+
+    assert actual == expected
+    assert list(actual) == list(expected)
+
+
+@pytest.mark.parametrize('model, sample', LOAD_SAMPLES)
+def test_fast_loader_matches_marshmallow(model, sample):
+    schema = desert.schema(model)
+    load = compile_loader(schema, model)
+    assert load is not None
+
+    assert _result(load, sample) == _result(schema.load, sample)
@@ -0,0 +1,102 @@
+import threading
+import time
+
+import fakeredis
+
+from app.core import brand as brand_module
+from app.core.brand import decode_page
+from app.core.brand import encode_page
+from app.utils.singleflight import SingleFlight
+
+
+def _workers(count=2):
+    client = fakeredis.FakeRedis()
+    return [
+        SingleFlight(window=60, shared=client, prefix='test:')
+        for _ in range(count)
+    ]
+
+
+def _down_redis():
+    server = fakeredis.FakeServer()
+    server.connected = False
+    return fakeredis.FakeRedis(server=server)
+
+
+def test_concurrent_calls_run_once():
+    flights = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def slow():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return 'result'
+
+    results = []
+    leader = threading.Thread(target=lambda: results.append(
+        flights.do('key', slow),
+    ))
+    leader.start()
+    started.wait(5)
+    follower = threading.Thread(target=lambda: results.append(
+        flights.do('key', slow),
+    ))
+    follower.start()
+    deadline = time.monotonic() + 5
+    while flights.coalesced == 0 and time.monotonic() < deadline:
+        time.sleep(0.001)
+    release.set()
+    leader.join()
+    follower.join()
+
+    assert results == ['result', 'result']
+    assert len(calls) == 1
+
+
+def test_results_are_shared_across_workers():
+    first, second = _workers()
+
+    assert first.do('key', lambda: {'value': 1}) == {'value': 1}
+    assert second.do('key', lambda: {'value': 2}) == {'value': 1}
+    assert second.shared_hits == 1
+
+
+def test_clear_in_one_worker_drops_every_worker_result():
+    first, second = _workers()
+    first.do('key', lambda: {'value': 1})
+    second.do('key', lambda: {'value': 1})
+
+    # A write served by the second worker
+    second.clear()
+
+    assert first.do('key', lambda: {'value': 2}) == {'value': 2}
+    assert second.do('key', lambda: {'value': 3}) == {'value': 2}
+
+
+def test_shared_outage_falls_back_to_this_worker():
+    flights = SingleFlight(window=60, shared=_down_redis())
+
+    assert flights.do('key', lambda: {'value': 1}) == {'value': 1}
+    assert flights.do('key', lambda: {'value': 2}) == {'value': 1}
+    flights.clear()
+    assert flights.do('key', lambda: {'value': 3}) == {'value': 3}
+    assert flights.stats()['failures'] == 4
+
+
+def test_brand_requests_survive_shared_outage(client, make_brand,
+                                              monkeypatch):
+    monkeypatch.setattr(brand_module, 'brand_list_flights', SingleFlight(
+        window=60,
+        shared=_down_redis(),
+        encode=encode_page,
+        decode=decode_page,
+    ))
+    brand = make_brand('A1')
+
+    assert client.get('/v1/brand').status_code == 200
+    response = client.patch(f"/v1/brand/{brand['id']}", json={'name': 'New'})
+    assert response.status_code == 200
+    assert client.get('/v1/brand').json['data'][0]['name'] == 'New'
@@ -0,0 +1,76 @@
+import desert
+import pytest
+
+from app.schemas.resources.brand import BrandSchemas
+from app.utils.decorators import build_sparse_dumper
+
+
+@pytest.fixture
+def brands(make_brand):
+    return [make_brand(f'B{number}', f'Brand {number}') for number in range(5)]
+
+
+@pytest.mark.parametrize('fields, keys', [
+    ('code', ['code']),
+    ('name,code', ['code', 'name']),
+    (' code , code,', ['code']),
+    ('', ['code', 'id', 'is_active', 'name']),
+])
+def test_list_returns_only_the_fields(client, brands, fields, keys):
+    response = client.get('/v1/brand', query_string={'fields': fields})
+
+    assert response.status_code == 200
+    assert [sorted(brand) for brand in response.json['data']] == [keys] * 5
+    # The envelope is left alone
+    assert response.json['page_num'] == 1
+    assert response.json['count_strategy'] == 'exact'
+
+
+@pytest.mark.parametrize('fields, expected', [
+    ('name', {'name': 'Brand 0'}),
+    ('id,is_active', {'id': 1, 'is_active': True}),
+])
+def test_get_returns_only_the_fields(client, brands, fields, expected):
+    response = client.get(
+        f"/v1/brand/{brands[0]['id']}", query_string={'fields': fields},
+    )
+
+    assert response.status_code == 200
+    assert response.json == {'data': expected}
+
+
+@pytest.mark.parametrize('path', ['/v1/brand', '/v1/brand/1'])
+def test_unknown_field_is_400(client, brands, path):
+    response = client.get(path, query_string={'fields': 'code,secret'})
+
+    assert response.status_code == 400
+    assert response.json['messages'] == {
+        'fields': ['Unknown fields: secret.'],
+    }
+
+
+def test_keyset_pages_without_the_id_field(client, brands):
+    codes = []
+    cursor = ''
+    while cursor is not None:
+        body = client.get(
+            '/v1/brand',
+            query_string={'fields': 'code', 'per_page': 2, 'after': cursor},
+        ).json
+        assert all(list(brand) == ['code'] for brand in body['data'])
+        codes += [brand['code'] for brand in body['data']]
+        cursor = body['next_cursor']
+
+    # The id was still read to build the cursors
+    assert codes == [f'B{number}' for number in range(5)]
+
+
+def test_dumpers_are_built_once_per_set_of_fields():
+    for_fields = build_sparse_dumper(
+        desert.schema_class(BrandSchemas.GetResponse), 'data',
+    )
+
+    assert for_fields('code,name') is for_fields('name,code')
+    assert for_fields('') is for_fields(None)
+    assert for_fields('code') is not for_fields('name')
+
@@ -0,0 +1,128 @@
+import json
+import logging
+import re
+
+import pytest
+from flask import Flask
+from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import text
+
+from app.utils.timing import phase
+from app.utils.timing import RequestTiming
+
+
+@pytest.fixture
+def timed_app(monkeypatch):
+    """App running `count` queries per request, as the resources' timing
+    hooks can't be enabled on the shared test app"""
+    monkeypatch.setenv('ENABLE_SERVER_TIMING', 'true')
+    monkeypatch.setenv('QUERY_BUDGET', '3')
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    db = SQLAlchemy(app)
+    RequestTiming().init_app(app)
+
+    @app.route('/queries/<int:count>')
+    def queries(count):
+        with phase('core'):
+            for _ in range(count):
+                db.session.execute(text('SELECT 1'))
+        with phase('serialize'):
+            return {'count': count}
+
+    return app
+
+
+def _metrics(header):
+    return dict(
+        (name, params) for name, _, params in (
+            metric.partition(';') for metric in header.split(', ')
+        )
+    )
+
+
+def _duration(params):
+    return float(params.split(';')[0].removeprefix('dur='))
+
+
+def test_server_timing_header(timed_app):
+    response = timed_app.test_client().get('/queries/2')
+
+    metrics = _metrics(response.headers['Server-Timing'])
+    assert list(metrics) == ['core', 'serialize', 'db', 'total']
+    for name in ('core', 'serialize', 'total'):
+        assert re.fullmatch(r'dur=\d+\.\d{2}', metrics[name])
+    assert re.fullmatch(r'dur=\d+\.\d{2};desc="2 queries"', metrics['db'])
+
+
+@pytest.mark.parametrize('count', [0, 1, 3])
+def test_queries_are_counted_from_cursor_events(timed_app, count):
+    response = timed_app.test_client().get(f'/queries/{count}')
+
+    metrics = _metrics(response.headers['Server-Timing'])
+    assert metrics['db'].endswith(f'desc="{count} queries"')
+    # The statements all ran inside the `core` phase
+    assert _duration(metrics['db']) <= _duration(metrics['core'])
+
+
+def _log_record(caplog):
+    (record,) = [
+        record for record in caplog.records
+        if record.name == 'app.utils.timing'
+    ]
+    return record.levelno, json.loads(record.getMessage())
+
+
+def test_request_is_logged_as_json(timed_app, caplog):
+    caplog.set_level(logging.INFO, logger='app.utils.timing')
+
+    timed_app.test_client().get('/queries/3')
+
+    level, record = _log_record(caplog)
+    assert level == logging.INFO
+    assert record['method'] == 'GET'
+    assert record['path'] == '/queries/3'
+    assert record['status'] == 200
+    assert record['queries'] == 3
+    assert set(record['phases_ms']) == {'core', 'serialize'}
+    assert record['total_ms'] >= record['phases_ms']['core']
+    assert record['query_budget_exceeded'] is False
+
+
+def test_requests_over_the_query_budget_are_flagged(timed_app, caplog):
+    caplog.set_level(logging.INFO, logger='app.utils.timing')
+
+    response = timed_app.test_client().get('/queries/4')
+
+    assert 'query-budget;desc="exceeded"' in response.headers['Server-Timing']
+    level, record = _log_record(caplog)
+    assert level == logging.WARNING
+    assert record['queries'] == 4
+    assert record['query_budget_exceeded'] is True
+
+
+def test_no_header_when_disabled(client, caplog):
+    caplog.set_level(logging.INFO, logger='app.utils.timing')
+
+    response = client.get('/v1/brand')
+
+    assert response.status_code == 200
+    assert 'Server-Timing' not in response.headers
+    assert not [
+        record for record in caplog.records
+        if record.name == 'app.utils.timing'
+    ]
+
+
+def test_requests_without_flask_are_timed():
+    timing = RequestTiming()
+    timing.enabled = True
+
+    timing.begin()
+    with phase('core'):
+        pass
+    header = timing.end('GET', '/v1/brand', 200)
+
+    assert list(_metrics(header)) == ['core', 'db', 'total']
+    # The context is cleared for the next request
+    assert timing.end('GET', '/v1/brand', 200) is None
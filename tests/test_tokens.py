@@ -0,0 +1,121 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import jwt
+import pytest
+
+from app.errors import exception_response
+from app.utils.tokens import TokenVerifier
+
+
+def _token(subject='user-1', key='secret', kid=None, **claims):
+    return jwt.encode({
+        'name': 'User',
+        'email': 'user@fgi.local',
+        'sub': subject,
+        'iat': int(time.time()),
+        **claims,
+    }, key, algorithm='HS256', headers={'kid': kid} if kid else None)
+
+
+def _wait_until(timestamp):
+    while time.time() <= timestamp:
+        time.sleep(0.01)
+
+
+def test_repeated_tokens_are_cached(monkeypatch):
+    monkeypatch.setenv('JWT_SECRET_KEY', 'secret')
+    verifier = TokenVerifier()
+    token = _token()
+
+    assert verifier.verify(token).sub == 'user-1'
+    assert verifier.verify(token).sub == 'user-1'
+    assert (verifier.hits, verifier.misses) == (1, 1)
+
+
+def test_counters_add_up_across_threads(monkeypatch):
+    monkeypatch.setenv('JWT_SECRET_KEY', 'secret')
+    verifier = TokenVerifier()
+    tokens = [_token(f'user-{number}') for number in range(50)] * 20
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        list(executor.map(verifier.verify, tokens))
+
+    assert verifier.hits + verifier.misses == len(tokens)
+
+
+def test_key_is_picked_by_kid(monkeypatch):
+    monkeypatch.setenv('JWT_SECRET_KEYS', 'new:new-secret,old:old-secret')
+    verifier = TokenVerifier()
+
+    assert verifier.verify(_token('a', 'old-secret', kid='old')).sub == 'a'
+    assert verifier.verify(_token('b', 'new-secret', kid='new')).sub == 'b'
+    # Tokens without a `kid` use the first key
+    assert verifier.verify(_token('c', 'new-secret')).sub == 'c'
+    with pytest.raises(jwt.InvalidSignatureError):
+        verifier.verify(_token('d', 'old-secret', kid='new'))
+
+
+def test_unknown_kid_is_rejected(monkeypatch):
+    monkeypatch.setenv('JWT_SECRET_KEYS', 'new:new-secret')
+    verifier = TokenVerifier()
+
+    with pytest.raises(jwt.InvalidSignatureError):
+        verifier.verify(_token(key='new-secret', kid='other'))
+
+
+def test_retired_key_is_rejected_after_rotation(monkeypatch):
+    monkeypatch.setenv('JWT_SECRET_KEYS', 'old:old-secret')
+    verifier = TokenVerifier()
+    token = _token(key='old-secret', kid='old')
+    assert verifier.verify(token).sub == 'user-1'
+
+    monkeypatch.setenv('JWT_SECRET_KEYS', 'new:new-secret,old:old-secret')
+    verifier.configure()
+    assert verifier.verify(token).sub == 'user-1'
+    assert verifier.verify(_token(key='new-secret', kid='new')).sub == (
+        'user-1'
+    )
+
+    monkeypatch.setenv('JWT_SECRET_KEYS', 'new:new-secret')
+    verifier.configure()
+    with pytest.raises(jwt.InvalidSignatureError):
+        verifier.verify(token)
+
+
+def test_expired_token_is_not_served_from_the_cache(monkeypatch):
+    monkeypatch.setenv('JWT_SECRET_KEY', 'secret')
+    verifier = TokenVerifier()
+    expires_at = int(time.time()) + 1
+    token = _token(exp=expires_at)
+    assert verifier.verify(token).sub == 'user-1'
+
+    _wait_until(expires_at)
+
+    with pytest.raises(jwt.ExpiredSignatureError):
+        verifier.verify(token)
+    assert verifier.hits == 0
+
+
+def test_cached_entries_expire_after_the_ttl(monkeypatch):
+    monkeypatch.setenv('JWT_SECRET_KEY', 'secret')
+    monkeypatch.setenv('JWT_CACHE_TTL', '0.05')
+    verifier = TokenVerifier()
+    token = _token(exp=int(time.time()) + 60)
+    verifier.verify(token)
+
+    _wait_until(time.time() + 0.05)
+    verifier.verify(token)
+
+    assert (verifier.hits, verifier.misses) == (0, 2)
+
+
+@pytest.mark.parametrize('error, expected', [
+    (jwt.InvalidSignatureError('Bad'), (400, 'Signature Verification Failed')),
+    (jwt.DecodeError('Not enough segments'), (400, 'Not Enough JWT Segments')),
+    (jwt.DecodeError('Other'), (500, 'Unhandled JWT Error')),
+])
+def test_jwt_errors_have_their_own_responses(error, expected):
+    body, status = exception_response(error)
+
+    assert (status, body['error']) == expected
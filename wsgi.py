@@ -1,4 +1,13 @@
-from app import create_app
+import os
+
+if os.getenv('GUNICORN_WORKER_CLASS') == 'gevent':
+    # First thing gunicorn imports from the app: patch before the app
+    # (preloaded in the master) imports ssl, sockets and threads
+    from gevent import monkey
+
+    monkey.patch_all()
+
+from app import create_app  # noqa: E402
 
 if __name__ == '__main__':
     create_app().run()